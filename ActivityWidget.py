@@ -1,398 +1,368 @@
-import time
-import threading
-from datetime import datetime, timedelta
-from pynput import mouse, keyboard
-import os
-import logging
-import tkinter as tk
-from tkinter import ttk
-
-# Logging setup
-logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    handlers=[
-                        logging.FileHandler("desktop_widget.log"),
-                        logging.StreamHandler()
-                    ])
-
-# Global variables
-INACTIVITY_THRESHOLD = 60  # seconds
-use_custom_time = False
-time_offset = timedelta(0)
-last_activity_time = None
-inactivity_start_time = None
-inactivity_periods = []
-hourly_csv_dir = 'hourly_csv'
-is_running = False
-mouse_listener = None
-keyboard_listener = None
-main_thread = None
-session_start_time = None
-
-# Ensure directory exists
-os.makedirs(hourly_csv_dir, exist_ok=True)
-
-
-class DesktopWidgetApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Tracker")
-        
-        # Make it frameless
-        self.root.overrideredirect(True)
-        
-        # Set initial position
-        self.root.geometry("180x90+50+50")
-        
-        # Make semi-transparent with dark background
-        self.root.attributes('-alpha', 0.85)
-        
-        # Keep on top of other windows
-        self.root.attributes('-topmost', True)
-        
-        # Track if we're currently moving the window
-        self.dragging = False
-        self.drag_x = 0
-        self.drag_y = 0
-        
-        self.setup_gui()
-        
-        # Bind events for window dragging
-        self.frame.bind("<ButtonPress-1>", self.start_drag)
-        self.frame.bind("<ButtonRelease-1>", self.stop_drag)
-        self.frame.bind("<B1-Motion>", self.on_drag)
-        
-        # Right-click menu
-        self.setup_context_menu()
-        self.frame.bind("<ButtonPress-3>", self.show_menu)
-
-    def setup_gui(self):
-        # Main frame with dark theme
-        self.frame = tk.Frame(self.root, bg='#121212')
-        self.frame.pack(fill=tk.BOTH, expand=True)
-        
-        # Status indicator (small colored circle)
-        self.status_frame = tk.Frame(self.frame, bg='#121212')
-        self.status_frame.pack(anchor=tk.W, padx=5, pady=2)
-        
-        self.status_indicator = tk.Canvas(self.status_frame, width=10, height=10, 
-                                         bg='#121212', highlightthickness=0)
-        self.status_indicator.pack(side=tk.LEFT)
-        self.status_dot = self.status_indicator.create_oval(1, 1, 9, 9, fill='#757575')  # Gray when not running
-        
-        # Times display with monospace font for better readability
-        self.times_frame = tk.Frame(self.frame, bg='#121212')
-        self.times_frame.pack(anchor=tk.W, padx=5, pady=2)
-        
-        self.active_label = tk.Label(self.times_frame, text="Active:", 
-                                    bg='#121212', fg='#BBBBBB', font=('Consolas', 9))
-        self.active_label.grid(row=0, column=0, sticky=tk.W)
-        
-        self.active_time = tk.Label(self.times_frame, text="00:00:00", 
-                                   bg='#121212', fg='#4CAF50', font=('Consolas', 9))
-        self.active_time.grid(row=0, column=1, padx=5, sticky=tk.W)
-        
-        self.inactive_label = tk.Label(self.times_frame, text="Inactive:", 
-                                      bg='#121212', fg='#BBBBBB', font=('Consolas', 9))
-        self.inactive_label.grid(row=1, column=0, sticky=tk.W)
-        
-        self.inactive_time = tk.Label(self.times_frame, text="00:00:00", 
-                                     bg='#121212', fg='#F44336', font=('Consolas', 9))
-        self.inactive_time.grid(row=1, column=1, padx=5, sticky=tk.W)
-        
-        # Start/Stop button
-        self.btn_frame = tk.Frame(self.frame, bg='#121212')
-        self.btn_frame.pack(pady=2)
-        
-        self.toggle_btn = tk.Button(self.btn_frame, text="▶", command=self.toggle_tracking,
-                                   bg='#333333', fg='#FFFFFF', font=('Arial', 8),
-                                   activebackground='#555555', activeforeground='#FFFFFF', 
-                                   relief=tk.FLAT, width=2, height=1)
-        self.toggle_btn.pack(side=tk.LEFT, padx=2)
-        
-        # Pin/Unpin button - changes alpha value from full to semi-transparent
-        self.pin_btn = tk.Button(self.btn_frame, text="📌", command=self.toggle_pin,
-                               bg='#333333', fg='#FFFFFF', font=('Arial', 8),
-                               activebackground='#555555', activeforeground='#FFFFFF', 
-                               relief=tk.FLAT, width=2, height=1)
-        self.pin_btn.pack(side=tk.LEFT, padx=2)
-        self.pinned = True
-        
-        # Close button
-        self.close_btn = tk.Button(self.btn_frame, text="✕", command=self.on_close,
-                                  bg='#333333', fg='#FFFFFF', font=('Arial', 8),
-                                  activebackground='#555555', activeforeground='#FFFFFF', 
-                                  relief=tk.FLAT, width=2, height=1)
-        self.close_btn.pack(side=tk.LEFT, padx=2)
-
-    def setup_context_menu(self):
-        self.menu = tk.Menu(self.root, tearoff=0)
-        self.menu.add_command(label="Start Tracking" if not is_running else "Stop Tracking", 
-                             command=self.toggle_tracking)
-        self.menu.add_command(label="Reset Statistics", command=self.reset_stats)
-        self.menu.add_separator()
-        self.menu.add_command(label="Always on Top", command=self.toggle_always_on_top)
-        self.menu.add_command(label="Unpin" if self.pinned else "Pin", command=self.toggle_pin)
-        self.menu.add_separator()
-        self.menu.add_command(label="Exit", command=self.on_close)
-
-    def show_menu(self, event):
-        # Update menu items based on current state
-        self.menu.entryconfigure(0, label="Stop Tracking" if is_running else "Start Tracking")
-        self.menu.entryconfigure(4, label="Unpin" if self.pinned else "Pin")
-        
-        try:
-            self.menu.tk_popup(event.x_root, event.y_root)
-        finally:
-            self.menu.grab_release()
-
-    def toggle_always_on_top(self):
-        current = self.root.attributes('-topmost')
-        self.root.attributes('-topmost', not current)
-
-    def toggle_pin(self):
-        if self.pinned:
-            self.root.attributes('-alpha', 0.4)  # More transparent when unpinned
-            self.pinned = False
-            self.pin_btn.configure(text="📍")  # Change icon
-        else:
-            self.root.attributes('-alpha', 0.85)  # Less transparent when pinned
-            self.pinned = True
-            self.pin_btn.configure(text="📌")  # Change icon
-
-    def reset_stats(self):
-        global inactivity_periods, session_start_time
-        
-        if is_running:
-            inactivity_periods = []
-            session_start_time = datetime.now()
-            self.update_ui()
-
-    def toggle_tracking(self):
-        global is_running
-        
-        if not is_running:
-            self.start_tracking()
-            self.toggle_btn.config(text="⏸")
-            self.status_indicator.itemconfig(self.status_dot, fill='#4CAF50')  # Green when running
-        else:
-            self.stop_tracking()
-            self.toggle_btn.config(text="▶")
-            self.status_indicator.itemconfig(self.status_dot, fill='#757575')  # Gray when not running
-
-    def start_tracking(self):
-        global is_running, last_activity_time, inactivity_start_time, inactivity_periods
-        global mouse_listener, keyboard_listener, main_thread, session_start_time
-        
-        # Initialize tracking values
-        is_running = True
-        session_start_time = datetime.now()
-        last_activity_time = get_current_time()
-        inactivity_start_time = None
-        inactivity_periods = []
-        
-        # Start listeners for mouse and keyboard
-        mouse_listener = mouse.Listener(on_move=on_move, on_click=on_click, on_scroll=on_scroll)
-        keyboard_listener = keyboard.Listener(on_press=on_press, on_release=on_release)
-        
-        mouse_listener.start()
-        keyboard_listener.start()
-        
-        # Start the main tracking thread
-        main_thread = threading.Thread(target=self.tracking_loop, daemon=True)
-        main_thread.start()
-        
-        # Create status file
-        self.create_status_file()
-        
-        # Start UI updates
-        self.update_ui()
-        
-        # Update context menu
-        self.menu.entryconfigure(0, label="Stop Tracking")
-
-    def stop_tracking(self):
-        global is_running, mouse_listener, keyboard_listener
-        
-        if not is_running:
-            return
-        
-        is_running = False
-        
-        # Stop listeners
-        if mouse_listener:
-            mouse_listener.stop()
-        
-        if keyboard_listener:
-            keyboard_listener.stop()
-        
-        # Update status file
-        with open("widget_status.txt", "w") as status_file:
-            status_file.write(f"Program started at: {session_start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            status_file.write(f"Program stopped at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            status_file.write("Status: STOPPED\n")
-        
-        # Update context menu
-        self.menu.entryconfigure(0, label="Start Tracking")
-
-    def tracking_loop(self):
-        global is_running, inactivity_start_time, inactivity_periods
-        
-        try:
-            while is_running:
-                time.sleep(0.5)
-                
-                current_time = get_current_time()
-                
-                # Check for inactivity
-                inactive_seconds = (current_time - last_activity_time).total_seconds()
-                
-                # Start inactivity period if threshold is reached and we're not already tracking inactivity
-                if inactive_seconds >= INACTIVITY_THRESHOLD and not inactivity_start_time:
-                    inactivity_start_time = last_activity_time
-                    logging.info(f"Inactivity detected. Start time: {inactivity_start_time}")
-                    # Update status indicator to show inactive state
-                    self.root.after(0, lambda: self.status_indicator.itemconfig(self.status_dot, fill='#F44336'))  # Red when inactive
-                
-        except Exception as e:
-            logging.error(f"Error in tracking loop: {str(e)}")
-            
-            # Update status file
-            with open("widget_status.txt", "w") as status_file:
-                status_file.write(f"Program started at: {session_start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                status_file.write(f"Program crashed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                status_file.write("Status: ERROR\n")
-                status_file.write(f"Error message: {str(e)}\n")
-
-    def create_status_file(self):
-        with open("widget_status.txt", "w") as status_file:
-            status_file.write(f"Program started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            status_file.write("Status: RUNNING\n")
-
-    def update_ui(self):
-        if not is_running:
-            return
-        
-        # Calculate active and inactive times
-        current_time = datetime.now()
-        session_duration = current_time - session_start_time
-        
-        # Calculate total inactive time
-        total_inactive_seconds = sum((end - start).total_seconds() for start, end in inactivity_periods)
-        
-        # Add current inactive period if exists
-        if inactivity_start_time:
-            current_inactive = (get_current_time() - inactivity_start_time).total_seconds()
-            total_inactive_seconds += current_inactive
-            
-            # Make sure status shows inactive
-            self.status_indicator.itemconfig(self.status_dot, fill='#F44336')  # Red when inactive
-        else:
-            # Make sure status shows active
-            self.status_indicator.itemconfig(self.status_dot, fill='#4CAF50')  # Green when active
-        
-        # Calculate active time
-        total_active_seconds = session_duration.total_seconds() - total_inactive_seconds
-        
-        # Format times
-        active_hours, active_remainder = divmod(int(total_active_seconds), 3600)
-        active_minutes, active_seconds = divmod(active_remainder, 60)
-        
-        inactive_hours, inactive_remainder = divmod(int(total_inactive_seconds), 3600)
-        inactive_minutes, inactive_seconds = divmod(inactive_remainder, 60)
-        
-        # Update labels
-        self.active_time.config(text=f"{active_hours:02d}:{active_minutes:02d}:{active_seconds:02d}")
-        self.inactive_time.config(text=f"{inactive_hours:02d}:{inactive_minutes:02d}:{inactive_seconds:02d}")
-        
-        # Save the stats to a file
-        with open("current_stats.txt", "w") as stats_file:
-            stats_file.write(f"Session start: {session_start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            stats_file.write(f"Current time: {current_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            stats_file.write(f"Active time: {active_hours:02d}:{active_minutes:02d}:{active_seconds:02d}\n")
-            stats_file.write(f"Inactive time: {inactive_hours:02d}:{inactive_minutes:02d}:{inactive_seconds:02d}\n")
-            active_pct = (total_active_seconds / session_duration.total_seconds()) * 100 if session_duration.total_seconds() > 0 else 0
-            stats_file.write(f"Productivity: {active_pct:.2f}%\n")
-        
-        # Schedule next update
-        self.root.after(1000, self.update_ui)
-
-    def start_drag(self, event):
-        self.dragging = True
-        self.drag_x = event.x
-        self.drag_y = event.y
-
-    def stop_drag(self, event):
-        self.dragging = False
-
-    def on_drag(self, event):
-        if self.dragging:
-            x = self.root.winfo_x() + event.x - self.drag_x
-            y = self.root.winfo_y() + event.y - self.drag_y
-            self.root.geometry(f"+{x}+{y}")
-
-    def on_close(self):
-        if is_running:
-            self.stop_tracking()
-        self.root.destroy()
-
-
-# Function to get the current time (either real or custom)
-def get_current_time():
-    return datetime.now() + time_offset
-
-
-# Function to log inactivity
-def log_inactivity(start_time, end_time):
-    # Only log if there's a meaningful duration
-    if (end_time - start_time).total_seconds() > 0:
-        inactivity_periods.append((start_time, end_time))
-        logging.info(f"Inactivity logged from {start_time} to {end_time}")
-
-
-# Update last activity time and log inactivity if necessary
-def update_activity_time():
-    global last_activity_time, inactivity_start_time
-    current_time = get_current_time()
-
-    # If we were in an inactivity period, log it before updating
-    if inactivity_start_time:
-        log_inactivity(inactivity_start_time, current_time)
-        inactivity_start_time = None
-        logging.info(f"Activity resumed at {current_time}")
-
-    last_activity_time = current_time
-
-
-# Mouse and keyboard event handlers
-def on_move(x, y):
-    update_activity_time()
-
-
-def on_click(x, y, button, pressed):
-    update_activity_time()
-
-
-def on_scroll(x, y, dx, dy):
-    update_activity_time()
-
-
-def on_press(key):
-    update_activity_time()
-
-
-def on_release(key):
-    update_activity_time()
-
-
-def main():
-    # Create the main window
-    root = tk.Tk()
-    app = DesktopWidgetApp(root)
-    
-    # Start the main loop
-    root.mainloop()
-
-
-if __name__ == "__main__":
+from datetime import datetime
+import time
+import argparse
+import logging
+import tkinter as tk
+from tkinter import ttk
+from TrackerCore import (ActivityTracker, DayAggregate, session_inactive_seconds, current_hour_inactive_seconds,
+                         rolling_inactivity, minute_inactivity, to_rolling_seconds, load_settings)
+from TrackerIPC import RemoteTracker, attach_tracker
+from TrackerUI import UiScheduler, Sparkline
+
+STATS_FILE = "current_stats.txt"
+STATS_WRITE_INTERVAL = 10  # seconds between rewrites of the stats file while only the times move on
+
+# Logging setup
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s',
+                    handlers=[
+                        logging.FileHandler("desktop_widget.log"),
+                        logging.StreamHandler()
+                    ])
+
+
+class DesktopWidgetApp:
+    def __init__(self, root, standalone=False):
+        self.root = root
+        self.root.title("Tracker")
+        
+        # Make it frameless
+        self.root.overrideredirect(True)
+        
+        # Set initial position
+        self.root.geometry("180x122+50+50")
+        
+        # Make semi-transparent with dark background
+        self.root.attributes('-alpha', 0.85)
+        
+        # Keep on top of other windows
+        self.root.attributes('-topmost', True)
+        
+        # Share one tracker process with the tracker GUI. In-process, closed periods are
+        # folded into per-hour totals and completed hours are flushed to the hourly CSVs
+        # at each rollover, so memory does not grow with uptime. Charts are left to the GUI.
+        settings = load_settings()  # saved from the tracker GUI's Settings tab
+        self.tracker = None if standalone else attach_tracker(settings=settings)
+        if self.tracker is None:
+            self.tracker = ActivityTracker(status_file="widget_status.txt", generate_charts=False, **settings)
+        self.tracker.add_observer(self.on_tracker_event)
+        self.day_aggregate = DayAggregate(self.tracker.hourly_csv_dir)  # today's total across sessions
+
+        # Drives update_ui: 1 s ticks, slower while the session is idle, none while hidden.
+        # Tracker threads only set tracking_state_changed and wake it.
+        self.ui_scheduler = UiScheduler(self.root, self.update_ui)
+        self.tracking_state_changed = False
+        self.ui_scheduler.on_wake = self.on_wake
+
+        # What STATS_FILE was last written with, so unchanged stats are not rewritten every tick
+        self.stats_text = None
+        self.stats_state = None  # (session start, inactive since) of that write
+        self.stats_written = None  # time.monotonic() of that write
+
+        # Track if we're currently moving the window
+        self.dragging = False
+        self.drag_x = 0
+        self.drag_y = 0
+        
+        self.setup_gui()
+        
+        # Bind events for window dragging
+        self.frame.bind("<ButtonPress-1>", self.start_drag)
+        self.frame.bind("<ButtonRelease-1>", self.stop_drag)
+        self.frame.bind("<B1-Motion>", self.on_drag)
+        
+        # Right-click menu
+        self.setup_context_menu()
+        self.frame.bind("<ButtonPress-3>", self.show_menu)
+
+        # Another client may already have started tracking
+        self.sync_tracking_state()
+
+    def setup_gui(self):
+        # Main frame with dark theme
+        self.frame = tk.Frame(self.root, bg='#121212')
+        self.frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Status indicator (small colored circle)
+        self.status_frame = tk.Frame(self.frame, bg='#121212')
+        self.status_frame.pack(anchor=tk.W, padx=5, pady=2)
+        
+        self.status_indicator = tk.Canvas(self.status_frame, width=10, height=10, 
+                                         bg='#121212', highlightthickness=0)
+        self.status_indicator.pack(side=tk.LEFT)
+        self.status_dot = self.status_indicator.create_oval(1, 1, 9, 9, fill='#757575')  # Gray when not running
+        
+        # Times display with monospace font for better readability
+        self.times_frame = tk.Frame(self.frame, bg='#121212')
+        self.times_frame.pack(anchor=tk.W, padx=5, pady=2)
+        
+        self.active_label = tk.Label(self.times_frame, text="Active:", 
+                                    bg='#121212', fg='#BBBBBB', font=('Consolas', 9))
+        self.active_label.grid(row=0, column=0, sticky=tk.W)
+        
+        self.active_time = tk.Label(self.times_frame, text="00:00:00", 
+                                   bg='#121212', fg='#4CAF50', font=('Consolas', 9))
+        self.active_time.grid(row=0, column=1, padx=5, sticky=tk.W)
+        
+        self.inactive_label = tk.Label(self.times_frame, text="Inactive:", 
+                                      bg='#121212', fg='#BBBBBB', font=('Consolas', 9))
+        self.inactive_label.grid(row=1, column=0, sticky=tk.W)
+        
+        self.inactive_time = tk.Label(self.times_frame, text="00:00:00", 
+                                     bg='#121212', fg='#F44336', font=('Consolas', 9))
+        self.inactive_time.grid(row=1, column=1, padx=5, sticky=tk.W)
+        
+        # Inactive percentage over the last 5 min / 1 h / 8 h
+        self.rolling_label = tk.Label(self.times_frame, text="5m/1h/8h:", 
+                                     bg='#121212', fg='#BBBBBB', font=('Consolas', 9))
+        self.rolling_label.grid(row=2, column=0, sticky=tk.W)
+        
+        self.rolling_values = tk.Label(self.times_frame, text="-/-/-%", 
+                                      bg='#121212', fg='#FFC107', font=('Consolas', 9))
+        self.rolling_values.grid(row=2, column=1, padx=5, sticky=tk.W)
+        
+        # Last 60 minutes, one bar per minute: green when active, red as high as the inactive share
+        self.strip = tk.Canvas(self.frame, width=120, height=14, bg='#121212', highlightthickness=0)
+        self.strip.pack(anchor=tk.W, padx=5, pady=1)
+        self.sparkline = Sparkline(self.strip)
+        self.sparkline_periods = None  # closed and open periods the strip was drawn with
+        
+        # Start/Stop button
+        self.btn_frame = tk.Frame(self.frame, bg='#121212')
+        self.btn_frame.pack(pady=2)
+        
+        self.toggle_btn = tk.Button(self.btn_frame, text="▶", command=self.toggle_tracking,
+                                   bg='#333333', fg='#FFFFFF', font=('Arial', 8),
+                                   activebackground='#555555', activeforeground='#FFFFFF', 
+                                   relief=tk.FLAT, width=2, height=1)
+        self.toggle_btn.pack(side=tk.LEFT, padx=2)
+        
+        # Pin/Unpin button - changes alpha value from full to semi-transparent
+        self.pin_btn = tk.Button(self.btn_frame, text="📌", command=self.toggle_pin,
+                               bg='#333333', fg='#FFFFFF', font=('Arial', 8),
+                               activebackground='#555555', activeforeground='#FFFFFF', 
+                               relief=tk.FLAT, width=2, height=1)
+        self.pin_btn.pack(side=tk.LEFT, padx=2)
+        self.pinned = True
+        
+        # Close button
+        self.close_btn = tk.Button(self.btn_frame, text="✕", command=self.on_close,
+                                  bg='#333333', fg='#FFFFFF', font=('Arial', 8),
+                                  activebackground='#555555', activeforeground='#FFFFFF', 
+                                  relief=tk.FLAT, width=2, height=1)
+        self.close_btn.pack(side=tk.LEFT, padx=2)
+
+    def setup_context_menu(self):
+        self.menu = tk.Menu(self.root, tearoff=0)
+        self.menu.add_command(label="Start Tracking" if not self.tracker.is_running else "Stop Tracking", 
+                             command=self.toggle_tracking)
+        self.menu.add_command(label="Reset Statistics", command=self.reset_stats)
+        self.menu.add_separator()
+        self.menu.add_command(label="Always on Top", command=self.toggle_always_on_top)
+        self.menu.add_command(label="Unpin" if self.pinned else "Pin", command=self.toggle_pin)
+        self.menu.add_separator()
+        self.menu.add_command(label="Exit", command=self.on_close)
+
+    def show_menu(self, event):
+        # Update menu items based on current state
+        self.menu.entryconfigure(0, label="Stop Tracking" if self.tracker.is_running else "Start Tracking")
+        self.menu.entryconfigure(4, label="Unpin" if self.pinned else "Pin")
+        
+        try:
+            self.menu.tk_popup(event.x_root, event.y_root)
+        finally:
+            self.menu.grab_release()
+
+    def toggle_always_on_top(self):
+        current = self.root.attributes('-topmost')
+        self.root.attributes('-topmost', not current)
+
+    def toggle_pin(self):
+        if self.pinned:
+            self.root.attributes('-alpha', 0.4)  # More transparent when unpinned
+            self.pinned = False
+            self.pin_btn.configure(text="📍")  # Change icon
+        else:
+            self.root.attributes('-alpha', 0.85)  # Less transparent when pinned
+            self.pinned = True
+            self.pin_btn.configure(text="📌")  # Change icon
+
+    def reset_stats(self):
+        if self.tracker.is_running:
+            self.tracker.reset_session()
+            self.ui_scheduler.wake()
+
+    def toggle_tracking(self):
+        if not self.tracker.is_running:
+            self.start_tracking()
+        else:
+            self.stop_tracking()
+
+    def start_tracking(self):
+        # Start listeners and the tracking thread
+        self.tracker.start()
+        self.sync_tracking_state()
+
+    def stop_tracking(self):
+        if not self.tracker.is_running:
+            return
+        
+        self.tracker.stop()
+        self.sync_tracking_state()
+
+    # Bring the button, dot and menu in line with the tracker, which another client may have changed
+    def sync_tracking_state(self):
+        if self.tracker.is_running:
+            self.ui_scheduler.set_text(self.toggle_btn, "⏸")
+            self.ui_scheduler.set_item(self.status_indicator, self.status_dot, fill='#4CAF50')  # Green when running
+            self.menu.entryconfigure(0, label="Stop Tracking")
+            
+            # Start UI updates
+            self.ui_scheduler.start()
+        else:
+            self.ui_scheduler.set_text(self.toggle_btn, "▶")
+            self.ui_scheduler.set_item(self.status_indicator, self.status_dot, fill='#757575')  # Gray when not running
+            self.menu.entryconfigure(0, label="Start Tracking")
+
+    # Called on tracker threads: only flag the change and wake the Tk thread
+    def on_tracker_event(self, event, data):
+        if event in ('started', 'stopped', 'disconnected'):
+            self.tracking_state_changed = True
+            self.ui_scheduler.request_wake()
+        elif event in ('inactive', 'active'):
+            self.ui_scheduler.request_wake()
+
+    # Runs on the Tk thread before the scheduler's requested tick
+    def on_wake(self):
+        if self.tracking_state_changed:
+            self.tracking_state_changed = False
+            self.sync_tracking_state()
+
+    # Scheduled by ui_scheduler; returning False stops the ticks until tracking restarts
+    def update_ui(self):
+        snapshot = self.tracker.snapshot()
+        if not snapshot.get('running'):
+            return False
+        ui = self.ui_scheduler
+        
+        # Calculate active and inactive times
+        current_time = datetime.now()
+        session_start_time = snapshot['session_start']
+        session_duration = current_time - session_start_time
+        
+        # Calculate total inactive time, including the current inactive period if it exists
+        total_inactive_seconds = session_inactive_seconds(snapshot)
+        
+        if snapshot['inactivity_start_time']:
+            # Make sure status shows inactive
+            ui.set_item(self.status_indicator, self.status_dot, fill='#F44336')  # Red when inactive
+        else:
+            # Make sure status shows active
+            ui.set_item(self.status_indicator, self.status_dot, fill='#4CAF50')  # Green when active
+        ui.set_idle(snapshot['inactivity_start_time'] is not None)
+        
+        # Calculate active time
+        total_active_seconds = session_duration.total_seconds() - total_inactive_seconds
+        
+        # Format times
+        active_hours, active_remainder = divmod(int(total_active_seconds), 3600)
+        active_minutes, active_seconds = divmod(active_remainder, 60)
+        
+        inactive_hours, inactive_remainder = divmod(int(total_inactive_seconds), 3600)
+        inactive_minutes, inactive_seconds = divmod(inactive_remainder, 60)
+        
+        # Update labels
+        ui.set_text(self.active_time, f"{active_hours:02d}:{active_minutes:02d}:{active_seconds:02d}")
+        ui.set_text(self.inactive_time, f"{inactive_hours:02d}:{inactive_minutes:02d}:{inactive_seconds:02d}")
+        rolling = rolling_inactivity(snapshot)
+        ui.set_text(self.rolling_values, "/".join(f"{percentage:.0f}" for _, percentage in rolling) + "%")
+        
+        # Only the newest minute's bar changes, unless a period closed or a new minute began
+        periods = (snapshot['closed_inactive_seconds'], snapshot['inactivity_start_time'])
+        self.sparkline.update(int(to_rolling_seconds(snapshot['now']) // 60),
+                              lambda first, last: minute_inactivity(snapshot, first, last),
+                              full=periods != self.sparkline_periods)
+        self.sparkline_periods = periods
+        
+        # Save the stats to a file when the session or the active/inactive state changed,
+        # otherwise at most every STATS_WRITE_INTERVAL
+        state = (session_start_time, snapshot['inactivity_start_time'])
+        if state != self.stats_state or time.monotonic() - self.stats_written >= STATS_WRITE_INTERVAL:
+            self.stats_state = state
+            self.stats_written = time.monotonic()
+            self.write_stats(snapshot, current_time, session_duration, total_active_seconds, total_inactive_seconds,
+                             rolling)
+
+    # Rewrite STATS_FILE, unless its contents would not change
+    def write_stats(self, snapshot, current_time, session_duration, total_active_seconds, total_inactive_seconds,
+                    rolling):
+        active_hours, active_remainder = divmod(int(total_active_seconds), 3600)
+        active_minutes, active_seconds = divmod(active_remainder, 60)
+        inactive_hours, inactive_remainder = divmod(int(total_inactive_seconds), 3600)
+        inactive_minutes, inactive_seconds = divmod(inactive_remainder, 60)
+        active_pct = (total_active_seconds / session_duration.total_seconds()) * 100 if session_duration.total_seconds() > 0 else 0
+        hour_minutes, hour_seconds = divmod(int(current_hour_inactive_seconds(snapshot)), 60)
+        today_hours, today_remainder = divmod(int(self.day_aggregate.inactive_seconds(snapshot)), 3600)
+        today_minutes, today_seconds = divmod(today_remainder, 60)
+
+        lines = [f"Session start: {snapshot['session_start'].strftime('%Y-%m-%d %H:%M:%S')}\n",
+                 f"Current time: {current_time.strftime('%Y-%m-%d %H:%M:%S')}\n",
+                 f"Active time: {active_hours:02d}:{active_minutes:02d}:{active_seconds:02d}\n",
+                 f"Inactive time: {inactive_hours:02d}:{inactive_minutes:02d}:{inactive_seconds:02d}\n",
+                 f"Productivity: {active_pct:.2f}%\n",
+                 f"Inactive this hour: {hour_minutes:02d}:{hour_seconds:02d}\n",
+                 f"Inactive today: {today_hours:02d}:{today_minutes:02d}:{today_seconds:02d}\n"]
+        lines += [f"Inactive last {label}: {percentage:.1f}%\n" for label, percentage in rolling]
+        text = ''.join(lines)
+        if text == self.stats_text:
+            return
+
+        try:
+            with open(STATS_FILE, "w") as stats_file:
+                stats_file.write(text)
+            self.stats_text = text
+        except OSError as e:
+            logging.error(f"Error writing {STATS_FILE}: {str(e)}")
+
+    def start_drag(self, event):
+        self.dragging = True
+        self.drag_x = event.x
+        self.drag_y = event.y
+
+    def stop_drag(self, event):
+        self.dragging = False
+
+    def on_drag(self, event):
+        if self.dragging:
+            x = self.root.winfo_x() + event.x - self.drag_x
+            y = self.root.winfo_y() + event.y - self.drag_y
+            self.root.geometry(f"+{x}+{y}")
+
+    def on_close(self):
+        logging.info(f"UI refresh stats: {self.ui_scheduler.stats()}")
+        if isinstance(self.tracker, RemoteTracker):
+            # Closing the widget must not interrupt tracking for the other clients
+            if self.tracker.client_count <= 1 and self.tracker.is_running:
+                self.stop_tracking()
+            self.tracker.detach()
+        elif self.tracker.is_running:
+            self.stop_tracking()
+        self.root.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Activity desktop widget")
+    parser.add_argument('--standalone', action='store_true',
+                        help="track in this process instead of attaching to the shared tracker daemon")
+    args = parser.parse_args()
+
+    # Create the main window
+    root = tk.Tk()
+    app = DesktopWidgetApp(root, standalone=args.standalone)
+    
+    # Start the main loop
+    root.mainloop()
+
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,1076 +1,1090 @@
-import time
-import threading
-from datetime import datetime, timedelta
-from pynput import mouse, keyboard
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import pandas as pd
-import numpy as np
-import os
-import sys
-from matplotlib.colors import LinearSegmentedColormap
-from matplotlib.font_manager import FontProperties
-import pygame
-import logging
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.figure as mplfig
-
-# Logging setup
-logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    handlers=[
-                        logging.FileHandler("program_gui.log"),
-                        logging.StreamHandler()
-                    ])
-
-# Global variables
-INACTIVITY_THRESHOLD = 60  # seconds
-use_custom_time = False
-time_offset = timedelta(0)
-last_activity_time = None
-inactivity_start_time = None
-inactivity_periods = []
-hourly_charts_dir = 'hourly_charts'
-hourly_csv_dir = 'hourly_csv'
-is_running = False
-mouse_listener = None
-keyboard_listener = None
-status_update_thread = None
-main_thread = None
-last_checked_hour = None
-last_checked_day = None
-
-# Ensure directories exist
-os.makedirs(hourly_charts_dir, exist_ok=True)
-os.makedirs(hourly_csv_dir, exist_ok=True)
-
-
-class InactivityTrackerApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Inactivity Tracker")
-        self.root.geometry("900x700")
-        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
-        self.setup_gui()
-        self.live_view_active = False
-        self.live_view_timer = None
-        self.current_chart_path = None
-        self.start_time = None
-
-    def setup_gui(self):
-        # Create notebook for tabs
-        self.notebook = ttk.Notebook(self.root)
-        self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        # Create tabs
-        self.control_tab = ttk.Frame(self.notebook)
-        self.live_view_tab = ttk.Frame(self.notebook)
-        self.stats_tab = ttk.Frame(self.notebook)
-        self.settings_tab = ttk.Frame(self.notebook)
-
-        self.notebook.add(self.control_tab, text="Control")
-        self.notebook.add(self.live_view_tab, text="Live View")
-        self.notebook.add(self.stats_tab, text="Statistics")
-        self.notebook.add(self.settings_tab, text="Settings")
-
-        # Setup each tab
-        self.setup_control_tab()
-        self.setup_live_view_tab()
-        self.setup_stats_tab()
-        self.setup_settings_tab()
-
-        # Status bar at the bottom
-        self.status_frame = ttk.Frame(self.root)
-        self.status_frame.pack(fill=tk.X, side=tk.BOTTOM, padx=10, pady=5)
-
-        self.status_label = ttk.Label(self.status_frame, text="Status: Not running", anchor=tk.W)
-        self.status_label.pack(side=tk.LEFT)
-
-        self.activity_status = ttk.Label(self.status_frame, text="Activity: N/A", anchor=tk.E)
-        self.activity_status.pack(side=tk.RIGHT)
-
-    def setup_control_tab(self):
-        control_frame = ttk.LabelFrame(self.control_tab, text="Inactivity Tracker Controls")
-        control_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        # Start/Stop buttons
-        self.btn_frame = ttk.Frame(control_frame)
-        self.btn_frame.pack(pady=20)
-
-        self.start_btn = ttk.Button(self.btn_frame, text="Start Tracking", command=self.start_tracking)
-        self.start_btn.pack(side=tk.LEFT, padx=10)
-
-        self.stop_btn = ttk.Button(self.btn_frame, text="Stop Tracking", command=self.stop_tracking, state=tk.DISABLED)
-        self.stop_btn.pack(side=tk.LEFT, padx=10)
-
-        # Current session info
-        self.info_frame = ttk.LabelFrame(control_frame, text="Current Session")
-        self.info_frame.pack(fill=tk.X, padx=10, pady=10)
-
-        # Time running
-        self.time_label = ttk.Label(self.info_frame, text="Time running: 00:00:00")
-        self.time_label.pack(anchor=tk.W, padx=10, pady=5)
-
-        # Inactivity time
-        self.inactivity_label = ttk.Label(self.info_frame, text="Total inactivity: 00:00:00")
-        self.inactivity_label.pack(anchor=tk.W, padx=10, pady=5)
-
-        # Inactivity percentage
-        self.percentage_label = ttk.Label(self.info_frame, text="Inactivity percentage: 0.00%")
-        self.percentage_label.pack(anchor=tk.W, padx=10, pady=5)
-
-        # Current status
-        self.current_status_label = ttk.Label(self.info_frame, text="Currently: Active")
-        self.current_status_label.pack(anchor=tk.W, padx=10, pady=5)
-
-        # Recent activity log
-        self.log_frame = ttk.LabelFrame(control_frame, text="Recent Activity Log")
-        self.log_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        self.log_text = tk.Text(self.log_frame, height=10, width=50, state=tk.DISABLED)
-        self.log_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
-        self.log_scrollbar = ttk.Scrollbar(self.log_text, command=self.log_text.yview)
-        self.log_text.configure(yscrollcommand=self.log_scrollbar.set)
-        self.log_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-    def setup_live_view_tab(self):
-        self.live_frame = ttk.Frame(self.live_view_tab)
-        self.live_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        # Controls for live view
-        self.live_control_frame = ttk.Frame(self.live_frame)
-        self.live_control_frame.pack(fill=tk.X, pady=10)
-
-        self.view_label = ttk.Label(self.live_control_frame, text="View: ")
-        self.view_label.pack(side=tk.LEFT, padx=5)
-
-        self.view_type = ttk.Combobox(self.live_control_frame, values=["Current Hour", "Today's Summary"])
-        self.view_type.current(0)
-        self.view_type.pack(side=tk.LEFT, padx=5)
-
-        self.refresh_btn = ttk.Button(self.live_control_frame, text="Refresh View", command=self.refresh_live_view)
-        self.refresh_btn.pack(side=tk.LEFT, padx=10)
-
-        self.auto_refresh_var = tk.BooleanVar(value=False)
-        self.auto_refresh_check = ttk.Checkbutton(self.live_control_frame, text="Auto Refresh (30s)", 
-                                                  variable=self.auto_refresh_var, 
-                                                  command=self.toggle_auto_refresh)
-        self.auto_refresh_check.pack(side=tk.LEFT, padx=10)
-
-        # Save button
-        self.save_btn = ttk.Button(self.live_control_frame, text="Save Chart", command=self.save_current_chart)
-        self.save_btn.pack(side=tk.RIGHT, padx=10)
-
-        # Canvas for displaying charts
-        self.chart_frame = ttk.LabelFrame(self.live_frame, text="Activity Visualization")
-        self.chart_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        # Create a Figure and a canvas to display it
-        self.fig = mplfig.Figure(figsize=(8, 6), dpi=100)
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.chart_frame)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-    def setup_stats_tab(self):
-        stats_frame = ttk.LabelFrame(self.stats_tab, text="Activity Statistics")
-        stats_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        # Date selection
-        self.date_frame = ttk.Frame(stats_frame)
-        self.date_frame.pack(fill=tk.X, pady=10)
-
-        self.date_label = ttk.Label(self.date_frame, text="Select Date: ")
-        self.date_label.pack(side=tk.LEFT, padx=5)
-
-        today = datetime.now().strftime("%Y-%m-%d")
-        self.date_entry = ttk.Entry(self.date_frame)
-        self.date_entry.insert(0, today)
-        self.date_entry.pack(side=tk.LEFT, padx=5)
-
-        self.calendar_btn = ttk.Button(self.date_frame, text="Calendar", command=self.show_calendar)
-        self.calendar_btn.pack(side=tk.LEFT, padx=5)
-
-        self.load_stats_btn = ttk.Button(self.date_frame, text="Load Statistics", command=self.load_statistics)
-        self.load_stats_btn.pack(side=tk.LEFT, padx=10)
-
-        # Statistics display area
-        self.stats_display_frame = ttk.Frame(stats_frame)
-        self.stats_display_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        # Summary box
-        self.summary_frame = ttk.LabelFrame(self.stats_display_frame, text="Daily Summary")
-        self.summary_frame.pack(fill=tk.X, pady=10)
-
-        self.total_active_label = ttk.Label(self.summary_frame, text="Total Active Time: N/A")
-        self.total_active_label.pack(anchor=tk.W, padx=10, pady=5)
-
-        self.total_inactive_label = ttk.Label(self.summary_frame, text="Total Inactive Time: N/A")
-        self.total_inactive_label.pack(anchor=tk.W, padx=10, pady=5)
-
-        self.inactive_percent_label = ttk.Label(self.summary_frame, text="Inactive Percentage: N/A")
-        self.inactive_percent_label.pack(anchor=tk.W, padx=10, pady=5)
-
-        # Hour by hour breakdown
-        self.hourly_frame = ttk.LabelFrame(self.stats_display_frame, text="Hourly Breakdown")
-        self.hourly_frame.pack(fill=tk.BOTH, expand=True, pady=10)
-
-        self.hourly_canvas = tk.Canvas(self.hourly_frame)
-        self.hourly_scrollbar = ttk.Scrollbar(self.hourly_frame, orient="vertical", command=self.hourly_canvas.yview)
-        self.hourly_scrollable_frame = ttk.Frame(self.hourly_canvas)
-
-        self.hourly_scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.hourly_canvas.configure(
-                scrollregion=self.hourly_canvas.bbox("all")
-            )
-        )
-
-        self.hourly_canvas.create_window((0, 0), window=self.hourly_scrollable_frame, anchor="nw")
-        self.hourly_canvas.configure(yscrollcommand=self.hourly_scrollbar.set)
-
-        self.hourly_canvas.pack(side="left", fill="both", expand=True)
-        self.hourly_scrollbar.pack(side="right", fill="y")
-
-    def setup_settings_tab(self):
-        settings_frame = ttk.LabelFrame(self.settings_tab, text="Application Settings")
-        settings_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        # Inactivity threshold
-        self.threshold_frame = ttk.Frame(settings_frame)
-        self.threshold_frame.pack(fill=tk.X, pady=10)
-
-        self.threshold_label = ttk.Label(self.threshold_frame, text="Inactivity Threshold (seconds): ")
-        self.threshold_label.pack(side=tk.LEFT, padx=5)
-
-        self.threshold_var = tk.IntVar(value=INACTIVITY_THRESHOLD)
-        self.threshold_entry = ttk.Entry(self.threshold_frame, textvariable=self.threshold_var)
-        self.threshold_entry.pack(side=tk.LEFT, padx=5)
-
-        # Directory settings
-        self.dir_frame = ttk.LabelFrame(settings_frame, text="Directory Settings")
-        self.dir_frame.pack(fill=tk.X, pady=10, padx=10)
-
-        # Hourly charts directory
-        self.hourly_dir_frame = ttk.Frame(self.dir_frame)
-        self.hourly_dir_frame.pack(fill=tk.X, pady=5)
-
-        self.hourly_dir_label = ttk.Label(self.hourly_dir_frame, text="Hourly Charts Directory: ")
-        self.hourly_dir_label.pack(side=tk.LEFT, padx=5)
-
-        self.hourly_dir_var = tk.StringVar(value=hourly_charts_dir)
-        self.hourly_dir_entry = ttk.Entry(self.hourly_dir_frame, textvariable=self.hourly_dir_var, width=30)
-        self.hourly_dir_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
-
-        self.hourly_dir_btn = ttk.Button(self.hourly_dir_frame, text="Browse", 
-                                         command=lambda: self.select_directory("hourly"))
-        self.hourly_dir_btn.pack(side=tk.LEFT, padx=5)
-
-        # Hourly CSV directory
-        self.csv_dir_frame = ttk.Frame(self.dir_frame)
-        self.csv_dir_frame.pack(fill=tk.X, pady=5)
-
-        self.csv_dir_label = ttk.Label(self.csv_dir_frame, text="Hourly CSV Directory: ")
-        self.csv_dir_label.pack(side=tk.LEFT, padx=5)
-
-        self.csv_dir_var = tk.StringVar(value=hourly_csv_dir)
-        self.csv_dir_entry = ttk.Entry(self.csv_dir_frame, textvariable=self.csv_dir_var, width=30)
-        self.csv_dir_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
-
-        self.csv_dir_btn = ttk.Button(self.csv_dir_frame, text="Browse", 
-                                      command=lambda: self.select_directory("csv"))
-        self.csv_dir_btn.pack(side=tk.LEFT, padx=5)
-
-        # Custom time settings
-        self.custom_time_frame = ttk.LabelFrame(settings_frame, text="Time Settings")
-        self.custom_time_frame.pack(fill=tk.X, pady=10, padx=10)
-
-        self.custom_time_var = tk.BooleanVar(value=use_custom_time)
-        self.custom_time_check = ttk.Checkbutton(self.custom_time_frame, text="Use Custom Time", 
-                                                 variable=self.custom_time_var)
-        self.custom_time_check.pack(anchor=tk.W, padx=5, pady=5)
-
-        self.custom_time_entry_frame = ttk.Frame(self.custom_time_frame)
-        self.custom_time_entry_frame.pack(fill=tk.X, pady=5)
-
-        self.custom_time_label = ttk.Label(self.custom_time_entry_frame, text="Custom Start Time: ")
-        self.custom_time_label.pack(side=tk.LEFT, padx=5)
-
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.custom_time_entry = ttk.Entry(self.custom_time_entry_frame, width=20)
-        self.custom_time_entry.insert(0, current_time)
-        self.custom_time_entry.pack(side=tk.LEFT, padx=5)
-
-        # Save settings button
-        self.save_settings_btn = ttk.Button(settings_frame, text="Save Settings", command=self.save_settings)
-        self.save_settings_btn.pack(pady=20)
-
-    def select_directory(self, dir_type):
-        directory = filedialog.askdirectory()
-        if directory:
-            if dir_type == "hourly":
-                self.hourly_dir_var.set(directory)
-            elif dir_type == "csv":
-                self.csv_dir_var.set(directory)
-
-    def show_calendar(self):
-        # A simple date picker dialog could be implemented here
-        # For now, we'll just show a message
-        messagebox.showinfo("Calendar", "Calendar functionality to be implemented.")
-
-    def save_settings(self):
-        global INACTIVITY_THRESHOLD, hourly_charts_dir, hourly_csv_dir, use_custom_time, time_offset
-        
-        # Update inactivity threshold
-        INACTIVITY_THRESHOLD = self.threshold_var.get()
-        
-        # Update directories
-        hourly_charts_dir = self.hourly_dir_var.get()
-        hourly_csv_dir = self.csv_dir_var.get()
-        
-        # Ensure directories exist
-        os.makedirs(hourly_charts_dir, exist_ok=True)
-        os.makedirs(hourly_csv_dir, exist_ok=True)
-        
-        # Update custom time settings
-        use_custom_time = self.custom_time_var.get()
-        if use_custom_time:
-            try:
-                custom_start_time = datetime.strptime(self.custom_time_entry.get(), "%Y-%m-%d %H:%M:%S")
-                time_offset = custom_start_time - datetime.now()
-            except ValueError:
-                messagebox.showerror("Error", "Invalid date format. Use YYYY-MM-DD HH:MM:SS")
-                return
-        else:
-            time_offset = timedelta(0)
-        
-        messagebox.showinfo("Settings Saved", "Settings have been updated successfully.")
-
-    def start_tracking(self):
-        global is_running, last_activity_time, inactivity_start_time, inactivity_periods
-        global last_checked_hour, last_checked_day, mouse_listener, keyboard_listener, main_thread, status_update_thread
-        
-        # Initialize tracking values
-        is_running = True
-        self.start_time = datetime.now() 
-        last_activity_time = get_current_time()
-        inactivity_start_time = None
-        inactivity_periods = []
-        last_checked_hour = get_current_time().hour
-        last_checked_day = get_current_time().day
-        
-        # Start listeners for mouse and keyboard
-        mouse_listener = mouse.Listener(on_move=on_move, on_click=on_click, on_scroll=on_scroll)
-        keyboard_listener = keyboard.Listener(on_press=on_press, on_release=on_release)
-        
-        mouse_listener.start()
-        keyboard_listener.start()
-        
-        # Start the main tracking thread
-        main_thread = threading.Thread(target=self.tracking_loop, daemon=True)
-        main_thread.start()
-        
-        # Start status update thread
-        status_update_thread = threading.Thread(target=self.update_status_file, daemon=True)
-        status_update_thread.start()
-        
-        # Start UI update thread
-        self.start_ui_updates()
-        
-        # Update UI
-        self.start_btn.config(state=tk.DISABLED)
-        self.stop_btn.config(state=tk.NORMAL)
-        self.status_label.config(text="Status: Running")
-        
-        # Update log
-        self.add_to_log(f"Tracking started at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        # Create status file
-        self.create_status_file()
-
-    def stop_tracking(self):
-        global is_running, mouse_listener, keyboard_listener
-        
-        if not is_running:
-            return
-        
-        is_running = False
-        
-        # Stop listeners
-        if mouse_listener:
-            mouse_listener.stop()
-        
-        if keyboard_listener:
-            keyboard_listener.stop()
-        
-        # Update UI
-        self.start_btn.config(state=tk.NORMAL)
-        self.stop_btn.config(state=tk.DISABLED)
-        self.status_label.config(text="Status: Not running")
-        
-        # Update log
-        self.add_to_log(f"Tracking stopped at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        # Update status file
-        with open("program_status.txt", "w") as status_file:
-            status_file.write(f"Program started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            status_file.write(f"Program stopped at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            status_file.write("Status: STOPPED\n")
-
-    def tracking_loop(self):
-        global is_running, last_checked_hour, last_checked_day, inactivity_start_time, inactivity_periods
-        
-        start_time = datetime.now()
-        
-        try:
-            while is_running:
-                time.sleep(0.5)
-                
-                current_time = get_current_time()
-                
-                # Check for inactivity
-                inactive_seconds = (current_time - last_activity_time).total_seconds()
-                
-                # Start inactivity period if threshold is reached and we're not already tracking inactivity
-                if inactive_seconds >= INACTIVITY_THRESHOLD and not inactivity_start_time:
-                    inactivity_start_time = last_activity_time
-                    logging.info(f"Inactivity detected. Start time: {inactivity_start_time}")
-                    self.add_to_log(f"Inactivity started at {inactivity_start_time.strftime('%H:%M:%S')}")
-                
-                # Handle hour change - Process charts exactly at hour boundary
-                if current_time.hour != last_checked_hour:
-                    logging.info(f"Hour change detected: {last_checked_hour} -> {current_time.hour}")
-                    
-                    # Calculate the exact hour boundary for the completed hour
-                    previous_hour = last_checked_hour
-                    hour_date = current_time.date()
-                    
-                    # Adjust date if crossing midnight
-                    if current_time.hour == 0:
-                        previous_hour = 23
-                        hour_date = hour_date - timedelta(days=1)
-                    
-                    # Create exact timestamps for hour boundaries
-                    hour_start = datetime.combine(hour_date, datetime.min.time().replace(hour=previous_hour))
-                    hour_end = hour_start + timedelta(hours=1)
-                    
-                    logging.info(f"Processing data for hour: {hour_start} to {hour_end}")
-                    
-                    # If we're in an inactivity period that spans the hour change, log it up to the hour boundary
-                    if inactivity_start_time and inactivity_start_time < hour_end:
-                        log_inactivity(inactivity_start_time, hour_end)
-                        inactivity_start_time = hour_end  # Continue inactivity from the new hour
-                    
-                    # Generate CSV for the completed hour - only include periods that belong to this hour
-                    hour_inactivity = []
-                    for start, end in inactivity_periods:
-                        # Only include periods that overlap with this hour
-                        if start < hour_end and end > hour_start:
-                            # Clip to hour boundary
-                            adjusted_start = max(start, hour_start)
-                            adjusted_end = min(end, hour_end)
-                            hour_inactivity.append((adjusted_start, adjusted_end))
-                    
-                    # Format filename with exact hour information
-                    hourly_csv_name = os.path.join(hourly_csv_dir, f'{hour_start.strftime("%Y-%m-%d_%H")}.csv')
-                    generate_csv_log(hour_inactivity, hourly_csv_name)
-                    
-                    # Generate chart with the correct hour label and time period
-                    if previous_hour == 23:
-                        title = f'23rd hour ------ {hour_date.strftime("%d %B %Y")}'
-                    else:
-                        title = f'{previous_hour} to {(previous_hour + 1) % 24} ----- {hour_date.strftime("%d %B %Y")}'
-                    
-                    # Use the exact hour for chart generation
-                    generate_hourly_bar_chart(hourly_csv_name, title, (previous_hour + 1) % 24, hour_end)
-                    
-                    # Remove logged inactivity periods that are completely before the new hour
-                    inactivity_periods = [(start, end) for start, end in inactivity_periods if end > hour_end]
-                    
-                    # Update last checked hour
-                    last_checked_hour = current_time.hour
-                    
-                    # Update log
-                    self.add_to_log(f"Hour change processed: {previous_hour} -> {current_time.hour}")
-                
-                # Handle day change
-                if current_time.day != last_checked_day:
-                    logging.info(f"Day change detected: {last_checked_day} -> {current_time.day}")
-                    
-                    # Reset for new day
-                    last_checked_day = current_time.day
-                    
-                    # Clear old inactivity periods (optional)
-                    day_start = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
-                    inactivity_periods = [(start, end) for start, end in inactivity_periods if end > day_start]
-                    
-                    # Update log
-                    self.add_to_log(f"Day change processed: {(day_start - timedelta(days=1)).strftime('%Y-%m-%d')} -> {day_start.strftime('%Y-%m-%d')}")
-        
-        except Exception as e:
-            logging.error(f"Error in tracking loop: {str(e)}")
-            self.add_to_log(f"Error: {str(e)}")
-            
-            # Update status file
-            with open("program_status.txt", "w") as status_file:
-                status_file.write(f"Program started at: {start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                status_file.write(f"Program crashed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                status_file.write("Status: ERROR\n")
-                status_file.write(f"Error message: {str(e)}\n")
-
-    def update_status_file(self):
-        while is_running:
-            with open("program_status.txt", "w") as status_file:
-                status_file.write(f"Program started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                status_file.write(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                status_file.write("Status: RUNNING\n")
-                status_file.write(f"Tracking inactivity periods: {len(inactivity_periods)}\n")
-            time.sleep(300)  # Update every 5 minutes
-
-    def create_status_file(self):
-        with open("program_status.txt", "w") as status_file:
-            status_file.write(f"Program started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            status_file.write("Status: RUNNING\n")
-
-    def start_ui_updates(self):
-        # Start a timer to update UI elements
-        self.update_ui()
-        
-    def update_ui(self):
-        if not is_running:
-            return
-            
-        # Update time running
-        if self.start_time: 
-            running_time = datetime.now() - self.start_time
-            hours, remainder = divmod(running_time.total_seconds(), 3600)
-            minutes, seconds = divmod(remainder, 60)
-            self.time_label.config(text=f"Time running: {int(hours):02}:{int(minutes):02}:{int(seconds):02}")
-        
-        # Update inactivity time
-        total_inactivity = sum((end - start).total_seconds() for start, end in inactivity_periods)
-        if inactivity_start_time:
-            total_inactivity += (get_current_time() - inactivity_start_time).total_seconds()
-        
-        hours, remainder = divmod(total_inactivity, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        self.inactivity_label.config(text=f"Total inactivity: {int(hours):02}:{int(minutes):02}:{int(seconds):02}")
-        
-        # Update inactivity percentage
-        if running_time.total_seconds() > 0:
-            percentage = (total_inactivity / running_time.total_seconds()) * 100
-            self.percentage_label.config(text=f"Inactivity percentage: {percentage:.2f}%")
-        
-        # Update current status
-        if inactivity_start_time:
-            self.current_status_label.config(text="Currently: Inactive")
-            self.activity_status.config(text="Activity: Inactive")
-        else:
-            self.current_status_label.config(text="Currently: Active")
-            self.activity_status.config(text="Activity: Active")
-        
-        # Schedule the next update
-        self.root.after(1000, self.update_ui)
-
-    def add_to_log(self, message):
-        self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, f"{datetime.now().strftime('%H:%M:%S')} - {message}\n")
-        self.log_text.see(tk.END)
-        self.log_text.config(state=tk.DISABLED)
-
-    def refresh_live_view(self):
-        view_type = self.view_type.get()
-        
-        # Clear the current figure
-        self.fig.clf()
-        
-        if view_type == "Current Hour":
-            self.display_current_hour()
-        elif view_type == "Today's Summary":
-            self.display_daily_summary()
-        
-        self.canvas.draw()
-    
-    def toggle_auto_refresh(self):
-        if self.auto_refresh_var.get():
-            # Start auto refresh
-            self.refresh_live_view()
-            self.schedule_auto_refresh()
-        else:
-            # Cancel auto refresh if scheduled
-            if self.live_view_timer:
-                self.root.after_cancel(self.live_view_timer)
-                self.live_view_timer = None
-    
-    def schedule_auto_refresh(self):
-        # Cancel any existing timer
-        if self.live_view_timer:
-            self.root.after_cancel(self.live_view_timer)
-        
-        # Schedule next refresh in 30 seconds
-        self.live_view_timer = self.root.after(30000, self.auto_refresh_callback)
-    
-    def auto_refresh_callback(self):
-        self.refresh_live_view()
-        self.schedule_auto_refresh()
-    
-    def display_current_hour(self):
-        current_time = get_current_time()
-        hour_start = current_time.replace(minute=0, second=0, microsecond=0)
-        hour_end = hour_start + timedelta(hours=1)
-        
-        ax = self.fig.add_subplot(111)
-        ax.set_facecolor('#E60039')
-        self.fig.patch.set_facecolor('#E60039')
-        
-        ax.set_xlim(hour_start, hour_end)
-        
-        # Apply gradient background
-        background_cmap = LinearSegmentedColormap.from_list("background_cmap", list(zip([0, 1], ["#000000", "#333333"])))
-        apply_gradient(ax, [mdates.date2num(hour_start), mdates.date2num(hour_end), 0, 1], background_cmap)
-        
-        # Plot current inactivity periods
-        total_inactive_time = timedelta()
-        for start, end in inactivity_periods:
-            if start < hour_end and end > hour_start:
-                adjusted_start = max(start, hour_start)
-                adjusted_end = min(end, hour_end)
-                
-                if adjusted_start < adjusted_end:
-                    ax.axvspan(adjusted_start, adjusted_end, facecolor='white', edgecolor='black', hatch='///', alpha=0.5)
-                    total_inactive_time += adjusted_end - adjusted_start
-        
-        # Add current inactivity period if exists
-        if inactivity_start_time and inactivity_start_time < hour_end:
-            adjusted_start = max(inactivity_start_time, hour_start)
-            adjusted_end = current_time
-            
-            if adjusted_start < adjusted_end:
-                ax.axvspan(adjusted_start, adjusted_end, facecolor='white', edgecolor='black', hatch='///', alpha=0.5)
-                total_inactive_time += adjusted_end - adjusted_start
-        
-        # Set up time axis
-        ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=15))
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-        
-        # Add title
-        title = f'Current Hour ({hour_start.strftime("%H:00")}-{hour_end.strftime("%H:00")}) - {hour_start.strftime("%d %B %Y")}'
-        ax.set_title(title, color='#C0C0C0', fontsize=16, fontweight='bold', pad=20)
-        
-        ax.tick_params(axis='x', colors='white', labelsize=12)
-        ax.xaxis.set_visible(True)
-        ax.yaxis.set_visible(False)
-        
-        # Calculate metrics
-        total_inactive_minutes = total_inactive_time.total_seconds() / 60
-        elapsed_minutes = (min(current_time, hour_end) - hour_start).total_seconds() / 60
-        
-        if elapsed_minutes > 0:
-            total_inactive_percentage = (total_inactive_minutes / elapsed_minutes) * 100
-        else:
-            total_inactive_percentage = 0
-        
-        # Add metrics as text
-        self.fig.text(0.85, 0.8, f"{total_inactive_minutes:.2f}",
-                      fontsize=24, color='yellow', ha='left', va='center', fontweight='bold')
-        
-        self.fig.text(0.85, 0.3, f"{total_inactive_percentage:.2f}%",
-                      fontsize=24, color='silver', ha='left', va='center', fontweight='bold')
-        
-        # Add labels
-        self.fig.text(0.85, 0.9, "Minutes Inactive:",
-                      fontsize=12, color='white', ha='left', va='center')
-        
-        self.fig.text(0.85, 0.4, "Percentage Inactive:",
-                      fontsize=12, color='white', ha='left', va='center')
-        
-        # Save path for later use
-        self.current_chart_path = os.path.join(
-            hourly_charts_dir, 
-            hour_start.strftime('%d %B %Y'), 
-            f"{hour_start.strftime('%d %B %Y_%H')}.png"
-        )
-    
-    def display_daily_summary(self):
-        current_time = get_current_time()
-        day_start = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        
-        ax = self.fig.add_subplot(111)
-        ax.set_facecolor('#40E0D0')
-        self.fig.patch.set_facecolor('#40E0D0')
-        
-        ax.set_xlim(day_start, day_end)
-        
-        # Apply gradient background
-        background_cmap = LinearSegmentedColormap.from_list("background_cmap", list(zip([0, 1], ["#000000", "#333333"])))
-        apply_gradient(ax, [mdates.date2num(day_start), mdates.date2num(day_end), 0, 1], background_cmap)
-        
-        # Collect all inactivity periods for the day
-        total_inactive_time = timedelta()
-        for start, end in inactivity_periods:
-            if start < day_end and end > day_start:
-                adjusted_start = max(start, day_start)
-                adjusted_end = min(end, day_end)
-                
-                if adjusted_start < adjusted_end:
-                    ax.axvspan(adjusted_start, adjusted_end, facecolor='white', edgecolor='black', hatch='///', alpha=0.5)
-                    total_inactive_time += adjusted_end - adjusted_start
-        
-        # Add current inactivity period if exists
-        if inactivity_start_time and inactivity_start_time < day_end:
-            adjusted_start = max(inactivity_start_time, day_start)
-            adjusted_end = current_time
-            
-            if adjusted_start < adjusted_end:
-                ax.axvspan(adjusted_start, adjusted_end, facecolor='white', edgecolor='black', hatch='///', alpha=0.5)
-                total_inactive_time += adjusted_end - adjusted_start
-        
-        # Set up time axis
-        ax.xaxis.set_major_locator(mdates.HourLocator(interval=1))
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%H'))
-        
-        # Add title
-        title = f"Today's Summary - {day_start.strftime('%d %B %Y')}"
-        ax.set_title(title, color='#000080', fontsize=16, fontweight='bold', pad=20)
-        
-        ax.tick_params(axis='x', colors='#000080', labelsize=12)
-        ax.xaxis.set_visible(True)
-        ax.yaxis.set_visible(False)
-        
-        # Calculate metrics
-        total_inactive_hours = total_inactive_time.total_seconds() / 3600
-        elapsed_hours = (min(current_time, day_end) - day_start).total_seconds() / 3600
-        
-        if elapsed_hours > 0:
-            total_inactive_percentage = (total_inactive_hours / elapsed_hours) * 100
-        else:
-            total_inactive_percentage = 0
-        
-        # Add metrics as text with conditional coloring
-        if total_inactive_hours <= 10:
-            inactive_hours_color = '#004D40'
-            inactive_pct_color = '#002171'
-        elif total_inactive_hours > 10 and total_inactive_hours < 15:
-            inactive_hours_color = '#B71C1C'
-            inactive_pct_color = '#4A148C'
-        else:
-            inactive_hours_color = '#1B5E20'
-            inactive_pct_color = '#BF360C'
-        
-        self.fig.text(0.85, 0.8, f"{total_inactive_hours:.2f}",
-                      fontsize=24, color=inactive_hours_color, ha='left', va='center', fontweight='bold')
-        
-        self.fig.text(0.83, 0.3, f"{total_inactive_percentage:.2f}%",
-                      fontsize=24, color=inactive_pct_color, ha='left', va='center', fontweight='bold')
-        
-        # Save path for later use
-        self.current_chart_path = os.path.join(
-            'daily_charts',
-            f"{day_start.strftime('%Y-%m-%d')}.png"
-        )
-    
-    def save_current_chart(self):
-        if not self.current_chart_path:
-            messagebox.showinfo("Save Chart", "No chart to save.")
-            return
-        
-        # Ensure the directory exists
-        os.makedirs(os.path.dirname(self.current_chart_path), exist_ok=True)
-        
-        # Save the figure
-        self.fig.savefig(self.current_chart_path)
-        messagebox.showinfo("Save Chart", f"Chart saved to: {self.current_chart_path}")
-    
-    def load_statistics(self):
-        try:
-            selected_date = datetime.strptime(self.date_entry.get(), "%Y-%m-%d")
-        except ValueError:
-            messagebox.showerror("Error", "Invalid date format. Use YYYY-MM-DD")
-            return
-        
-        # Clear previous hour data
-        for widget in self.hourly_scrollable_frame.winfo_children():
-            widget.destroy()
-        
-        # Check if we have data for this date
-        date_str = selected_date.strftime('%Y-%m-%d')
-        daily_data = []
-        
-        # Look for hourly CSV files
-        for i in range(24):
-            file_name = os.path.join(hourly_csv_dir, f'{date_str}_{i:02d}.csv')
-            if os.path.exists(file_name):
-                try:
-                    df = pd.read_csv(file_name)
-                    if not df.empty:
-                        df['Start Time'] = pd.to_datetime(df['Start Time'])
-                        df['End Time'] = pd.to_datetime(df['End Time'])
-                        
-                        # Calculate total inactive time for this hour
-                        total_inactive = sum((row['End Time'] - row['Start Time']).total_seconds() / 60 for _, row in df.iterrows())
-                        
-                        daily_data.append({
-                            'hour': i,
-                            'inactive_minutes': total_inactive,
-                            'inactive_percentage': (total_inactive / 60) * 100
-                        })
-                        
-                        # Add to hourly breakdown
-                        hour_frame = ttk.Frame(self.hourly_scrollable_frame)
-                        hour_frame.pack(fill=tk.X, pady=5)
-                        
-                        hour_label = ttk.Label(hour_frame, text=f"{i:02d}:00 - {(i+1) % 24:02d}:00", width=15)
-                        hour_label.pack(side=tk.LEFT, padx=5)
-                        
-                        inactive_label = ttk.Label(hour_frame, text=f"{total_inactive:.2f} min", width=15)
-                        inactive_label.pack(side=tk.LEFT, padx=5)
-                        
-                        percent_label = ttk.Label(hour_frame, text=f"{(total_inactive / 60) * 100:.2f}%", width=15)
-                        percent_label.pack(side=tk.LEFT, padx=5)
-                        
-                        # Add a progress bar
-                        progress = ttk.Progressbar(hour_frame, length=200, maximum=100, 
-                                                  value=(total_inactive / 60) * 100)
-                        progress.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
-                except Exception as e:
-                    logging.error(f"Error loading hour {i}: {str(e)}")
-        
-        # Update summary
-        if daily_data:
-            total_inactive_minutes = sum(hour['inactive_minutes'] for hour in daily_data)
-            total_hours = len(daily_data)
-            total_inactive_percentage = sum(hour['inactive_percentage'] for hour in daily_data) / total_hours if total_hours > 0 else 0
-            
-            self.total_inactive_label.config(text=f"Total Inactive Time: {total_inactive_minutes:.2f} minutes ({total_inactive_minutes/60:.2f} hours)")
-            self.total_active_label.config(text=f"Total Active Time: {(total_hours * 60 - total_inactive_minutes):.2f} minutes ({(total_hours - total_inactive_minutes/60):.2f} hours)")
-            self.inactive_percent_label.config(text=f"Inactive Percentage: {total_inactive_percentage:.2f}%")
-        else:
-            self.total_inactive_label.config(text="Total Inactive Time: No data available")
-            self.total_active_label.config(text="Total Active Time: No data available")
-            self.inactive_percent_label.config(text="Inactive Percentage: No data available")
-            
-            # Show message in hourly frame
-            no_data_label = ttk.Label(self.hourly_scrollable_frame, text="No data available for selected date")
-            no_data_label.pack(pady=20)
-    
-    def on_closing(self):
-        if is_running:
-            if messagebox.askyesno("Quit", "Tracking is still running. Do you want to stop tracking and quit?"):
-                self.stop_tracking()
-                self.root.destroy()
-        else:
-            self.root.destroy()
-
-
-# Function to get the current time (either real or custom)
-def get_current_time():
-    return datetime.now() + time_offset
-
-
-# Function to log inactivity
-def log_inactivity(start_time, end_time):
-    # Only log if there's a meaningful duration
-    if (end_time - start_time).total_seconds() > 0:
-        inactivity_periods.append((start_time, end_time))
-        logging.info(f"Inactivity logged from {start_time} to {end_time}")
-
-
-# Update last activity time and log inactivity if necessary
-def update_activity_time():
-    global last_activity_time, inactivity_start_time
-    current_time = get_current_time()
-
-    # If we were in an inactivity period, log it before updating
-    if inactivity_start_time:
-        log_inactivity(inactivity_start_time, current_time)
-        inactivity_start_time = None
-        logging.info(f"Activity resumed at {current_time}")
-
-    last_activity_time = current_time
-
-
-# Mouse and keyboard event handlers
-def on_move(x, y):
-    update_activity_time()
-
-
-def on_click(x, y, button, pressed):
-    update_activity_time()
-
-
-def on_scroll(x, y, dx, dy):
-    update_activity_time()
-
-
-def on_press(key):
-    update_activity_time()
-
-
-def on_release(key):
-    update_activity_time()
-
-
-def apply_gradient(ax, extent, cmap, alpha=1):
-    """Apply a gradient background to a plot."""
-    gradient = np.linspace(0, 1, 256)
-    gradient = np.vstack((gradient, gradient))
-    ax.imshow(gradient, aspect='auto', cmap=cmap, extent=extent, alpha=alpha, origin='lower', zorder=-10)
-
-
-# Function to generate bar chart for the hourly periods
-def generate_hourly_bar_chart(file_name, title, hour_display, exact_end_time):
-    try:
-        # Check if font file exists, otherwise use default
-        font_path = 'fonts/TrajanPro-Regular.ttf'
-        if os.path.exists(font_path):
-            trajan_font = FontProperties(fname=font_path, size=18)
-        else:
-            trajan_font = FontProperties(size=18)  # Use default font if custom font not found
-
-        # Calculate exact hour boundaries based on the exact end time
-        hour_end = exact_end_time
-        hour_start = hour_end - timedelta(hours=1)
-
-        logging.info(f"Generating hourly bar chart for period: {hour_start} to {hour_end}. File: {file_name}")
-
-        # Check if file exists
-        if not os.path.exists(file_name):
-            logging.warning(f"CSV file not found: {file_name}")
-            return
-
-        df = pd.read_csv(file_name)
-        if df.empty:
-            logging.info(f"No inactivity data for hour {hour_display}")
-            return
-
-        df['Start Time'] = pd.to_datetime(df['Start Time'])
-        df['End Time'] = pd.to_datetime(df['End Time'])
-
-        fig, ax = plt.subplots(figsize=(19.2, 10.8), dpi=200)
-        ax.set_facecolor('#E60039')
-        fig.patch.set_facecolor('#E60039')
-
-        ax.set_xlim(hour_start, hour_end)
-        apply_gradient(ax, [mdates.date2num(hour_start), mdates.date2num(hour_end), 0, 1], 
-                      LinearSegmentedColormap.from_list("background_cmap", list(zip([0, 1], ["#000000", "#333333"]))))
-
-        total_inactive_time = timedelta()
-        for _, row in df.iterrows():
-            adjusted_start = max(row['Start Time'], hour_start)
-            adjusted_end = min(row['End Time'], hour_end)
-
-            if adjusted_start < adjusted_end:
-                ax.axvspan(adjusted_start, adjusted_end, facecolor='white', edgecolor='black', hatch='///', alpha=0.5)
-                total_inactive_time += adjusted_end - adjusted_start
-
-        ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=15))
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-
-        ax.set_title(title, fontproperties=trajan_font, color='#C0C0C0', fontsize=40, fontweight='bold', pad=20)
-        ax.tick_params(axis='x', colors='white', labelsize=21)
-        ax.xaxis.set_visible(True)
-        ax.yaxis.set_visible(False)
-
-        # Calculate metrics - ensure proper values
-        total_inactive_minutes = total_inactive_time.total_seconds() / 60
-        total_inactive_percentage = (total_inactive_minutes / 60) * 100
-
-        # Add the metrics text with better positioning and visibility
-        # Number of minutes - yellow text
-        fig.text(0.85, 0.8, f"{total_inactive_minutes:.2f}",
-                 fontproperties=trajan_font,
-                 fontsize=55,
-                 color='yellow',
-                 ha='left',
-                 va='center',
-                 fontweight='bold')
-
-        # Percentage - silver text
-        fig.text(0.85, 0.3, f"{total_inactive_percentage:.2f}%",
-                 fontproperties=trajan_font,
-                 fontsize=55,
-                 color='silver',
-                 ha='left',
-                 va='center',
-                 fontweight='bold')
-
-        # Add labels for clarity
-        fig.text(0.85, 0.9, "Minutes Inactive:",
-                 fontproperties=trajan_font,
-                 fontsize=20,
-                 color='white',
-                 ha='left',
-                 va='center')
-
-        fig.text(0.85, 0.4, "Percentage Inactive:",
-                 fontproperties=trajan_font,
-                 fontsize=20,
-                 color='white',
-                 ha='left',
-                 va='center')
-
-        fig.subplots_adjust(left=0.1, right=0.8, top=0.9, bottom=0.1)
-
-        for label in ax.get_xticklabels() + ax.get_yticklabels():
-            label.set_fontproperties(trajan_font)
-
-        plt.grid(True, linestyle='--', linewidth=0.5)
-        plt.tight_layout(rect=[0, 0, 0.8, 1])
-
-        # Create directory for the date of the chart (based on hour_start)
-        date_str = hour_start.strftime('%d %B %Y')
-        date_dir = os.path.join(hourly_charts_dir, date_str)
-        os.makedirs(date_dir, exist_ok=True)
-
-        # Save the plot in the directory with the correct format - using hour_start for consistent naming
-        hour_label = hour_start.hour
-        chart_date = f"{hour_start.strftime('%d %B %Y_')}{hour_label}"
-
-        save_path = os.path.join(date_dir, f'{chart_date}.png')
-        plt.savefig(save_path)
-        plt.close()
-
-        logging.info(f"Hourly bar chart saved: {save_path}")
-
-    except Exception as e:
-        logging.error(f"Error generating chart: {str(e)}")
-
-
-# Function to generate CSV log
-def generate_csv_log(inactivity_periods, file_name):
-    try:
-        if not inactivity_periods:
-            # Create an empty CSV file
-            with open(file_name, 'w') as f:
-                f.write("Start Time,End Time\n")
-            logging.info(f"Empty CSV log created: {file_name}")
-            return
-        
-        df = pd.DataFrame(inactivity_periods, columns=['Start Time', 'End Time'])
-        df.to_csv(file_name, index=False)
-        logging.info(f"CSV log saved: {file_name}")
-
-    except Exception as e:
-        logging.error(f"Error generating CSV log: {str(e)}")
-
-
-def main():
-    # Create the main window
-    root = tk.Tk()
-    app = InactivityTrackerApp(root)
-    
-    # Set a custom icon (if available)
-    try:
-        root.iconbitmap("app_icon.ico")
-    except:
-        pass  # Use default icon if custom one is not available
-    
-    # Start the main loop
-    root.mainloop()
-
-
-if __name__ == "__main__":
+import time
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+import os
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+import logging
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from TrackerCore import (ActivityTracker, DayAggregate, session_inactive_seconds, rolling_inactivity,
+                         load_hourly_summaries, daily_summary_rows, bucket_floor, check_bucket_minutes,
+                         load_settings, clip_periods)
+from TrackerCore import save_settings as save_tracker_settings
+from TrackerIPC import RemoteTracker, attach_tracker
+from TrackerCharts import apply_gradient, chart_file_name
+from TrackerUI import VirtualTable, UiScheduler
+from TrackerMetrics import metrics, STAGES, ordered_stages
+from TrackerProfiler import profiler
+
+# Heavy modules, imported on first use by load_plotting_stack()
+# so the window can appear before matplotlib and numpy are loaded
+mdates = None
+LinearSegmentedColormap = None
+FontProperties = None
+FigureCanvasTkAgg = None
+mplfig = None
+_heavy_import_lock = threading.Lock()
+
+GUI_LOG_FILE = 'program_gui.log'
+
+# Logging setup
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s',
+                    handlers=[
+                        logging.FileHandler(GUI_LOG_FILE),
+                        logging.StreamHandler()
+                    ])
+
+# Global variables
+use_custom_time = False
+LOG_VIEW_LINES = 500  # lines kept in the activity log view
+LOG_FLUSH_INTERVAL = 250  # ms between log view flushes
+METRICS_FILE = 'gui_metrics.json'  # latency histograms written on exit
+PROFILE_SECONDS = 60  # length of a profiling window started from the Settings tab
+BUCKET_SIZE_CHOICES = (5, 10, 15, 20, 30, 60, 120, 240, 360, 720, 1440)  # minutes offered in the Settings tab
+
+
+class InactivityTrackerApp:
+    def __init__(self, root, standalone=False):
+        self.root = root
+        self.root.title("Inactivity Tracker")
+        self.root.geometry("900x700")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+        # Share one tracker process with the desktop widget, or track in-process
+        # when asked to or when no daemon can be reached. Either way it starts with the
+        # settings last saved from the Settings tab.
+        settings = load_settings()
+        self.tracker = None if standalone else attach_tracker(settings=settings)
+        if self.tracker is None:
+            self.tracker = ActivityTracker(**settings)
+        self.tracker.add_observer(self.on_tracker_event)
+
+        # Today's inactivity from the hourly CSVs plus the live periods, for the
+        # daily view and the day total, so both survive rollovers and restarts
+        self.day_aggregate = DayAggregate(self.tracker.hourly_csv_dir)
+
+        # Drives update_ui: 1 s ticks, slower while the session is idle, none while minimized
+        self.ui_scheduler = UiScheduler(self.root, self.update_ui)
+
+        # Log lines and state changes from tracker threads are queued here and
+        # applied on the Tk thread by flush_pending_ui(). deque appends and pops
+        # are atomic, and maxlen makes it a bounded ring buffer.
+        self.log_buffer = deque(maxlen=LOG_VIEW_LINES)
+        self.tracking_state_changed = False
+        self.tracker_disconnected = False
+
+        self.setup_gui()
+        self.live_view_active = False
+        self.live_view_timer = None
+        self.current_chart_path = None
+        self.current_chart_hour = None  # hour shown by the Last Hour Chart view
+        self.start_time = None
+
+        # Another client may already have started tracking
+        self.sync_tracking_state()
+        self.root.after(LOG_FLUSH_INTERVAL, self.flush_pending_ui)
+
+    def setup_gui(self):
+        # Create notebook for tabs
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # Create tabs
+        self.control_tab = ttk.Frame(self.notebook)
+        self.live_view_tab = ttk.Frame(self.notebook)
+        self.stats_tab = ttk.Frame(self.notebook)
+        self.settings_tab = ttk.Frame(self.notebook)
+
+        self.notebook.add(self.control_tab, text="Control")
+        self.notebook.add(self.live_view_tab, text="Live View")
+        self.notebook.add(self.stats_tab, text="Statistics")
+        self.notebook.add(self.settings_tab, text="Settings")
+
+        # Setup each tab
+        self.setup_control_tab()
+        self.setup_live_view_tab()
+        self.setup_stats_tab()
+        self.setup_settings_tab()
+
+        # The chart canvas is only built once the Live View tab is first opened
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+
+        # Status bar at the bottom
+        self.status_frame = ttk.Frame(self.root)
+        self.status_frame.pack(fill=tk.X, side=tk.BOTTOM, padx=10, pady=5)
+
+        self.status_label = ttk.Label(self.status_frame, text="Status: Not running", anchor=tk.W)
+        self.status_label.pack(side=tk.LEFT)
+
+        self.activity_status = ttk.Label(self.status_frame, text="Activity: N/A", anchor=tk.E)
+        self.activity_status.pack(side=tk.RIGHT)
+
+    def setup_control_tab(self):
+        control_frame = ttk.LabelFrame(self.control_tab, text="Inactivity Tracker Controls")
+        control_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # Start/Stop buttons
+        self.btn_frame = ttk.Frame(control_frame)
+        self.btn_frame.pack(pady=20)
+
+        self.start_btn = ttk.Button(self.btn_frame, text="Start Tracking", command=self.start_tracking)
+        self.start_btn.pack(side=tk.LEFT, padx=10)
+
+        self.stop_btn = ttk.Button(self.btn_frame, text="Stop Tracking", command=self.stop_tracking, state=tk.DISABLED)
+        self.stop_btn.pack(side=tk.LEFT, padx=10)
+
+        # Current session info
+        self.info_frame = ttk.LabelFrame(control_frame, text="Current Session")
+        self.info_frame.pack(fill=tk.X, padx=10, pady=10)
+
+        # Time running
+        self.time_label = ttk.Label(self.info_frame, text="Time running: 00:00:00")
+        self.time_label.pack(anchor=tk.W, padx=10, pady=5)
+
+        # Inactivity time
+        self.inactivity_label = ttk.Label(self.info_frame, text="Total inactivity: 00:00:00")
+        self.inactivity_label.pack(anchor=tk.W, padx=10, pady=5)
+
+        # Inactivity since midnight, including earlier sessions
+        self.today_label = ttk.Label(self.info_frame, text="Inactive today: 00:00:00")
+        self.today_label.pack(anchor=tk.W, padx=10, pady=5)
+
+        # Inactivity percentage
+        self.percentage_label = ttk.Label(self.info_frame, text="Inactivity percentage: 0.00%")
+        self.percentage_label.pack(anchor=tk.W, padx=10, pady=5)
+
+        # Inactivity over sliding windows
+        self.rolling_label = ttk.Label(self.info_frame, text="Inactive in the last 5 min / 1 h / 8 h: N/A")
+        self.rolling_label.pack(anchor=tk.W, padx=10, pady=5)
+
+        # Current status
+        self.current_status_label = ttk.Label(self.info_frame, text="Currently: Active")
+        self.current_status_label.pack(anchor=tk.W, padx=10, pady=5)
+
+        # Recent activity log
+        self.log_frame = ttk.LabelFrame(control_frame, text="Recent Activity Log")
+        self.log_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        self.log_text = tk.Text(self.log_frame, height=10, width=50, state=tk.DISABLED)
+        self.log_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        self.log_scrollbar = ttk.Scrollbar(self.log_text, command=self.log_text.yview)
+        self.log_text.configure(yscrollcommand=self.log_scrollbar.set)
+        self.log_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    def setup_live_view_tab(self):
+        self.live_frame = ttk.Frame(self.live_view_tab)
+        self.live_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # Controls for live view
+        self.live_control_frame = ttk.Frame(self.live_frame)
+        self.live_control_frame.pack(fill=tk.X, pady=10)
+
+        self.view_label = ttk.Label(self.live_control_frame, text="View: ")
+        self.view_label.pack(side=tk.LEFT, padx=5)
+
+        self.view_type = ttk.Combobox(self.live_control_frame,
+                                      values=["Current Hour", "Today's Summary", "Last Hour Chart"])
+        self.view_type.current(0)
+        self.view_type.pack(side=tk.LEFT, padx=5)
+
+        self.refresh_btn = ttk.Button(self.live_control_frame, text="Refresh View", command=self.refresh_live_view)
+        self.refresh_btn.pack(side=tk.LEFT, padx=10)
+
+        self.auto_refresh_var = tk.BooleanVar(value=False)
+        self.auto_refresh_check = ttk.Checkbutton(self.live_control_frame, text="Auto Refresh (30s)", 
+                                                  variable=self.auto_refresh_var, 
+                                                  command=self.toggle_auto_refresh)
+        self.auto_refresh_check.pack(side=tk.LEFT, padx=10)
+
+        # Save button
+        self.save_btn = ttk.Button(self.live_control_frame, text="Save Chart", command=self.save_current_chart)
+        self.save_btn.pack(side=tk.RIGHT, padx=10)
+
+        # Canvas for displaying charts
+        self.chart_frame = ttk.LabelFrame(self.live_frame, text="Activity Visualization")
+        self.chart_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # Figure and canvas are created lazily by ensure_live_canvas()
+        self.fig = None
+        self.canvas = None
+
+    def on_tab_changed(self, event):
+        if self.notebook.select() == str(self.live_view_tab):
+            self.ensure_live_canvas()
+        elif self.notebook.select() == str(self.settings_tab):
+            self.refresh_diagnostics()
+
+    def ensure_live_canvas(self):
+        if self.canvas is not None:
+            return
+
+        load_plotting_stack()
+
+        # Create a Figure and a canvas to display it
+        self.fig = mplfig.Figure(figsize=(8, 6), dpi=100)
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.chart_frame)
+        self.canvas.draw()
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+    def setup_stats_tab(self):
+        stats_frame = ttk.LabelFrame(self.stats_tab, text="Activity Statistics")
+        stats_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # Date range selection
+        self.date_frame = ttk.Frame(stats_frame)
+        self.date_frame.pack(fill=tk.X, pady=10)
+
+        self.date_label = ttk.Label(self.date_frame, text="From: ")
+        self.date_label.pack(side=tk.LEFT, padx=5)
+
+        today = datetime.now().strftime("%Y-%m-%d")
+        self.date_entry = ttk.Entry(self.date_frame, width=12)
+        self.date_entry.insert(0, today)
+        self.date_entry.pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(self.date_frame, text="To: ").pack(side=tk.LEFT, padx=5)
+        self.end_date_entry = ttk.Entry(self.date_frame, width=12)
+        self.end_date_entry.insert(0, today)
+        self.end_date_entry.pack(side=tk.LEFT, padx=5)
+
+        self.granularity_var = tk.StringVar(value="Hourly")
+        self.granularity_combo = ttk.Combobox(self.date_frame, textvariable=self.granularity_var,
+                                              values=("Hourly", "Daily"), state="readonly", width=8)
+        self.granularity_combo.pack(side=tk.LEFT, padx=5)
+        self.granularity_combo.bind("<<ComboboxSelected>>", lambda e: self.load_statistics())
+
+        self.calendar_btn = ttk.Button(self.date_frame, text="Calendar", command=self.show_calendar)
+        self.calendar_btn.pack(side=tk.LEFT, padx=5)
+
+        self.load_stats_btn = ttk.Button(self.date_frame, text="Load Statistics", command=self.load_statistics)
+        self.load_stats_btn.pack(side=tk.LEFT, padx=10)
+
+        # Statistics display area
+        self.stats_display_frame = ttk.Frame(stats_frame)
+        self.stats_display_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # Summary box
+        self.summary_frame = ttk.LabelFrame(self.stats_display_frame, text="Summary")
+        self.summary_frame.pack(fill=tk.X, pady=10)
+
+        self.total_active_label = ttk.Label(self.summary_frame, text="Total Active Time: N/A")
+        self.total_active_label.pack(anchor=tk.W, padx=10, pady=5)
+
+        self.total_inactive_label = ttk.Label(self.summary_frame, text="Total Inactive Time: N/A")
+        self.total_inactive_label.pack(anchor=tk.W, padx=10, pady=5)
+
+        self.inactive_percent_label = ttk.Label(self.summary_frame, text="Inactive Percentage: N/A")
+        self.inactive_percent_label.pack(anchor=tk.W, padx=10, pady=5)
+
+        # Breakdown table; only the visible rows exist as widgets, so long ranges stay cheap
+        self.hourly_frame = ttk.LabelFrame(self.stats_display_frame, text="Breakdown")
+        self.hourly_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+
+        self.stats_rows = []
+        self.breakdown_table = VirtualTable(
+            self.hourly_frame,
+            columns=[('label', "Period", 170, tk.W),
+                     ('inactive_minutes', "Inactive", 100, tk.E),
+                     ('inactive_percentage', "Inactive %", 90, tk.E),
+                     ('periods', "Periods", 70, tk.E),
+                     ('active_seconds', "Input", 80, tk.E),
+                     ('events', "Keys / Clicks / Scrolls / Moves", 200, tk.E),
+                     ('bar', "", 220, tk.W)],
+            formatters={'inactive_minutes': lambda row: f"{row['inactive_minutes']:.2f} min",
+                        'inactive_percentage': lambda row: f"{row['inactive_percentage']:.2f}%",
+                        # Time with at least one input event in the second, from the activity bitmap
+                        'active_seconds': lambda row: ("-" if row['active_seconds'] is None
+                                                       else f"{row['active_seconds'] / 60:.1f} min"),
+                        'events': format_event_counts,
+                        'bar': lambda row: "█" * round(row['inactive_percentage'] / 5)},
+            sort_keys={'label': lambda row: row['start'],
+                       'active_seconds': lambda row: row['active_seconds'] or 0,
+                       'events': lambda row: sum(row['events'] or ()),
+                       'bar': lambda row: row['inactive_percentage']},
+            on_select=self.on_breakdown_select)
+        self.breakdown_table.pack(fill=tk.BOTH, expand=True)
+
+    def setup_settings_tab(self):
+        settings_frame = ttk.LabelFrame(self.settings_tab, text="Application Settings")
+        settings_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # Inactivity threshold
+        self.threshold_frame = ttk.Frame(settings_frame)
+        self.threshold_frame.pack(fill=tk.X, pady=10)
+
+        self.threshold_label = ttk.Label(self.threshold_frame, text="Inactivity Threshold (seconds): ")
+        self.threshold_label.pack(side=tk.LEFT, padx=5)
+
+        self.threshold_var = tk.IntVar(value=self.tracker.threshold)
+        self.threshold_entry = ttk.Entry(self.threshold_frame, textvariable=self.threshold_var)
+        self.threshold_entry.pack(side=tk.LEFT, padx=5)
+
+        # Length of the periods written to one CSV and chart
+        self.bucket_frame = ttk.Frame(settings_frame)
+        self.bucket_frame.pack(fill=tk.X, pady=10)
+
+        self.bucket_label = ttk.Label(self.bucket_frame, text="Bucket Size (minutes): ")
+        self.bucket_label.pack(side=tk.LEFT, padx=5)
+
+        self.bucket_var = tk.StringVar(value=str(self.tracker.bucket_minutes))
+        self.bucket_combo = ttk.Combobox(self.bucket_frame, textvariable=self.bucket_var, width=8,
+                                         values=BUCKET_SIZE_CHOICES)
+        self.bucket_combo.pack(side=tk.LEFT, padx=5)
+
+        # Directory settings
+        self.dir_frame = ttk.LabelFrame(settings_frame, text="Directory Settings")
+        self.dir_frame.pack(fill=tk.X, pady=10, padx=10)
+
+        # Hourly charts directory
+        self.hourly_dir_frame = ttk.Frame(self.dir_frame)
+        self.hourly_dir_frame.pack(fill=tk.X, pady=5)
+
+        self.hourly_dir_label = ttk.Label(self.hourly_dir_frame, text="Hourly Charts Directory: ")
+        self.hourly_dir_label.pack(side=tk.LEFT, padx=5)
+
+        self.hourly_dir_var = tk.StringVar(value=self.tracker.hourly_charts_dir)
+        self.hourly_dir_entry = ttk.Entry(self.hourly_dir_frame, textvariable=self.hourly_dir_var, width=30)
+        self.hourly_dir_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+
+        self.hourly_dir_btn = ttk.Button(self.hourly_dir_frame, text="Browse", 
+                                         command=lambda: self.select_directory("hourly"))
+        self.hourly_dir_btn.pack(side=tk.LEFT, padx=5)
+
+        # Hourly CSV directory
+        self.csv_dir_frame = ttk.Frame(self.dir_frame)
+        self.csv_dir_frame.pack(fill=tk.X, pady=5)
+
+        self.csv_dir_label = ttk.Label(self.csv_dir_frame, text="Hourly CSV Directory: ")
+        self.csv_dir_label.pack(side=tk.LEFT, padx=5)
+
+        self.csv_dir_var = tk.StringVar(value=self.tracker.hourly_csv_dir)
+        self.csv_dir_entry = ttk.Entry(self.csv_dir_frame, textvariable=self.csv_dir_var, width=30)
+        self.csv_dir_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+
+        self.csv_dir_btn = ttk.Button(self.csv_dir_frame, text="Browse", 
+                                      command=lambda: self.select_directory("csv"))
+        self.csv_dir_btn.pack(side=tk.LEFT, padx=5)
+
+        # Custom time settings
+        self.custom_time_frame = ttk.LabelFrame(settings_frame, text="Time Settings")
+        self.custom_time_frame.pack(fill=tk.X, pady=10, padx=10)
+
+        self.custom_time_var = tk.BooleanVar(value=use_custom_time)
+        self.custom_time_check = ttk.Checkbutton(self.custom_time_frame, text="Use Custom Time", 
+                                                 variable=self.custom_time_var)
+        self.custom_time_check.pack(anchor=tk.W, padx=5, pady=5)
+
+        self.custom_time_entry_frame = ttk.Frame(self.custom_time_frame)
+        self.custom_time_entry_frame.pack(fill=tk.X, pady=5)
+
+        self.custom_time_label = ttk.Label(self.custom_time_entry_frame, text="Custom Start Time: ")
+        self.custom_time_label.pack(side=tk.LEFT, padx=5)
+
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.custom_time_entry = ttk.Entry(self.custom_time_entry_frame, width=20)
+        self.custom_time_entry.insert(0, current_time)
+        self.custom_time_entry.pack(side=tk.LEFT, padx=5)
+
+        # Save settings button
+        self.save_settings_btn = ttk.Button(settings_frame, text="Save Settings", command=self.save_settings)
+        self.save_settings_btn.pack(pady=10)
+
+        # Diagnostics: latency histograms of this window and of the tracker process
+        self.diagnostics_frame = ttk.LabelFrame(settings_frame, text="Diagnostics")
+        self.diagnostics_frame.pack(fill=tk.BOTH, expand=True, pady=10, padx=10)
+
+        columns = ('count', 'p50', 'p90', 'p99', 'max')
+        self.diagnostics_tree = ttk.Treeview(self.diagnostics_frame, columns=columns, height=len(STAGES))
+        self.diagnostics_tree.heading('#0', text="Stage")
+        self.diagnostics_tree.column('#0', width=200)
+        for column, heading in zip(columns, ("Count", "p50 (ms)", "p90 (ms)", "p99 (ms)", "Max (ms)")):
+            self.diagnostics_tree.heading(column, text=heading)
+            self.diagnostics_tree.column(column, width=80, anchor=tk.E)
+        self.diagnostics_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        self.diagnostics_btn_frame = ttk.Frame(self.diagnostics_frame)
+        self.diagnostics_btn_frame.pack(fill=tk.X)
+
+        self.refresh_diagnostics_btn = ttk.Button(self.diagnostics_btn_frame, text="Refresh",
+                                                  command=self.refresh_diagnostics)
+        self.refresh_diagnostics_btn.pack(side=tk.LEFT, padx=5, pady=5)
+
+        self.save_diagnostics_btn = ttk.Button(self.diagnostics_btn_frame, text="Save JSON",
+                                               command=self.save_diagnostics)
+        self.save_diagnostics_btn.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # Samples every thread of this window (and of the daemon when attached) for a bounded time
+        self.profile_btn = ttk.Button(self.diagnostics_btn_frame, text="Start Profiling",
+                                      command=self.toggle_profiling)
+        self.profile_btn.pack(side=tk.LEFT, padx=5, pady=5)
+
+        self.profile_label = ttk.Label(self.diagnostics_btn_frame, text="")
+        self.profile_label.pack(side=tk.LEFT, padx=5)
+
+    # Histograms of this process, plus those of the daemon when attached to one
+    def diagnostics_report(self):
+        report = metrics.report()
+        if isinstance(self.tracker, RemoteTracker):
+            tracker_report = self.tracker.metrics()
+            report['tracker_pid'] = tracker_report.get('pid')
+            report['stages'] = {**tracker_report.get('stages', {}), **report['stages']}
+        return report
+
+    def refresh_diagnostics(self):
+        stages = self.diagnostics_report()['stages']
+        self.diagnostics_tree.delete(*self.diagnostics_tree.get_children())
+        for name in ordered_stages(stages):
+            stage = stages[name]
+            self.diagnostics_tree.insert('', tk.END, text=STAGES.get(name, name),
+                                         values=(stage['count'], f"{stage['p50_ms']:.3f}", f"{stage['p90_ms']:.3f}",
+                                                 f"{stage['p99_ms']:.3f}", f"{stage['max_ms']:.3f}"))
+
+    def save_diagnostics(self):
+        file_name = filedialog.asksaveasfilename(defaultextension=".json", initialfile=METRICS_FILE,
+                                                 filetypes=[("JSON files", "*.json")])
+        if file_name:
+            metrics.dump(file_name, self.diagnostics_report())
+
+    def toggle_profiling(self):
+        remote = isinstance(self.tracker, RemoteTracker)
+        if profiler.active:
+            profiler.stop(wait=False)
+            if remote:
+                self.tracker.profile(False)
+        else:
+            profiler.start(PROFILE_SECONDS)
+            if remote:
+                self.tracker.profile(True, PROFILE_SECONDS)
+        self.update_profiling_status()
+
+    # Poll once a second while profiling; the window may end by itself
+    def update_profiling_status(self):
+        if profiler.active:
+            self.profile_btn.config(text="Stop Profiling")
+            self.profile_label.config(text=f"Profiling... {profiler.remaining():.0f}s left")
+            self.root.after(1000, self.update_profiling_status)
+            return
+        self.profile_btn.config(text="Start Profiling")
+        if profiler.last_reports:
+            where = "here and next to the daemon log" if isinstance(self.tracker, RemoteTracker) else "next to the log"
+            self.profile_label.config(text=f"Reports written {where}: {os.path.basename(profiler.last_reports[0])}")
+
+    def select_directory(self, dir_type):
+        directory = filedialog.askdirectory()
+        if directory:
+            if dir_type == "hourly":
+                self.hourly_dir_var.set(directory)
+            elif dir_type == "csv":
+                self.csv_dir_var.set(directory)
+
+    def show_calendar(self):
+        # A simple date picker dialog could be implemented here
+        # For now, we'll just show a message
+        messagebox.showinfo("Calendar", "Calendar functionality to be implemented.")
+
+    def save_settings(self):
+        global use_custom_time
+        
+        # Update custom time settings
+        use_custom_time = self.custom_time_var.get()
+        if use_custom_time:
+            try:
+                custom_start_time = datetime.strptime(self.custom_time_entry.get(), "%Y-%m-%d %H:%M:%S")
+                time_offset = custom_start_time - datetime.now()
+            except ValueError:
+                messagebox.showerror("Error", "Invalid date format. Use YYYY-MM-DD HH:MM:SS")
+                return
+        else:
+            time_offset = timedelta(0)
+
+        try:
+            bucket_minutes = check_bucket_minutes(int(self.bucket_var.get()))
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid bucket size: {str(e)}")
+            return
+
+        # Update inactivity threshold, bucket size, directories and time offset. A new
+        # bucket size writes out the current bucket and restarts the session.
+        settings = {'threshold': self.threshold_var.get(),
+                    'bucket_minutes': bucket_minutes,
+                    'hourly_charts_dir': self.hourly_dir_var.get(),
+                    'hourly_csv_dir': self.csv_dir_var.get()}
+        self.tracker.configure(time_offset=time_offset, **settings)
+
+        # Kept for the next start of the GUI, the widget and any daemon they spawn
+        try:
+            save_tracker_settings(settings)
+        except OSError as e:
+            logging.error(f"Error saving settings: {str(e)}")
+            messagebox.showerror("Error", f"Settings applied but not saved: {str(e)}")
+            return
+
+        messagebox.showinfo("Settings Saved", "Settings have been updated successfully.")
+
+    def start_tracking(self):
+        # Start listeners, the tracking thread and the status file
+        self.tracker.start()
+        self.sync_tracking_state()
+
+    def stop_tracking(self):
+        if not self.tracker.is_running:
+            return
+        
+        self.tracker.stop()
+        self.sync_tracking_state()
+
+    # Bring the buttons and UI updates in line with the tracker, which another client may have changed
+    def sync_tracking_state(self):
+        if self.tracker.is_running:
+            self.start_time = self.tracker.session_start
+            
+            # Start UI update thread
+            self.start_ui_updates()
+            
+            # Update UI
+            self.start_btn.config(state=tk.DISABLED)
+            self.stop_btn.config(state=tk.NORMAL)
+            self.status_label.config(text="Status: Running")
+        else:
+            # Update UI
+            self.start_btn.config(state=tk.NORMAL)
+            self.stop_btn.config(state=tk.DISABLED)
+            self.status_label.config(text="Status: Not running")
+
+    # Called on tracker threads: only queue work for the Tk thread
+    def on_tracker_event(self, event, data):
+        if event == 'log':
+            self.add_to_log(data['message'])
+        elif event in ('started', 'stopped'):
+            self.tracking_state_changed = True
+        elif event in ('inactive', 'active'):
+            self.ui_scheduler.request_wake()
+        elif event == 'disconnected':
+            self.tracker_disconnected = True
+
+    def flush_pending_ui(self):
+        if self.tracking_state_changed:
+            self.tracking_state_changed = False
+            self.sync_tracking_state()
+        if self.tracker_disconnected:
+            self.tracker_disconnected = False
+            self.on_tracker_disconnected()
+        self.flush_log()
+
+        # The log buffer is bounded, so flushing can wait while the window is minimized
+        interval = LOG_FLUSH_INTERVAL if self.ui_scheduler.mapped else LOG_FLUSH_INTERVAL * 8
+        self.root.after(interval, self.ui_scheduler.timed(self.flush_pending_ui))
+
+    def on_tracker_disconnected(self):
+        self.add_to_log("Connection to the tracker daemon lost")
+        self.start_btn.config(state=tk.DISABLED)
+        self.stop_btn.config(state=tk.DISABLED)
+        self.status_label.config(text="Status: Tracker daemon not reachable")
+
+    def start_ui_updates(self):
+        # Start the scheduled UI updates
+        self.ui_scheduler.start()
+        
+    # Scheduled by ui_scheduler; returning False stops the ticks until tracking restarts
+    def update_ui(self):
+        snapshot = self.tracker.snapshot()
+        if not snapshot.get('running'):
+            return False
+        ui = self.ui_scheduler
+            
+        # Update time running
+        running_time = datetime.now() - snapshot['session_start']
+        hours, remainder = divmod(running_time.total_seconds(), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        ui.set_text(self.time_label, f"Time running: {int(hours):02}:{int(minutes):02}:{int(seconds):02}")
+        
+        # Update inactivity time
+        total_inactivity = session_inactive_seconds(snapshot)
+        
+        hours, remainder = divmod(total_inactivity, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        ui.set_text(self.inactivity_label, f"Total inactivity: {int(hours):02}:{int(minutes):02}:{int(seconds):02}")
+        
+        # Update inactivity percentage
+        if running_time.total_seconds() > 0:
+            percentage = (total_inactivity / running_time.total_seconds()) * 100
+            ui.set_text(self.percentage_label, f"Inactivity percentage: {percentage:.2f}%")
+
+        hours, remainder = divmod(self.day_aggregate.inactive_seconds(snapshot), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        ui.set_text(self.today_label, f"Inactive today: {int(hours):02}:{int(minutes):02}:{int(seconds):02}")
+
+        # Update rolling windows
+        rolling = rolling_inactivity(snapshot)
+        ui.set_text(self.rolling_label, "Inactive in the last " + " / ".join(label for label, _ in rolling) + ": "
+                    + " / ".join(f"{percentage:.1f}%" for _, percentage in rolling))
+        
+        # Update current status; ticks slow down while inactive and the
+        # 'active' event wakes the scheduler straight away
+        inactive = snapshot['inactivity_start_time'] is not None
+        ui.set_idle(inactive)
+        ui.set_text(self.current_status_label, "Currently: Inactive" if inactive else "Currently: Active")
+        ui.set_text(self.activity_status, "Activity: Inactive" if inactive else "Activity: Active")
+
+    # Safe to call from any thread; the line is shown on the next flush
+    def add_to_log(self, message):
+        self.log_buffer.append(f"{datetime.now().strftime('%H:%M:%S')} - {message}\n")
+
+    # Apply all pending log lines in one insert and keep the last LOG_VIEW_LINES lines
+    def flush_log(self):
+        lines = []
+        try:
+            while True:
+                lines.append(self.log_buffer.popleft())
+        except IndexError:
+            pass
+        if not lines:
+            return
+
+        self.log_text.config(state=tk.NORMAL)
+        self.log_text.insert(tk.END, ''.join(lines))
+        line_count = int(self.log_text.index('end-1c').split('.')[0]) - 1
+        if line_count > LOG_VIEW_LINES:
+            self.log_text.delete('1.0', f'{line_count - LOG_VIEW_LINES + 1}.0')
+        self.log_text.see(tk.END)
+        self.log_text.config(state=tk.DISABLED)
+
+    def refresh_live_view(self):
+        view_type = self.view_type.get()
+        
+        self.ensure_live_canvas()
+
+        # Clear the current figure
+        self.fig.clf()
+        
+        if view_type == "Current Hour":
+            self.display_current_hour()
+        elif view_type == "Today's Summary":
+            self.display_daily_summary()
+        elif view_type == "Last Hour Chart":
+            self.display_last_hour_chart()
+        
+        self.canvas.draw()
+    
+    def toggle_auto_refresh(self):
+        if self.auto_refresh_var.get():
+            # Start auto refresh
+            self.refresh_live_view()
+            self.schedule_auto_refresh()
+        else:
+            # Cancel auto refresh if scheduled
+            if self.live_view_timer:
+                self.root.after_cancel(self.live_view_timer)
+                self.live_view_timer = None
+    
+    def schedule_auto_refresh(self):
+        # Cancel any existing timer
+        if self.live_view_timer:
+            self.root.after_cancel(self.live_view_timer)
+        
+        # Schedule next refresh in 30 seconds
+        self.live_view_timer = self.root.after(30000, self.auto_refresh_callback)
+    
+    def auto_refresh_callback(self):
+        self.refresh_live_view()
+        self.schedule_auto_refresh()
+    
+    def display_current_hour(self):
+        snapshot = self.tracker.snapshot()
+        current_time = snapshot['now']
+        hour_start = current_time.replace(minute=0, second=0, microsecond=0)
+        hour_end = hour_start + timedelta(hours=1)
+        
+        ax = self.fig.add_subplot(111)
+        ax.set_facecolor('#E60039')
+        self.fig.patch.set_facecolor('#E60039')
+        
+        ax.set_xlim(hour_start, hour_end)
+        
+        # Apply gradient background
+        background_cmap = LinearSegmentedColormap.from_list("background_cmap", list(zip([0, 1], ["#000000", "#333333"])))
+        apply_gradient(ax, [mdates.date2num(hour_start), mdates.date2num(hour_end), 0, 1], background_cmap)
+        
+        # Plot the hour's inactivity, including the open period. The tracker only holds the
+        # current bucket, so with buckets shorter than an hour the earlier ones come from
+        # their CSVs through the day aggregate.
+        total_inactive_time = timedelta()
+        for start, end in clip_periods(self.day_aggregate.periods(snapshot), hour_start, hour_end):
+            ax.axvspan(start, end, facecolor='white', edgecolor='black', hatch='///', alpha=0.5)
+            total_inactive_time += end - start
+        
+        # Set up time axis
+        ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=15))
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+        
+        # Add title
+        title = f'Current Hour ({hour_start.strftime("%H:00")}-{hour_end.strftime("%H:00")}) - {hour_start.strftime("%d %B %Y")}'
+        ax.set_title(title, color='#C0C0C0', fontsize=16, fontweight='bold', pad=20)
+        
+        ax.tick_params(axis='x', colors='white', labelsize=12)
+        ax.xaxis.set_visible(True)
+        ax.yaxis.set_visible(False)
+        
+        # Calculate metrics
+        total_inactive_minutes = total_inactive_time.total_seconds() / 60
+        elapsed_minutes = (min(current_time, hour_end) - hour_start).total_seconds() / 60
+        
+        if elapsed_minutes > 0:
+            total_inactive_percentage = (total_inactive_minutes / elapsed_minutes) * 100
+        else:
+            total_inactive_percentage = 0
+        
+        # Add metrics as text
+        self.fig.text(0.85, 0.8, f"{total_inactive_minutes:.2f}",
+                      fontsize=24, color='yellow', ha='left', va='center', fontweight='bold')
+        
+        self.fig.text(0.85, 0.3, f"{total_inactive_percentage:.2f}%",
+                      fontsize=24, color='silver', ha='left', va='center', fontweight='bold')
+        
+        # Add labels
+        self.fig.text(0.85, 0.9, "Minutes Inactive:",
+                      fontsize=12, color='white', ha='left', va='center')
+        
+        self.fig.text(0.85, 0.4, "Percentage Inactive:",
+                      fontsize=12, color='white', ha='left', va='center')
+        
+        # Save path for later use
+        self.current_chart_path = os.path.join(
+            self.tracker.hourly_charts_dir, 
+            hour_start.strftime('%d %B %Y'), 
+            f"{hour_start.strftime('%d %B %Y_%H')}.png"
+        )
+    
+    def display_daily_summary(self):
+        snapshot = self.tracker.snapshot()
+        current_time = snapshot['now']
+        day_start = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        day_end = day_start + timedelta(days=1)
+        
+        ax = self.fig.add_subplot(111)
+        ax.set_facecolor('#40E0D0')
+        self.fig.patch.set_facecolor('#40E0D0')
+        
+        ax.set_xlim(day_start, day_end)
+        
+        # Apply gradient background
+        background_cmap = LinearSegmentedColormap.from_list("background_cmap", list(zip([0, 1], ["#000000", "#333333"])))
+        apply_gradient(ax, [mdates.date2num(day_start), mdates.date2num(day_end), 0, 1], background_cmap)
+        
+        # All of the day's inactivity: earlier hours from the CSVs, then the live periods
+        # and the current one
+        total_inactive_time = timedelta()
+        for start, end in self.day_aggregate.periods(snapshot):
+            ax.axvspan(start, end, facecolor='white', edgecolor='black', hatch='///', alpha=0.5)
+            total_inactive_time += end - start
+        
+        # Set up time axis
+        ax.xaxis.set_major_locator(mdates.HourLocator(interval=1))
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%H'))
+        
+        # Add title
+        title = f"Today's Summary - {day_start.strftime('%d %B %Y')}"
+        ax.set_title(title, color='#000080', fontsize=16, fontweight='bold', pad=20)
+        
+        ax.tick_params(axis='x', colors='#000080', labelsize=12)
+        ax.xaxis.set_visible(True)
+        ax.yaxis.set_visible(False)
+        
+        # Calculate metrics
+        total_inactive_hours = total_inactive_time.total_seconds() / 3600
+        elapsed_hours = (min(current_time, day_end) - day_start).total_seconds() / 3600
+        
+        if elapsed_hours > 0:
+            total_inactive_percentage = (total_inactive_hours / elapsed_hours) * 100
+        else:
+            total_inactive_percentage = 0
+        
+        # Add metrics as text with conditional coloring
+        if total_inactive_hours <= 10:
+            inactive_hours_color = '#004D40'
+            inactive_pct_color = '#002171'
+        elif total_inactive_hours > 10 and total_inactive_hours < 15:
+            inactive_hours_color = '#B71C1C'
+            inactive_pct_color = '#4A148C'
+        else:
+            inactive_hours_color = '#1B5E20'
+            inactive_pct_color = '#BF360C'
+        
+        self.fig.text(0.85, 0.8, f"{total_inactive_hours:.2f}",
+                      fontsize=24, color=inactive_hours_color, ha='left', va='center', fontweight='bold')
+        
+        self.fig.text(0.83, 0.3, f"{total_inactive_percentage:.2f}%",
+                      fontsize=24, color=inactive_pct_color, ha='left', va='center', fontweight='bold')
+        
+        # Save path for later use
+        self.current_chart_path = os.path.join(
+            'daily_charts',
+            f"{day_start.strftime('%Y-%m-%d')}.png"
+        )
+    
+    # The previous, finished bucket (an hour by default), rendered through the chart cache at the canvas size
+    def display_last_hour_chart(self):
+        bucket_minutes = self.tracker.bucket_minutes
+        hour_start = bucket_floor(self.tracker.now(), bucket_minutes) - timedelta(minutes=bucket_minutes)
+        hour_end = hour_start + timedelta(minutes=bucket_minutes)
+        widget = self.canvas.get_tk_widget()
+        size = (max(widget.winfo_width(), 320), max(widget.winfo_height(), 180))
+        chart_path = self.tracker.hour_chart(hour_start, size)
+
+        ax = self.fig.add_axes([0, 0, 1, 1])
+        ax.set_axis_off()
+        if chart_path:
+            from matplotlib import image
+            ax.imshow(image.imread(chart_path))
+        else:
+            ax.text(0.5, 0.5, f"No inactivity recorded from {hour_start.strftime('%H:%M')} to "
+                    f"{hour_end.strftime('%H:%M')}",
+                    fontsize=14, ha='center', va='center', transform=ax.transAxes)
+
+        # Saved at full size under the name the rollover charts use
+        self.current_chart_hour = hour_start if chart_path else None
+        self.current_chart_path = os.path.join(
+            self.tracker.hourly_charts_dir,
+            hour_start.strftime('%d %B %Y'),
+            chart_file_name(hour_start, bucket_minutes)
+        ) if chart_path else None
+
+    def save_current_chart(self):
+        if not self.current_chart_path:
+            messagebox.showinfo("Save Chart", "No chart to save.")
+            return
+        
+        # Ensure the directory exists
+        os.makedirs(os.path.dirname(self.current_chart_path), exist_ok=True)
+        
+        # Save the figure, or the full-size chart of the hour shown
+        if self.view_type.get() == "Last Hour Chart" and self.current_chart_hour:
+            chart_path = self.tracker.hour_chart(self.current_chart_hour)
+            if not chart_path:
+                messagebox.showinfo("Save Chart", "No chart to save.")
+                return
+            shutil.copyfile(chart_path, self.current_chart_path)
+        else:
+            self.fig.savefig(self.current_chart_path)
+        messagebox.showinfo("Save Chart", f"Chart saved to: {self.current_chart_path}")
+    
+    def load_statistics(self):
+        try:
+            first_date = datetime.strptime(self.date_entry.get(), "%Y-%m-%d").date()
+            last_date = datetime.strptime(self.end_date_entry.get() or self.date_entry.get(), "%Y-%m-%d").date()
+        except ValueError:
+            messagebox.showerror("Error", "Invalid date format. Use YYYY-MM-DD")
+            return
+        if last_date < first_date:
+            first_date, last_date = last_date, first_date
+
+        started = time.perf_counter()
+        summaries = load_hourly_summaries(self.tracker.hourly_csv_dir, first_date, last_date,
+                                          bitmaps_dir=self.tracker.activity_bitmaps_dir,
+                                          events_dir=self.tracker.hourly_events_dir)
+
+        if self.granularity_var.get() == "Daily":
+            rows = daily_summary_rows(summaries)
+        else:
+            rows = []
+            for summary in summaries:
+                hour_start = summary['hour_start']
+                hour_end = hour_start + timedelta(minutes=summary['bucket_minutes'])
+                rows.append({'start': hour_start,
+                             'label': f"{hour_start:%Y-%m-%d %H:%M} - {hour_end:%H:%M}",
+                             'hours': summary['bucket_minutes'] / 60,
+                             'inactive_minutes': summary['inactive_minutes'],
+                             'inactive_percentage': summary['inactive_percentage'],
+                             'periods': summary['periods'],
+                             'active_seconds': summary['active_seconds'],
+                             'events': summary['events']})
+
+        self.stats_rows = rows
+        self.breakdown_table.set_rows(rows)
+        elapsed = time.perf_counter() - started
+        metrics.record('load_statistics', elapsed)
+        logging.info(f"Loaded statistics for {first_date} to {last_date}: {len(summaries)} hours "
+                     f"in {elapsed:.3f}s")
+
+    # Summarize the selected rows, or the whole range when nothing is selected
+    def on_breakdown_select(self, selected_rows):
+        rows = selected_rows or self.stats_rows
+        scope = f"{len(rows)} selected" if selected_rows else "Range"
+        self.summary_frame.config(text=f"Summary ({scope})")
+
+        if not rows:
+            self.total_inactive_label.config(text="Total Inactive Time: No data available")
+            self.total_active_label.config(text="Total Active Time: No data available")
+            self.inactive_percent_label.config(text="Inactive Percentage: No data available")
+            return
+
+        total_inactive_minutes = sum(row['inactive_minutes'] for row in rows)
+        total_hours = sum(row['hours'] for row in rows)
+        total_inactive_percentage = total_inactive_minutes / (total_hours * 60) * 100
+
+        self.total_inactive_label.config(text=f"Total Inactive Time: {total_inactive_minutes:.2f} minutes ({total_inactive_minutes/60:.2f} hours)")
+        self.total_active_label.config(text=f"Total Active Time: {(total_hours * 60 - total_inactive_minutes):.2f} minutes ({(total_hours - total_inactive_minutes/60):.2f} hours)")
+        self.inactive_percent_label.config(text=f"Inactive Percentage: {total_inactive_percentage:.2f}%")
+
+    def on_closing(self):
+        logging.info(f"UI refresh stats: {self.ui_scheduler.stats()}")
+        metrics.dump(METRICS_FILE, self.diagnostics_report())
+        profiler.stop()
+        remote = isinstance(self.tracker, RemoteTracker)
+        if remote and self.tracker.client_count > 1:
+            # Other clients (the widget) keep tracking; just detach
+            self.tracker.detach()
+            self.root.destroy()
+        elif self.tracker.is_running:
+            if messagebox.askyesno("Quit", "Tracking is still running. Do you want to stop tracking and quit?"):
+                self.stop_tracking()
+                if remote:
+                    self.tracker.detach()
+                self.root.destroy()
+        else:
+            if remote:
+                self.tracker.detach()
+            self.root.destroy()
+
+
+# Event totals of a statistics row in the column's order (EVENT_TYPES is move, click, scroll, key)
+def format_event_counts(row):
+    if row['events'] is None:
+        return "-"
+    moves, clicks, scrolls, keys = row['events']
+    return f"{keys} / {clicks} / {scrolls} / {moves}"
+
+
+# Import the matplotlib stack (including the TkAgg canvas) on first use
+def load_plotting_stack():
+    global mdates, LinearSegmentedColormap, FontProperties, FigureCanvasTkAgg, mplfig
+    with _heavy_import_lock:
+        if mplfig is None:
+            import matplotlib.dates
+            from matplotlib.colors import LinearSegmentedColormap as cmap_class
+            from matplotlib.font_manager import FontProperties as font_class
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg as canvas_class
+            import matplotlib.figure
+
+            mdates = matplotlib.dates
+            LinearSegmentedColormap = cmap_class
+            FontProperties = font_class
+            FigureCanvasTkAgg = canvas_class
+            mplfig = matplotlib.figure
+
+
+# Warm the matplotlib font cache in the background once the window is shown,
+# so the first chart does not pay for the font scan
+def warm_font_cache():
+    def warm():
+        started = time.perf_counter()
+        try:
+            load_plotting_stack()
+            from matplotlib import font_manager
+            font_manager.findfont(FontProperties(size=18))
+            logging.info(f"Font cache warmed in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            logging.error(f"Error warming font cache: {str(e)}")
+
+    threading.Thread(target=warm, daemon=True).start()
+
+
+# Modules that must not be imported before the window is shown
+HEAVY_MODULES = ('matplotlib', 'pandas', 'numpy', 'pygame')
+
+
+# Measure the cold-start import cost in a fresh interpreter using -X importtime
+def startup_report(top=15, as_json=False):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import InactivityTracker'],
+                            cwd=script_dir, capture_output=True, text=True)
+    wall_seconds = time.perf_counter() - started
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, raw_name = line[len('import time:'):].split('|')
+        name = raw_name.strip()
+        modules.append({
+            'name': name,
+            'depth': (len(raw_name) - len(raw_name.lstrip()) - 1) // 2,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+        })
+
+    app_module = next((m for m in modules if m['name'] == 'InactivityTracker'), None)
+    heavy_loaded = sorted({m['name'].split('.')[0] for m in modules} & set(HEAVY_MODULES))
+    report = {
+        'python': sys.version.split()[0],
+        'ok': result.returncode == 0,
+        'wall_seconds': round(wall_seconds, 4),
+        'import_seconds': round(app_module['cumulative_us'] / 1e6, 4) if app_module else None,
+        'module_count': len(modules),
+        'heavy_modules_loaded': heavy_loaded,
+        'top_imports': sorted(modules, key=lambda m: m['self_us'], reverse=True)[:top],
+    }
+    if result.returncode != 0:
+        report['error'] = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unknown error'
+
+    if as_json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Python {report['python']} - {report['module_count']} modules imported")
+        print(f"Interpreter + import wall time: {report['wall_seconds']:.3f}s")
+        if report['import_seconds'] is not None:
+            print(f"InactivityTracker import time: {report['import_seconds']:.3f}s")
+        print(f"Heavy modules loaded at startup: {', '.join(heavy_loaded) if heavy_loaded else 'none'}")
+        print(f"Top {top} imports by self time:")
+        for module in report['top_imports']:
+            print(f"  {module['self_us'] / 1000:9.2f} ms  {module['cumulative_us'] / 1000:9.2f} ms  {module['name']}")
+        if not report['ok']:
+            print(f"Import failed: {report['error']}")
+
+    return 0 if report['ok'] else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inactivity Tracker")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="report cold-start import time instead of starting the GUI")
+    parser.add_argument('--json', action='store_true', help="print the startup report as JSON")
+    parser.add_argument('--top', type=int, default=15, help="number of imports listed in the startup report")
+    parser.add_argument('--standalone', action='store_true',
+                        help="track in this process instead of attaching to the shared tracker daemon")
+    args = parser.parse_args()
+
+    if args.startup_report:
+        sys.exit(startup_report(args.top, args.json))
+
+    # Profiling reports go next to the GUI log
+    profiler.output_dir = os.path.dirname(os.path.abspath(GUI_LOG_FILE))
+    profiler.label = 'gui'
+
+    # Create the main window
+    root = tk.Tk()
+    app = InactivityTrackerApp(root, standalone=args.standalone)
+    
+    # Set a custom icon (if available)
+    try:
+        root.iconbitmap("app_icon.ico")
+    except:
+        pass  # Use default icon if custom one is not available
+
+    # Warm the font cache once the window is up
+    root.after(1000, warm_font_cache)
+    
+    # Start the main loop
+    root.mainloop()
+
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""Offline analysis of the tracker's raw input-gap stream and activity bitmaps. Requires numpy.
+
+Inactivity at a threshold T is every gap between two inputs lasting at least T, so
+with the gaps sorted longest first, the periods for any threshold are a prefix of the
+same array and one pass answers many thresholds at once. The per-day bitmaps are
+mapped read-only and answer the same questions with bit operations.
+"""
+import os
+import logging
+from datetime import datetime, timedelta
+import numpy as np
+from TrackerCore import (GAP_RECORD_MIN, BITMAP_ACTIVE_BYTES, BITMAP_SIZE, read_activity_gaps, activity_gaps_path,
+                         activity_bitmap_path, clip_periods, bucket_csv_path, generate_csv_log, render_hour_chart,
+                         scan_bucket_csvs, BUCKET_MINUTES)
+
+
+# Inactive seconds and period counts for each threshold over [range_start, range_end),
+# split into buckets of bucket_seconds (one bucket covering the whole range by default).
+# Returns arrays of shape (buckets, thresholds).
+def sweep_thresholds(gaps, thresholds, range_start, range_end, bucket_seconds=None):
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    if (thresholds < GAP_RECORD_MIN).any():
+        raise ValueError(f"Thresholds below {GAP_RECORD_MIN}s cannot be derived from the recorded gaps")
+
+    span = (range_end - range_start).total_seconds()
+    bucket_seconds = bucket_seconds or span
+    edges = np.append(np.arange(0, span, bucket_seconds), span)
+    bucket_starts, bucket_ends = edges[:-1], edges[1:]
+
+    starts = np.array([(start - range_start).total_seconds() for start, _ in gaps], dtype=np.float64)
+    ends = np.array([(end - range_start).total_seconds() for _, end in gaps], dtype=np.float64)
+
+    # Longest gaps first, so "at least T" is a prefix whose length is found by binary search
+    order = np.argsort(starts - ends, kind='stable')
+    starts, ends = starts[order], ends[order]
+    durations = ends - starts
+
+    overlap = np.minimum(ends[:, None], bucket_ends) - np.maximum(starts[:, None], bucket_starts)
+    overlap = np.clip(overlap, 0, None)
+    zero_row = np.zeros((1, len(bucket_starts)))
+    cumulative_seconds = np.vstack([zero_row, np.cumsum(overlap, axis=0)])
+    cumulative_periods = np.vstack([zero_row, np.cumsum(overlap > 0, axis=0)])
+
+    prefix = np.searchsorted(-durations, -thresholds, side='right')
+    return {
+        'thresholds': thresholds,
+        'bucket_starts': [range_start + timedelta(seconds=float(offset)) for offset in bucket_starts],
+        'inactive_seconds': cumulative_seconds[prefix].T,
+        'periods': cumulative_periods[prefix].T.astype(np.int64),
+    }
+
+
+# Sweep one day from the gap files, hour by hour when hourly is set
+def sweep_day(gaps_dir, day, thresholds, hourly=False):
+    day_start = datetime.combine(day, datetime.min.time())
+    gaps = read_activity_gaps(gaps_dir, day, day)
+    return sweep_thresholds(gaps, thresholds, day_start, day_start + timedelta(days=1),
+                            bucket_seconds=3600 if hourly else None)
+
+
+# Rewrite the bucket CSVs (and optionally charts) of the given days as if threshold had
+# been in effect. Only days with a gap file are touched; a bucket is written when it
+# already had a CSV or has inactivity at the new threshold. Buckets keep the size of the
+# day's existing CSVs; bucket_minutes sets it for days without any (default hourly) and
+# must match the days that have some. A day with CSVs of another size, or of several,
+# raises ValueError before anything is written. Returns the CSVs written.
+def regenerate_hourly_csvs(gaps_dir, csv_dir, first_date, last_date, threshold, charts_dir=None,
+                           bucket_minutes=None):
+    if threshold < GAP_RECORD_MIN:
+        raise ValueError(f"Thresholds below {GAP_RECORD_MIN}s cannot be derived from the recorded gaps")
+
+    day_sizes = {}
+    for day, buckets in scan_bucket_csvs(csv_dir, first_date, last_date).items():
+        sizes = sorted({minutes for _, minutes, _ in buckets})
+        if len(sizes) > 1 or (bucket_minutes and sizes != [bucket_minutes]):
+            raise ValueError(f"{day} has {', '.join(str(size) for size in sizes)}-minute CSVs; regenerating it "
+                             f"as {bucket_minutes or sizes[0]}-minute buckets would count time twice")
+        day_sizes[day] = sizes[0]
+
+    os.makedirs(csv_dir, exist_ok=True)
+    written = []
+    day = first_date
+    while day <= last_date:
+        if not os.path.exists(activity_gaps_path(gaps_dir, day)):
+            logging.info(f"No activity gaps recorded for {day}, skipped")
+            day += timedelta(days=1)
+            continue
+
+        periods = [(start, end) for start, end in read_activity_gaps(gaps_dir, day, day)
+                   if (end - start).total_seconds() >= threshold]
+        day_start = datetime.combine(day, datetime.min.time())
+        minutes = day_sizes.get(day, bucket_minutes or BUCKET_MINUTES)
+        for index in range(1440 // minutes):
+            hour_start = day_start + timedelta(minutes=index * minutes)
+            hour_end = hour_start + timedelta(minutes=minutes)
+            file_name = bucket_csv_path(csv_dir, hour_start, minutes)
+            hour_periods = clip_periods(periods, hour_start, hour_end)
+            if not hour_periods and not os.path.exists(file_name):
+                continue
+            generate_csv_log(hour_periods, file_name)
+            written.append(file_name)
+            if charts_dir:
+                render_hour_chart(file_name, hour_end, charts_dir, bucket_minutes=minutes)
+        day += timedelta(days=1)
+    return written
+
+
+# Zero-copy view of a day's activity bitmap, or an all-zero array when the day has none
+def load_bitmap(bitmaps_dir, day):
+    file_name = activity_bitmap_path(bitmaps_dir, day)
+    if os.path.exists(file_name) and os.path.getsize(file_name) >= BITMAP_SIZE:
+        return np.memmap(file_name, dtype=np.uint8, mode='r', shape=(BITMAP_SIZE,))
+    return np.zeros(BITMAP_SIZE, dtype=np.uint8)
+
+
+# One bool per second of the day: was there input in that second
+def active_seconds(bitmap):
+    return np.unpackbits(bitmap[:BITMAP_ACTIVE_BYTES]).astype(bool)
+
+
+# One bool per second of the day: was tracking running (recorded per minute)
+def tracked_seconds(bitmap):
+    return np.repeat(np.unpackbits(bitmap[BITMAP_ACTIVE_BYTES:]).astype(bool), 60)
+
+
+# Inactive seconds of a day at any threshold: runs of tracked seconds without input
+# lasting at least threshold seconds
+def bitmap_inactivity(bitmap, threshold):
+    quiet = tracked_seconds(bitmap) & ~active_seconds(bitmap)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], quiet.view(np.int8), [0]))))
+    starts, ends = edges[::2], edges[1::2]
+    long_runs = (ends - starts) >= threshold
+
+    marks = np.zeros(quiet.size + 1, dtype=np.int32)
+    np.add.at(marks, starts[long_runs], 1)
+    np.add.at(marks, ends[long_runs], -1)
+    return np.cumsum(marks[:-1]) > 0
+
+
+# Per-hour totals of a per-second mask
+def hourly_seconds(mask):
+    return mask.reshape(24, 3600).sum(axis=1)
+
+
+# Union ('or') or intersection ('and') of several days' bitmaps, on the packed bytes
+def combine_bitmaps(bitmaps, how='or'):
+    operator = {'or': np.bitwise_or, 'and': np.bitwise_and}[how]
+    return operator.reduce(np.stack(bitmaps), axis=0)
+
+
+# Share of seconds with input per day and slot of slot_minutes, shape (days, slots)
+def activity_heatmap(bitmaps_dir, first_date, last_date, slot_minutes=60):
+    rows = []
+    day = first_date
+    while day <= last_date:
+        active = active_seconds(load_bitmap(bitmaps_dir, day))
+        rows.append(active.reshape(-1, slot_minutes * 60).mean(axis=1))
+        day += timedelta(days=1)
+    return np.array(rows)
@@ -0,0 +1,311 @@
+"""Headless benchmarks of the tracker's hot paths. Does not import tkinter.
+
+Usage: python TrackerBenchmark.py [--sizes 10,100,1000,10000,100000] [--repeat 5] [--budget 10]
+                                  [--only NAME[,NAME...]] [--output results.json] [--compare baseline.json]
+
+Every case runs on a synthetic history of each size (number of inactivity periods),
+generated from a fixed seed in a temporary directory, so runs on the same machine are
+comparable. Results are printed (or written with --output) as JSON; --compare prints
+the ratio of each case's median to the same case in an earlier result file.
+
+Cases:
+  ingest      update_activity_time, per input event
+  rollover    an hour boundary in the tracking loop (process_boundaries: CSV, event counts, gaps)
+  csv_log     generate_csv_log of one hour
+  chart       generate_hourly_bar_chart at its 200 dpi size
+  load_stats  load_hourly_summaries over 90 days, as the Statistics tab does (cold and cached)
+  ui_totals   the totals update_ui computes from a snapshot each tick
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timedelta
+import TrackerCore
+from TrackerCore import (ActivityTracker, EVENT_MOVE, elapsed_clock, hour_floor, hourly_csv_path, generate_csv_log,
+                         load_hourly_summaries, session_inactive_seconds, current_hour_inactive_seconds,
+                         rolling_inactivity)
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+HISTORY_START = datetime(2024, 5, 1)  # fixed so every run builds the same files
+HISTORY_DAYS = 90  # range of the Statistics load
+INGEST_EVENTS = 20000  # input events per ingest measurement
+UI_TICKS = 100  # update_ui computations per ui_totals measurement
+SEED = 20240501
+
+# Trackers made by prepared_tracker; their bitmaps are closed before the directory is removed
+open_trackers = []
+
+
+# count disjoint periods in [range_start, range_end), with random lengths and spacing
+def synthetic_periods(count, range_start, range_end, seed=SEED):
+    rng = random.Random(seed + count)
+    slot = (range_end - range_start).total_seconds() / count
+    periods = []
+    for index in range(count):
+        slot_start = range_start + timedelta(seconds=index * slot)
+        offset = rng.uniform(0, slot * 0.3)
+        length = rng.uniform(slot * 0.2, slot * 0.6)
+        periods.append((slot_start + timedelta(seconds=offset), slot_start + timedelta(seconds=offset + length)))
+    return periods
+
+
+# A tracker in the state start() leaves it in, without input listeners or threads,
+# holding periods as its session history
+def prepared_tracker(directory, periods, now):
+    tracker = ActivityTracker(hourly_csv_dir=os.path.join(directory, 'hourly_csv'),
+                              hourly_charts_dir=os.path.join(directory, 'hourly_charts'),
+                              status_file=None, generate_charts=False,
+                              activity_gaps_dir=os.path.join(directory, 'activity_gaps'),
+                              activity_bitmaps_dir=os.path.join(directory, 'activity_bitmaps'),
+                              hourly_events_dir=os.path.join(directory, 'hourly_events'))
+    tracker.time_offset = now - datetime.now()
+    tracker.is_running = True
+    tracker.session_start = datetime.now()
+    tracker.last_activity_time = tracker.now()
+    tracker.last_activity_elapsed = elapsed_clock()
+    tracker.hourly_totals.reset(now.date())
+    for window in tracker.rolling_windows:
+        window.reset(now)
+    tracker.next_boundary = hour_floor(now) + timedelta(hours=1)
+    tracker.timeline.reset(now)
+    for start, end in periods:
+        tracker.log_inactivity(start, end)
+    open_trackers.append(tracker)
+    return tracker
+
+
+def bench_ingest(directory, size):
+    hour_start = HISTORY_START
+    tracker = prepared_tracker(directory, synthetic_periods(size, hour_start - timedelta(hours=8), hour_start),
+                               hour_start + timedelta(minutes=30))
+
+    def run():
+        update = tracker.update_activity_time
+        for _ in range(INGEST_EVENTS):
+            update(EVENT_MOVE)
+    return None, run, INGEST_EVENTS
+
+
+def bench_rollover(directory, size):
+    hour_start = HISTORY_START
+    hour_end = hour_start + timedelta(hours=1)
+    periods = synthetic_periods(size, hour_start, hour_end)
+    state = {}
+
+    def setup():
+        for name in ('hourly_csv', 'hourly_events'):
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+        state['tracker'] = prepared_tracker(directory, periods, hour_start + timedelta(minutes=59))
+
+    def run():
+        state['tracker'].process_boundaries(hour_end, delayed=False)
+    return setup, run, 1
+
+
+def bench_csv_log(directory, size):
+    periods = synthetic_periods(size, HISTORY_START, HISTORY_START + timedelta(hours=1))
+    file_name = os.path.join(directory, 'csv_log.csv')
+    return None, lambda: generate_csv_log(periods, file_name), 1
+
+
+def bench_chart(directory, size):
+    import TrackerCharts
+
+    hour_start = HISTORY_START
+    file_name = hourly_csv_path(directory, hour_start)
+    generate_csv_log(synthetic_periods(size, hour_start, hour_start + timedelta(hours=1)), file_name)
+    TrackerCharts.load_plotting_stack()
+
+    def run():
+        TrackerCharts.generate_hourly_bar_chart(file_name, '0 to 1 ----- 01 May 2024', 1,
+                                                hour_start + timedelta(hours=1),
+                                                charts_dir=os.path.join(directory, 'hourly_charts'))
+    return None, run, 1
+
+
+# size periods spread over HISTORY_DAYS of hourly CSVs
+def write_history(csv_dir, size):
+    hours = HISTORY_DAYS * 24
+    periods = synthetic_periods(size, HISTORY_START, HISTORY_START + timedelta(hours=hours))
+    by_hour = {}
+    for start, end in periods:
+        by_hour.setdefault(hour_floor(start), []).append((start, end))
+    for hour in range(hours):
+        hour_start = HISTORY_START + timedelta(hours=hour)
+        generate_csv_log(TrackerCore.clip_periods(by_hour.get(hour_start, []), hour_start,
+                                                  hour_start + timedelta(hours=1)),
+                         hourly_csv_path(csv_dir, hour_start))
+
+
+def bench_load_stats(directory, size, cached=False):
+    csv_dir = os.path.join(directory, 'hourly_csv')
+    os.makedirs(csv_dir, exist_ok=True)
+    write_history(csv_dir, size)
+    last_date = (HISTORY_START + timedelta(days=HISTORY_DAYS - 1)).date()
+
+    def setup():
+        if not cached:
+            TrackerCore._csv_summary_cache.clear()
+
+    def run():
+        load_hourly_summaries(csv_dir, HISTORY_START.date(), last_date)
+
+    if cached:
+        run()
+    return setup, run, 1
+
+
+def bench_ui_totals(directory, size):
+    now = HISTORY_START + timedelta(minutes=30)
+    tracker = prepared_tracker(directory, synthetic_periods(size, now - timedelta(hours=8), now), now)
+
+    def run():
+        for _ in range(UI_TICKS):
+            snapshot = tracker.snapshot()
+            session_inactive_seconds(snapshot)
+            current_hour_inactive_seconds(snapshot)
+            rolling_inactivity(snapshot)
+    return None, run, UI_TICKS
+
+
+# name -> factory(directory, size) returning (setup or None, run, operations per run)
+BENCHMARKS = {
+    'ingest': bench_ingest,
+    'rollover': bench_rollover,
+    'csv_log': bench_csv_log,
+    'chart': bench_chart,
+    'load_stats_cold': bench_load_stats,
+    'load_stats_cached': lambda directory, size: bench_load_stats(directory, size, cached=True),
+    'ui_totals': bench_ui_totals,
+}
+
+
+# Time one case: up to repeat runs, fewer once budget seconds have been spent
+def measure(factory, size, repeat, budget):
+    with tempfile.TemporaryDirectory(prefix='tracker_bench_') as directory:
+        try:
+            setup, run, operations = factory(directory, size)
+            timings = []
+            spent = 0.0
+            while len(timings) < repeat and (not timings or spent < budget):
+                if setup:
+                    setup()
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+                timings.append(elapsed)
+                spent += elapsed
+        finally:
+            while open_trackers:
+                bitmap = open_trackers.pop().activity_bitmap
+                if bitmap:
+                    bitmap.close()
+    median = statistics.median(timings)
+    return {
+        'runs': len(timings),
+        'operations': operations,
+        'min_s': round(min(timings), 6),
+        'median_s': round(median, 6),
+        'mean_s': round(statistics.fmean(timings), 6),
+        'max_s': round(max(timings), 6),
+        'per_op_us': round(median / operations * 1e6, 3),
+    }
+
+
+def git_revision():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmarks(names, sizes, repeat, budget):
+    results = []
+    for name in names:
+        for size in sizes:
+            result = {'name': name, 'size': size}
+            try:
+                result.update(measure(BENCHMARKS[name], size, repeat, budget))
+            except Exception as e:
+                logging.error(f"Benchmark {name} at {size} periods failed: {str(e)}")
+                result['error'] = str(e)
+            print(f"{name:<18} {size:>7} periods  " + (f"{result['median_s'] * 1000:10.3f} ms median "
+                  f"({result['per_op_us']:.3f} us/op, {result['runs']} runs)" if 'error' not in result
+                  else f"failed: {result['error']}"), file=sys.stderr)
+            results.append(result)
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': sys.version.split()[0],
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'sizes': list(sizes),
+            'repeat': repeat,
+            'seed': SEED,
+        },
+        'results': results,
+    }
+
+
+# Print each case's median against the same case in a baseline result file
+def compare(report, baseline_file):
+    with open(baseline_file) as f:
+        baseline = {(row['name'], row['size']): row for row in json.load(f)['results'] if 'error' not in row}
+    print(f"{'Case':<18} {'Size':>7} {'Baseline':>11} {'Now':>11} {'Ratio':>7}")
+    for row in report['results']:
+        before = baseline.get((row['name'], row['size']))
+        if 'error' in row or not before:
+            continue
+        ratio = row['median_s'] / before['median_s'] if before['median_s'] else float('inf')
+        print(f"{row['name']:<18} {row['size']:>7} {before['median_s'] * 1000:9.3f}ms "
+              f"{row['median_s'] * 1000:9.3f}ms {ratio:6.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless benchmarks of the tracker's hot paths")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="comma-separated history sizes in periods (default: 10,100,1000,10000,100000)")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per case (default: 5)")
+    parser.add_argument('--budget', type=float, default=10,
+                        help="seconds after which a case stops repeating (default: 10)")
+    parser.add_argument('--only', help=f"comma-separated cases to run ({', '.join(BENCHMARKS)})")
+    parser.add_argument('--output', help="write the JSON report to this file instead of standard output")
+    parser.add_argument('--compare', help="JSON report of an earlier run to compare with")
+    args = parser.parse_args(argv)
+
+    # The engine logs every period and rollover; keep that out of the measurements
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+
+    report = run_benchmarks(names, sizes, args.repeat, args.budget)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        compare(report, args.compare)
+    return 0 if all('error' not in row for row in report['results']) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Content-addressed cache of rendered hourly charts.
+
+A chart is stored under the SHA-256 of everything it is drawn from: the bucket's CSV and
+event-count bytes, the bucket, the pixel size and TrackerCharts.CHART_RENDERER_VERSION.
+Changing any of them, e.g. a threshold regeneration rewriting the CSV, gives a new key,
+so entries never need invalidating. Every hit refreshes the file's mtime, and once the
+directory grows past its disk budget the least recently used charts are deleted.
+
+In lazy mode (ActivityTracker(lazy_charts=True), TrackerDaemon.py --lazy-charts) nothing
+is rendered at rollover; the live view, the GUI's Save Chart and `TrackerTools.py chart`
+render through this cache at the size they need.
+"""
+import os
+import hashlib
+import threading
+import logging
+from datetime import timedelta
+from TrackerCore import bucket_csv_path, render_hour_chart, CHART_CACHE_MB, BUCKET_MINUTES
+from TrackerCharts import CHART_SIZE, CHART_RENDERER_VERSION
+
+CACHE_DIR = 'chart_cache'
+READ_CHUNK = 1 << 20
+
+
+# Parse "WIDTHxHEIGHT" into a pixel size
+def parse_size(text):
+    width, height = text.lower().split('x')
+    width, height = int(width), int(height)
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Invalid chart size: {text}")
+    return width, height
+
+
+class ChartCache:
+    """Rendered chart PNGs keyed by their inputs, bounded by budget_bytes on disk."""
+
+    def __init__(self, cache_dir=CACHE_DIR, budget_bytes=CHART_CACHE_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.budget_bytes = budget_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = None  # size of the cache directory, counted on first use
+        self._lock = threading.Lock()
+
+    # Key of the chart of the bucket starting at hour_start, or None when the CSV is missing
+    def key(self, csv_file, hour_start, events_file=None, size=CHART_SIZE, bucket_minutes=BUCKET_MINUTES):
+        # Hourly keys are unchanged, so charts cached before bucket sizes existed stay valid
+        if bucket_minutes == 60:
+            bucket = f"{hour_start:%Y-%m-%d %H}"
+        else:
+            bucket = f"{hour_start:%Y-%m-%d %H:%M}+{bucket_minutes}m"
+        digest = hashlib.sha256(f"{CHART_RENDERER_VERSION}|{size[0]}x{size[1]}|{bucket}|".encode())
+        try:
+            with open(csv_file, 'rb') as f:
+                for chunk in iter(lambda: f.read(READ_CHUNK), b''):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            return None
+        digest.update(b'\0')
+        if events_file:
+            try:
+                with open(events_file, 'rb') as f:
+                    digest.update(f.read())
+            except FileNotFoundError:
+                pass
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    # Path of the chart of one bucket (an hour by default) at size (default CHART_SIZE),
+    # rendered on a miss. None when the bucket has no CSV or no inactivity to draw.
+    def hour_chart(self, csv_dir, hour_start, events_dir=None, size=None, bucket_minutes=BUCKET_MINUTES):
+        size = tuple(size or CHART_SIZE)
+        csv_file = bucket_csv_path(csv_dir, hour_start, bucket_minutes)
+        events_file = bucket_csv_path(events_dir, hour_start, bucket_minutes) if events_dir else None
+        key = self.key(csv_file, hour_start, events_file, size, bucket_minutes)
+        if key is None:
+            return None
+        chart_path = self.path(key)
+
+        with self._lock:
+            try:
+                os.utime(chart_path)
+                self.hits += 1
+                return chart_path
+            except FileNotFoundError:
+                pass
+
+            self.misses += 1
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{chart_path}.{os.getpid()}.tmp"
+            written = render_hour_chart(csv_file, hour_start + timedelta(minutes=bucket_minutes), self.cache_dir,
+                                        events_dir=events_dir, save_path=temp_path, size=size,
+                                        bucket_minutes=bucket_minutes)
+            if written is None:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                return None
+            os.replace(temp_path, chart_path)
+            self._add_bytes(os.path.getsize(chart_path))
+        return chart_path
+
+    def _add_bytes(self, size):
+        if self._bytes is None:
+            self._bytes = self.usage()[1]
+        else:
+            self._bytes += size
+        if self._bytes > self.budget_bytes:
+            self.evict()
+
+    # (files, bytes) currently in the cache directory
+    def usage(self):
+        files = total = 0
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.png') and entry.is_file():
+                        files += 1
+                        total += entry.stat().st_size
+        except FileNotFoundError:
+            pass
+        return files, total
+
+    # Delete the least recently used charts until the cache fits its budget
+    def evict(self):
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as scan:
+                for entry in scan:
+                    if entry.name.endswith('.png') and entry.is_file():
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        except FileNotFoundError:
+            return
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.budget_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass  # evicted by another process sharing the directory
+            except OSError as e:
+                logging.error(f"Error evicting cached chart {path}: {str(e)}")
+                continue
+            total -= size
+        self._bytes = total
+        if removed:
+            logging.info(f"Chart cache: evicted {removed} charts, {total / 1048576:.1f} MB kept")
@@ -0,0 +1,225 @@
+"""Chart rendering for the tracker. matplotlib and numpy are imported on first use."""
+import os
+import time
+import threading
+import logging
+from datetime import timedelta
+from TrackerCore import read_periods_csv, read_event_counts, EVENT_TYPES
+from TrackerMetrics import metrics
+
+# Heavy modules, imported on first use by load_plotting_stack()
+np = None
+mdates = None
+Figure = None
+FigureCanvasAgg = None
+LinearSegmentedColormap = None
+FontProperties = None
+_plotting_lock = threading.Lock()
+
+CHART_SIZE = (3840, 2160)  # pixels of the hourly charts written at rollover
+CHART_WIDTH_INCHES = 19.2  # fonts are sized for this width; other sizes scale the dpi
+# Bump whenever the drawing changes, so content-addressed cached charts are re-rendered
+CHART_RENDERER_VERSION = 1
+TICK_STEPS = (1, 2, 5, 10, 15, 30, 60, 120, 180, 360)  # minutes between x axis ticks, by bucket length
+
+
+# Import numpy and the matplotlib object API on first use. pyplot is never
+# imported here so rendering does not pull in a GUI backend.
+def load_plotting_stack():
+    global np, mdates, Figure, FigureCanvasAgg, LinearSegmentedColormap, FontProperties
+    with _plotting_lock:
+        if Figure is None:
+            import numpy
+            import matplotlib.dates
+            from matplotlib.colors import LinearSegmentedColormap as cmap_class
+            from matplotlib.font_manager import FontProperties as font_class
+            from matplotlib.backends.backend_agg import FigureCanvasAgg as canvas_class
+            from matplotlib.figure import Figure as figure_class
+
+            np = numpy
+            mdates = matplotlib.dates
+            LinearSegmentedColormap = cmap_class
+            FontProperties = font_class
+            FigureCanvasAgg = canvas_class
+            Figure = figure_class
+
+
+# File name of a bucket's chart in its date directory: "01 May 2024_13.png" for hourly
+# buckets, "01 May 2024.png" for days, "01 May 2024_1315_15m.png" for other lengths
+def chart_file_name(bucket_start, bucket_minutes=60):
+    if bucket_minutes == 60:
+        return f"{bucket_start.strftime('%d %B %Y_')}{bucket_start.hour}.png"
+    if bucket_minutes == 1440:
+        return f"{bucket_start.strftime('%d %B %Y')}.png"
+    return f"{bucket_start.strftime('%d %B %Y_%H%M')}_{bucket_minutes}m.png"
+
+
+def apply_gradient(ax, extent, cmap, alpha=1):
+    """Apply a gradient background to a plot."""
+    load_plotting_stack()
+    gradient = np.linspace(0, 1, 256)
+    gradient = np.vstack((gradient, gradient))
+    ax.imshow(gradient, aspect='auto', cmap=cmap, extent=extent, alpha=alpha, origin='lower', zorder=-10)
+
+
+# Colours of the input intensity overlay, in EVENT_TYPES order
+EVENT_COLORS = ('#4FC3F7', '#FFD54F', '#BA68C8', '#81C784')
+
+
+# Draw the per-minute input events of the hour as stacked steps on a second y axis
+def plot_event_overlay(ax, events_file, trajan_font):
+    rows = read_event_counts(events_file)
+    if not rows or not any(sum(counts) for _, counts in rows):
+        return
+
+    minutes = [minute for minute, _ in rows]
+    edges = minutes + [minutes[-1] + timedelta(minutes=1)]
+    overlay = ax.twinx()
+    baseline = np.zeros(len(rows))
+    for kind, (event_type, color) in enumerate(zip(EVENT_TYPES, EVENT_COLORS)):
+        counts = np.array([row_counts[kind] for _, row_counts in rows], dtype=float)
+        overlay.stairs(baseline + counts, edges, baseline=baseline, fill=True, color=color, alpha=0.35,
+                       label=event_type.capitalize())
+        baseline += counts
+
+    overlay.set_ylim(0, max(baseline.max(), 1) * 1.1)
+    overlay.tick_params(axis='y', colors='white', labelsize=14)
+    overlay.set_ylabel("Events per minute", color='white', fontproperties=trajan_font, fontsize=16)
+    legend = overlay.legend(loc='upper left', fontsize=12, facecolor='#333333', edgecolor='#555555')
+    for text in legend.get_texts():
+        text.set_color('white')
+
+
+# Function to generate bar chart for the periods of one bucket (an hour by default) ending
+# at exact_end_time. With events_file, the bucket's input events per minute are drawn over
+# the inactivity bars. The chart goes to charts_dir/<date>/ unless save_path is given;
+# size is (width, height) in pixels. Returns the path written, or None when there was nothing to draw.
+def generate_hourly_bar_chart(file_name, title, hour_display, exact_end_time, charts_dir='hourly_charts',
+                              events_file=None, save_path=None, size=CHART_SIZE, bucket_minutes=60):
+    started = time.perf_counter()
+    try:
+        load_plotting_stack()
+
+        # Check if font file exists, otherwise use default
+        font_path = 'fonts/TrajanPro-Regular.ttf'
+        if os.path.exists(font_path):
+            trajan_font = FontProperties(fname=font_path, size=18)
+        else:
+            trajan_font = FontProperties(size=18)  # Use default font if custom font not found
+
+        # Calculate exact bucket boundaries based on the exact end time
+        hour_end = exact_end_time
+        hour_start = hour_end - timedelta(minutes=bucket_minutes)
+
+        logging.info(f"Generating hourly bar chart for period: {hour_start} to {hour_end}. File: {file_name}")
+
+        # Check if file exists
+        if not os.path.exists(file_name):
+            logging.warning(f"CSV file not found: {file_name}")
+            return None
+
+        periods = read_periods_csv(file_name)
+        if not periods:
+            logging.info(f"No inactivity data for hour {hour_display}")
+            return None
+
+        width, height = size
+        dpi = width / CHART_WIDTH_INCHES
+        fig = Figure(figsize=(CHART_WIDTH_INCHES, height / dpi), dpi=dpi)
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        ax.set_facecolor('#E60039')
+        fig.patch.set_facecolor('#E60039')
+
+        ax.set_xlim(hour_start, hour_end)
+        apply_gradient(ax, [mdates.date2num(hour_start), mdates.date2num(hour_end), 0, 1],
+                      LinearSegmentedColormap.from_list("background_cmap", list(zip([0, 1], ["#000000", "#333333"]))))
+
+        total_inactive_time = timedelta()
+        for start, end in periods:
+            adjusted_start = max(start, hour_start)
+            adjusted_end = min(end, hour_end)
+
+            if adjusted_start < adjusted_end:
+                ax.axvspan(adjusted_start, adjusted_end, facecolor='white', edgecolor='black', hatch='///', alpha=0.5)
+                total_inactive_time += adjusted_end - adjusted_start
+
+        if events_file and os.path.exists(events_file):
+            plot_event_overlay(ax, events_file, trajan_font)
+
+        # Four or more ticks per bucket: every 15 minutes for an hour, every 6 hours for a day
+        step = max([step for step in TICK_STEPS if step * 4 <= bucket_minutes] or [1])
+        if step < 60:
+            ax.xaxis.set_major_locator(mdates.MinuteLocator(byminute=range(0, 60, step)))
+        else:
+            ax.xaxis.set_major_locator(mdates.HourLocator(byhour=range(0, 24, step // 60)))
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+
+        ax.set_title(title, fontproperties=trajan_font, color='#C0C0C0', fontsize=40, fontweight='bold', pad=20)
+        ax.tick_params(axis='x', colors='white', labelsize=21)
+        ax.xaxis.set_visible(True)
+        ax.yaxis.set_visible(False)
+
+        # Calculate metrics - ensure proper values
+        total_inactive_minutes = total_inactive_time.total_seconds() / 60
+        total_inactive_percentage = (total_inactive_minutes / bucket_minutes) * 100
+
+        # Add the metrics text with better positioning and visibility
+        # Number of minutes - yellow text
+        fig.text(0.85, 0.8, f"{total_inactive_minutes:.2f}",
+                 fontproperties=trajan_font,
+                 fontsize=55,
+                 color='yellow',
+                 ha='left',
+                 va='center',
+                 fontweight='bold')
+
+        # Percentage - silver text
+        fig.text(0.85, 0.3, f"{total_inactive_percentage:.2f}%",
+                 fontproperties=trajan_font,
+                 fontsize=55,
+                 color='silver',
+                 ha='left',
+                 va='center',
+                 fontweight='bold')
+
+        # Add labels for clarity
+        fig.text(0.85, 0.9, "Minutes Inactive:",
+                 fontproperties=trajan_font,
+                 fontsize=20,
+                 color='white',
+                 ha='left',
+                 va='center')
+
+        fig.text(0.85, 0.4, "Percentage Inactive:",
+                 fontproperties=trajan_font,
+                 fontsize=20,
+                 color='white',
+                 ha='left',
+                 va='center')
+
+        fig.subplots_adjust(left=0.1, right=0.8, top=0.9, bottom=0.1)
+
+        for label in ax.get_xticklabels() + ax.get_yticklabels():
+            label.set_fontproperties(trajan_font)
+
+        ax.grid(True, linestyle='--', linewidth=0.5)
+        fig.tight_layout(rect=[0, 0, 0.8, 1])
+
+        if save_path is None:
+            # Create directory for the date of the chart (based on hour_start)
+            date_str = hour_start.strftime('%d %B %Y')
+            date_dir = os.path.join(charts_dir, date_str)
+            os.makedirs(date_dir, exist_ok=True)
+
+            # Save the plot in the directory with the correct format - using hour_start for consistent naming
+            save_path = os.path.join(date_dir, chart_file_name(hour_start, bucket_minutes))
+        fig.savefig(save_path, format='png')
+        metrics.record('chart_render', time.perf_counter() - started)
+
+        logging.info(f"Hourly bar chart saved: {save_path}")
+        return save_path
+
+    except Exception as e:
+        logging.error(f"Error generating chart: {str(e)}")
+        return None
@@ -0,0 +1,1454 @@
+"""Inactivity tracking engine shared by the GUI, the desktop widget and the headless daemon.
+
+Nothing in this module imports tkinter. pynput is imported when tracking starts and
+chart rendering (TrackerCharts) is only loaded when a rollover needs a chart.
+"""
+import os
+import sys
+import csv
+import json
+import mmap
+import time
+import threading
+import logging
+from array import array
+from datetime import datetime, timedelta
+from TrackerMetrics import metrics
+from TrackerScheduler import TimerScheduler
+
+INACTIVITY_THRESHOLD = 60  # seconds
+CSV_TIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+STATUS_UPDATE_INTERVAL = 300  # seconds
+TICK_INTERVAL = 5  # seconds between clock checks; inactivity and hour boundaries have their own timers
+CLOCK_JUMP_TOLERANCE = 2  # seconds the wall clock may drift from elapsed time between ticks
+SUSPEND_GAP = 10  # seconds between ticks that mean the machine was suspended or stalled
+ROLLING_WINDOWS = ((300, '5 min'), (3600, '1 h'), (28800, '8 h'))  # (seconds, label)
+ROLLING_BUCKETS = 60  # ring-buffer slots per window, so the resolution is 1/60 of the window
+ROLLING_ORIGIN = datetime(2000, 1, 1)  # bucket 0 of every rolling window starts here
+GAP_RECORD_MIN = 5  # seconds; shorter gaps between inputs are not kept, so sweeps start here
+BITMAP_ACTIVE_BYTES = 86400 // 8  # one bit per second of the day with input
+BITMAP_TRACKED_BYTES = 1440 // 8  # one bit per minute of the day with tracking running
+BITMAP_SIZE = BITMAP_ACTIVE_BYTES + BITMAP_TRACKED_BYTES
+EVENT_TYPES = ('move', 'click', 'scroll', 'key')  # indexes into EventCounters
+EVENT_MOVE, EVENT_CLICK, EVENT_SCROLL, EVENT_KEY = range(len(EVENT_TYPES))
+CHART_CACHE_MB = 256  # default disk budget of the on-demand chart cache
+BUCKET_MINUTES = 60  # default length of the buckets CSVs and charts are written for, see bucket_csv_path
+SETTINGS_FILE = 'tracker_settings.json'  # Settings tab values, also used by the widget and spawned daemons
+SETTINGS_KEYS = ('threshold', 'bucket_minutes', 'hourly_csv_dir', 'hourly_charts_dir')
+DAY_RECHECK_INTERVAL = 60  # seconds between checks of a day's finished hourly CSVs for changes
+
+
+# Elapsed-time clock that keeps counting while the machine is suspended, so a suspend
+# reads as time passing while a wall-clock change does not. time.monotonic() stops
+# during suspend on Linux and macOS but not on Windows.
+if hasattr(time, 'CLOCK_BOOTTIME'):
+    def elapsed_clock():
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+elif sys.platform == 'darwin' and hasattr(time, 'CLOCK_MONOTONIC'):
+    def elapsed_clock():
+        return time.clock_gettime(time.CLOCK_MONOTONIC)
+else:
+    elapsed_clock = time.monotonic
+
+
+class ActivityTracker:
+    def __init__(self, threshold=INACTIVITY_THRESHOLD, hourly_csv_dir='hourly_csv',
+                 hourly_charts_dir='hourly_charts', status_file='program_status.txt',
+                 write_hourly_csv=True, generate_charts=True, activity_gaps_dir='activity_gaps',
+                 activity_bitmaps_dir='activity_bitmaps', hourly_events_dir='hourly_events',
+                 lazy_charts=False, chart_cache_dir='chart_cache', chart_cache_mb=CHART_CACHE_MB,
+                 wall_clock=datetime.now, monotonic_clock=elapsed_clock, scheduler=None,
+                 bucket_minutes=BUCKET_MINUTES):
+        self.threshold = threshold
+        # Length of the periods rolled over into one CSV (and chart), see configure()
+        self.bucket_minutes = check_bucket_minutes(bucket_minutes)
+        self.bucket_length = timedelta(minutes=bucket_minutes)
+        self.hourly_csv_dir = hourly_csv_dir
+        self.hourly_charts_dir = hourly_charts_dir
+        self.status_file = status_file
+        self.write_hourly_csv = write_hourly_csv
+        self.generate_charts = generate_charts
+        self.activity_gaps_dir = activity_gaps_dir
+        self.activity_bitmaps_dir = activity_bitmaps_dir
+        self.hourly_events_dir = hourly_events_dir
+        # With lazy_charts nothing is rendered at rollover; hour_chart() renders on request
+        self.lazy_charts = lazy_charts
+        self.chart_cache_dir = chart_cache_dir
+        self.chart_cache_mb = chart_cache_mb
+        self.chart_cache = None  # TrackerChartCache.ChartCache, created on first request
+        self.time_offset = timedelta(0)
+        # Both clocks (and the scheduler) can be replaced, e.g. by TrackerSoak's virtual clock
+        self.wall_clock = wall_clock
+        self.elapsed_clock = monotonic_clock
+
+        # Tracking state
+        self.is_running = False
+        self.session_start = None
+        self.last_activity_time = None
+        self.inactivity_start_time = None
+        self.inactivity_periods = []
+        self.closed_inactive_seconds = 0.0
+        self.hourly_totals = HourlyTotals()
+        self.rolling_windows = [RollingWindow(seconds) for seconds, _ in ROLLING_WINDOWS]
+        self.gap_buffer = []  # input gaps of at least GAP_RECORD_MIN seconds not yet on disk
+        self.activity_bitmap = ActivityBitmap(activity_bitmaps_dir) if write_hourly_csv else None
+        self.event_counters = EventCounters()
+        self.input_latency = metrics.histogram('input_callback')
+        self.last_activity_elapsed = None  # elapsed_clock() at the last input
+        self.next_boundary = None  # start of the next bucket to roll over into
+        self.timeline = Timeline(monotonic_clock)
+
+        self.mouse_listener = None
+        self.keyboard_listener = None
+        self.listening = True  # whether start() installed the input hooks, so a restart does the same
+        # All periodic and one-shot work runs on one timer thread, from start() to stop()
+        self.scheduler = scheduler or TimerScheduler('TrackerScheduler', clock=monotonic_clock)
+        self.tick_timer = None
+        self.deadline_timer = None
+        self.boundary_timer = None
+        self.status_timer = None
+        self._lock = EventLock(self.deliver)
+        self._observers = []
+        self.version = 0  # bumped on every emitted event, so snapshots can be ordered
+
+        # Ensure directories exist
+        if self.write_hourly_csv:
+            os.makedirs(self.hourly_csv_dir, exist_ok=True)
+            if self.generate_charts and not self.lazy_charts:
+                os.makedirs(self.hourly_charts_dir, exist_ok=True)
+
+    # Observers are called as callback(event, data) from whichever thread produced the event
+    def add_observer(self, callback):
+        self._observers.append(callback)
+
+    def remove_observer(self, callback):
+        if callback in self._observers:
+            self._observers.remove(callback)
+
+    # Events emitted while the lock is held are delivered once it is released
+    def emit(self, event, **data):
+        with self._lock:
+            self.version += 1
+            self._lock.defer(event, data)
+
+    def deliver(self, event, data):
+        for callback in list(self._observers):
+            try:
+                callback(event, data)
+            except Exception as e:
+                logging.error(f"Error in tracker observer for {event}: {str(e)}")
+
+    def log(self, message):
+        self.emit('log', message=message)
+
+    # Function to get the current time (either real or custom)
+    def now(self):
+        return self.wall_clock() + self.time_offset
+
+    def configure(self, threshold=None, hourly_csv_dir=None, hourly_charts_dir=None, time_offset=None,
+                  bucket_minutes=None):
+        if bucket_minutes is not None:
+            check_bucket_minutes(bucket_minutes)
+        with self._lock:
+            if threshold is not None:
+                self.threshold = threshold
+            if hourly_csv_dir is not None:
+                self.hourly_csv_dir = hourly_csv_dir
+                os.makedirs(self.hourly_csv_dir, exist_ok=True)
+            if hourly_charts_dir is not None:
+                self.hourly_charts_dir = hourly_charts_dir
+                os.makedirs(self.hourly_charts_dir, exist_ok=True)
+            if time_offset is not None:
+                self.time_offset = time_offset
+            # A new threshold or clock moves the inactivity deadline and the next boundary
+            if self.is_running:
+                self.scheduler.reschedule(self.deadline_timer, 0)
+                self.scheduler.reschedule(self.boundary_timer, 0)
+
+        # A new bucket size starts a new session: the current bucket is written out at the
+        # old size first, so no inactivity is counted in files of both sizes
+        if bucket_minutes is not None and bucket_minutes != self.bucket_minutes:
+            restart = self.is_running
+            if restart:
+                self.stop(flush_partial_hour=True)
+            with self._lock:
+                self.bucket_minutes = bucket_minutes
+                self.bucket_length = timedelta(minutes=bucket_minutes)
+            logging.info(f"Bucket size set to {bucket_minutes} minutes")
+            if restart:
+                self.start(listen=self.listening)
+        self.emit('configured')
+
+    # With listen=False no input hooks are installed and input is fed to
+    # update_activity_time() by the caller, as TrackerSoak does
+    def start(self, listen=True):
+        with self._lock:
+            if self.is_running:
+                return
+
+            # Initialize tracking values
+            current_time = self.now()
+            self.is_running = True
+            self.listening = listen
+            self.session_start = self.wall_clock()
+            self.last_activity_time = current_time
+            self.last_activity_elapsed = self.elapsed_clock()
+            self.inactivity_start_time = None
+            self.inactivity_periods = []
+            self.closed_inactive_seconds = 0.0
+            self.hourly_totals.reset(current_time.date())
+            for window in self.rolling_windows:
+                window.reset(current_time)
+            self.event_counters.clear()
+            self.next_boundary = bucket_floor(current_time, self.bucket_minutes) + self.bucket_length
+            self.timeline.reset(current_time)
+
+        # Start listeners for mouse and keyboard
+        if listen:
+            # Imported here so the engine can be loaded (and tested) without an input backend
+            from pynput import mouse, keyboard
+
+            self.mouse_listener = mouse.Listener(on_move=self.on_move, on_click=self.on_click,
+                                                 on_scroll=self.on_scroll)
+            self.keyboard_listener = keyboard.Listener(on_press=self.on_press, on_release=self.on_release)
+
+            self.mouse_listener.start()
+            self.keyboard_listener.start()
+
+        # Clock checks, the inactivity deadline, bucket boundaries and status writes
+        self.scheduler.start()
+        self.tick_timer = self.scheduler.call_every(TICK_INTERVAL, self.tick)
+        self.deadline_timer = self.scheduler.call_later(self.threshold, self.on_inactivity_deadline)
+        self.boundary_timer = self.scheduler.call_later(self.seconds_to_boundary(), self.tick, name='boundary')
+        self.status_timer = self.scheduler.call_every(STATUS_UPDATE_INTERVAL, self.update_status_file)
+
+        self.write_status("RUNNING")
+        self.emit('started', session_start=self.session_start)
+        self.log(f"Tracking started at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    # Stop tracking. With flush_partial_hour the open inactivity period is closed and
+    # the current bucket is written out, so nothing is lost on shutdown.
+    def stop(self, flush_partial_hour=False):
+        with self._lock:
+            if not self.is_running:
+                return
+
+            self.is_running = False
+
+        # Cancels every timer; waits for an in-flight rollover unless called from one
+        self.scheduler.shutdown()
+
+        # Stop listeners
+        if self.mouse_listener:
+            self.mouse_listener.stop()
+            self.mouse_listener = None
+
+        if self.keyboard_listener:
+            self.keyboard_listener.stop()
+            self.keyboard_listener = None
+
+        if flush_partial_hour and self.write_hourly_csv:
+            # A bucket that ended less than rollover_delay() ago is written first
+            self.process_boundaries(self.now(), delayed=False)
+            self.flush_partial_hour()
+
+        # The gap still open at stop is kept as well, ending now
+        with self._lock:
+            self.record_gap(self.now(), self.elapsed_clock())
+            if self.activity_bitmap:
+                self.activity_bitmap.close()
+        self.flush_gaps()
+
+        self.write_status("STOPPED")
+        self.emit('stopped')
+        self.log(f"Tracking stopped at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    # Restart the session totals from now. The periods of the current bucket are kept,
+    # as they still go into its CSV at the rollover.
+    def reset_session(self):
+        with self._lock:
+            if not self.is_running:
+                return
+            self.closed_inactive_seconds = 0.0
+            self.session_start = self.wall_clock()
+        self.emit('reset')
+
+    def flush_partial_hour(self):
+        with self._lock:
+            current_time = self.now()
+            if self.inactivity_start_time:
+                self.log_inactivity(self.inactivity_start_time, current_time)
+                self.inactivity_start_time = None
+
+            bucket_start = bucket_floor(current_time, self.bucket_minutes)
+            bucket_inactivity = clip_periods(self.inactivity_periods, bucket_start, bucket_start + self.bucket_length)
+            bucket_events = self.event_counters.bucket_rows(bucket_start, self.bucket_minutes)
+
+        generate_csv_log(bucket_inactivity, bucket_csv_path(self.hourly_csv_dir, bucket_start, self.bucket_minutes),
+                         merge=True)
+        write_event_counts(bucket_csv_path(self.hourly_events_dir, bucket_start, self.bucket_minutes), bucket_events)
+        logging.info(f"Partial bucket flushed: {bucket_start} to {current_time}")
+
+    # Runs every TICK_INTERVAL and at each bucket boundary: clock checks, the tracked-minute
+    # bits and the rollover of every boundary passed since the last tick
+    def tick(self):
+        if not self.is_running:
+            return
+        try:
+            iteration_started = time.perf_counter()
+            current_time = self.now()
+
+            # Wall time and elapsed time should move together between ticks
+            elapsed, jump = self.timeline.advance(current_time)
+            if abs(jump) >= CLOCK_JUMP_TOLERANCE:
+                self.handle_clock_jump(current_time, jump)
+            elif elapsed >= SUSPEND_GAP + TICK_INTERVAL:
+                self.log(f"Resumed after {elapsed:.0f}s without a tick (suspend or stall)")
+
+            with self._lock:
+                if self.activity_bitmap:
+                    self.activity_bitmap.mark_tracked(current_time)
+
+            # Process every bucket and day boundary passed since the last tick
+            self.process_boundaries(current_time)
+            if self.is_running:
+                self.scheduler.reschedule(self.boundary_timer, self.seconds_to_boundary())
+            metrics.record('tracking_loop', time.perf_counter() - iteration_started)
+
+        except Exception as e:
+            logging.error(f"Error in tracking loop: {str(e)}")
+            self.log(f"Error: {str(e)}")
+
+            # Update status file
+            self.write_status("ERROR", crashed=True, error=str(e))
+
+    # Seconds on the wall clock until the rollover of the next bucket boundary is due
+    def seconds_to_boundary(self):
+        with self._lock:
+            return (self.next_boundary + self.rollover_delay() - self.now()).total_seconds()
+
+    # A bucket is rolled over threshold seconds after it ends. Inactivity that began less
+    # than threshold seconds before the boundary is only detected after it, and its part
+    # before the boundary still belongs in the bucket.
+    def rollover_delay(self):
+        return timedelta(seconds=self.threshold)
+
+    # Fires threshold seconds after the last input known when it was armed. Input events
+    # never touch the timer: when there was input since, the deadline is just moved on.
+    # While inactive it checks back every threshold seconds, so it is armed again before
+    # the next inactivity can start.
+    def on_inactivity_deadline(self):
+        with self._lock:
+            if not self.is_running:
+                return
+            # Check for inactivity on the elapsed clock, so clock changes are never counted
+            inactive_seconds = self.elapsed_clock() - self.last_activity_elapsed
+
+            # Start inactivity period if threshold is reached and we're not already tracking inactivity
+            if inactive_seconds >= self.threshold and not self.inactivity_start_time:
+                current_time = self.now()
+                self.inactivity_start_time = current_time - timedelta(seconds=inactive_seconds)
+                logging.info(f"Inactivity detected. Start time: {self.inactivity_start_time}")
+                self.emit('inactive', start=self.inactivity_start_time)
+                self.log(f"Inactivity started at {self.inactivity_start_time.strftime('%H:%M:%S')}")
+
+            if self.inactivity_start_time:
+                delay = self.threshold
+            else:
+                delay = self.threshold - inactive_seconds
+            self.scheduler.reschedule(self.deadline_timer, delay)
+
+    # Roll over every bucket boundary due by current_time (rollover_delay() after it, unless
+    # delayed is False), in order. After a suspend or a
+    # forward clock change several boundaries are due at once: all their CSVs (and the
+    # day changes between them) are written first, then the charts are rendered.
+    def process_boundaries(self, current_time, delayed=True):
+        with self._lock:
+            boundaries = []
+            due = current_time - self.rollover_delay() if delayed else current_time
+            while self.next_boundary <= due:
+                boundaries.append(self.next_boundary)
+                self.next_boundary += self.bucket_length
+        if not boundaries:
+            return
+
+        started = time.perf_counter()
+        if len(boundaries) > 1:
+            self.log(f"Catching up {len(boundaries)} bucket boundaries: "
+                     f"{boundaries[0].strftime('%Y-%m-%d %H:%M')} to {boundaries[-1].strftime('%Y-%m-%d %H:%M')}")
+
+        charts = []
+        for bucket_end in boundaries:
+            csv_name = self.process_bucket_change(bucket_end, render_chart=False)
+            if csv_name and self.generate_charts and not self.lazy_charts:
+                charts.append((csv_name, bucket_end))
+            if bucket_end.hour == 0 and bucket_end.minute == 0:
+                self.process_day_change(bucket_end)
+
+        self.flush_gaps()
+        with self._lock:
+            if self.activity_bitmap:
+                self.activity_bitmap.flush()
+
+        for csv_name, bucket_end in charts:
+            self.render_hour_chart(csv_name, bucket_end)
+        metrics.record('rollover', time.perf_counter() - started)
+
+    # The wall clock moved by jump seconds more than elapsed time (NTP step, manual change,
+    # new time offset). The open inactivity period is closed where the old clock stood and
+    # reopened on the new one, so the jump itself is never counted as inactivity.
+    def handle_clock_jump(self, current_time, jump):
+        jump_from = current_time - timedelta(seconds=jump)
+        with self._lock:
+            was_inactive = self.inactivity_start_time is not None
+            if was_inactive:
+                self.log_inactivity(self.inactivity_start_time, jump_from)
+                self.inactivity_start_time = None
+            self.last_activity_time += timedelta(seconds=jump)
+
+            # Going back past the start of the current bucket: it will not be reached
+            # again, so write it now and continue from the next boundary on the new clock
+            unfinished_bucket = None
+            if current_time < self.next_boundary - self.bucket_length:
+                unfinished_bucket = self.next_boundary
+
+        if unfinished_bucket:
+            self.process_bucket_change(unfinished_bucket)
+
+        with self._lock:
+            if unfinished_bucket:
+                self.next_boundary = bucket_floor(current_time, self.bucket_minutes) + self.bucket_length
+                if self.hourly_totals.day != current_time.date():
+                    self.hourly_totals.reset(current_time.date())
+            if was_inactive:
+                self.inactivity_start_time = current_time
+
+        self.emit('clock_jump', seconds=jump)
+        self.log(f"System clock changed by {jump:+.0f}s; the change is not counted as inactivity")
+
+    # Write the CSV for the bucket ending at bucket_end and, unless told otherwise, its chart.
+    # Returns the CSV path, or None when CSVs are disabled.
+    def process_bucket_change(self, bucket_end, render_chart=True):
+        bucket_start = bucket_end - self.bucket_length
+        logging.info(f"Processing data for bucket: {bucket_start} to {bucket_end}")
+
+        clip_started = time.perf_counter()
+        with self._lock:
+            # If we're in an inactivity period that spans the boundary, log it up to the boundary
+            if self.inactivity_start_time and self.inactivity_start_time < bucket_end:
+                self.log_inactivity(self.inactivity_start_time, bucket_end)
+                self.inactivity_start_time = bucket_end  # Continue inactivity from the new bucket
+
+            # Only include periods that overlap with this bucket, clipped to its boundaries
+            bucket_inactivity = clip_periods(self.inactivity_periods, bucket_start, bucket_end)
+            bucket_events = self.event_counters.bucket_rows(bucket_start, self.bucket_minutes)
+        metrics.record('rollover.clip', time.perf_counter() - clip_started)
+
+        csv_name = None
+        if self.write_hourly_csv:
+            csv_name = bucket_csv_path(self.hourly_csv_dir, bucket_start, self.bucket_minutes)
+            with metrics.timer('rollover.csv'):
+                generate_csv_log(bucket_inactivity, csv_name, merge=True)
+                write_event_counts(bucket_csv_path(self.hourly_events_dir, bucket_start, self.bucket_minutes),
+                                   bucket_events)
+
+        if render_chart and csv_name and self.generate_charts and not self.lazy_charts:
+            self.render_hour_chart(csv_name, bucket_end)
+
+        with self._lock:
+            # Remove logged inactivity periods that are completely before the new bucket
+            self.inactivity_periods = [(start, end) for start, end in self.inactivity_periods if end > bucket_end]
+
+        self.emit('rollover', start=bucket_start, end=bucket_end, csv=csv_name)
+        self.log(f"Bucket processed: {bucket_start:%H:%M} -> {bucket_end:%H:%M}")
+        return csv_name
+
+    # Generate the chart for the bucket ending at bucket_end
+    def render_hour_chart(self, csv_name, bucket_end):
+        with metrics.timer('rollover.chart'):
+            render_hour_chart(csv_name, bucket_end, self.hourly_charts_dir, events_dir=self.hourly_events_dir,
+                              bucket_minutes=self.bucket_minutes)
+
+    # Path of the chart of the bucket starting at bucket_start, at size (width, height) in
+    # pixels, rendered through the chart cache when not cached yet. None without data.
+    def hour_chart(self, bucket_start, size=None):
+        if self.chart_cache is None:
+            from TrackerChartCache import ChartCache
+            self.chart_cache = ChartCache(self.chart_cache_dir, self.chart_cache_mb * 1024 * 1024)
+        return self.chart_cache.hour_chart(self.hourly_csv_dir, bucket_start, self.hourly_events_dir, size,
+                                           bucket_minutes=self.bucket_minutes)
+
+    def process_day_change(self, day_start):
+        logging.info(f"Day change detected: {day_start - timedelta(days=1):%Y-%m-%d} -> {day_start:%Y-%m-%d}")
+
+        with self._lock:
+            # Reset for new day
+            self.hourly_totals.reset(day_start.date())
+            self.event_counters.drop_before(day_start.date())
+
+            # Clear old inactivity periods (optional)
+            self.inactivity_periods = [(start, end) for start, end in self.inactivity_periods if end > day_start]
+
+        self.log(f"Day change processed: {(day_start - timedelta(days=1)).strftime('%Y-%m-%d')} -> {day_start.strftime('%Y-%m-%d')}")
+
+    # Function to log inactivity
+    def log_inactivity(self, start_time, end_time):
+        # Only log if there's a meaningful duration
+        duration = (end_time - start_time).total_seconds()
+        if duration > 0:
+            with self._lock:
+                self.inactivity_periods.append((start_time, end_time))
+                # Only the part after the session start counts for the session, see reset_session()
+                counted_start = start_time
+                if self.session_start is not None:
+                    counted_start = max(start_time, self.session_start + self.time_offset)
+                self.closed_inactive_seconds += max(0.0, (end_time - counted_start).total_seconds())
+                self.hourly_totals.fold(start_time, end_time)
+                for window in self.rolling_windows:
+                    window.add(start_time, end_time)
+            logging.info(f"Inactivity logged from {start_time} to {end_time}")
+            self.emit('period', start=start_time, end=end_time)
+
+    # Update last activity time and log inactivity if necessary. event_type (one of the
+    # EVENT_* indexes) is counted in the per-minute event counters.
+    def update_activity_time(self, event_type=None):
+        started = time.perf_counter()
+        current_time = self.now()
+        current_elapsed = self.elapsed_clock()
+
+        with self._lock:
+            if event_type is not None:
+                self.event_counters.count(event_type, current_time)
+
+            # If we were in an inactivity period, log it before updating
+            if self.inactivity_start_time:
+                self.log_inactivity(self.inactivity_start_time, current_time)
+                self.inactivity_start_time = None
+                logging.info(f"Activity resumed at {current_time}")
+                self.emit('active', at=current_time)
+            elif current_elapsed - self.last_activity_elapsed >= self.threshold:
+                # Idle past the threshold before the tracking loop noticed, e.g. input right after a resume
+                idle = timedelta(seconds=current_elapsed - self.last_activity_elapsed)
+                self.log_inactivity(current_time - idle, current_time)
+
+            self.record_gap(current_time, current_elapsed)
+            if self.activity_bitmap:
+                self.activity_bitmap.mark_active(current_time)
+            self.last_activity_time = current_time
+            self.last_activity_elapsed = current_elapsed
+        self.input_latency.record(time.perf_counter() - started)
+
+    # Keep the gap since the last input, whatever the threshold, so inactivity can later be
+    # derived again at other thresholds. Measured on the elapsed clock like the threshold.
+    def record_gap(self, current_time, current_elapsed):
+        gap = current_elapsed - self.last_activity_elapsed
+        if gap >= GAP_RECORD_MIN and self.write_hourly_csv:
+            self.gap_buffer.append((current_time - timedelta(seconds=gap), current_time))
+
+    # Append the buffered gaps to their day files; called at rollover and on stop
+    def flush_gaps(self):
+        with self._lock:
+            gaps, self.gap_buffer = self.gap_buffer, []
+        if gaps:
+            append_activity_gaps(self.activity_gaps_dir, gaps)
+
+    # Mouse and keyboard event handlers
+    def on_move(self, x, y):
+        self.update_activity_time(EVENT_MOVE)
+
+    # Button presses and key presses are counted; releases only update the activity time
+    def on_click(self, x, y, button, pressed):
+        self.update_activity_time(EVENT_CLICK if pressed else None)
+
+    def on_scroll(self, x, y, dx, dy):
+        self.update_activity_time(EVENT_SCROLL)
+
+    def on_press(self, key):
+        self.update_activity_time(EVENT_KEY)
+
+    def on_release(self, key):
+        self.update_activity_time()
+
+    # Latency histograms of this process (see TrackerMetrics)
+    def metrics(self):
+        return metrics.report()
+
+    # Consistent copy of the state for display code running on other threads
+    def snapshot(self):
+        with self._lock:
+            return {
+                'version': self.version,
+                'running': self.is_running,
+                'now': self.now(),
+                'session_start': self.session_start,
+                'last_activity_time': self.last_activity_time,
+                'inactivity_start_time': self.inactivity_start_time,
+                'inactivity_periods': list(self.inactivity_periods),
+                'closed_inactive_seconds': self.closed_inactive_seconds,
+                'hourly_inactive_seconds': list(self.hourly_totals.inactive_seconds),
+                'rolling_windows': [window.state() for window in self.rolling_windows],
+                'threshold': self.threshold,
+                'bucket_minutes': self.bucket_minutes,
+                'hourly_csv_dir': self.hourly_csv_dir,
+                'activity_bitmaps_dir': self.activity_bitmaps_dir,
+                'hourly_events_dir': self.hourly_events_dir,
+                'hourly_charts_dir': self.hourly_charts_dir,
+                'lazy_charts': self.lazy_charts,
+                'chart_cache_dir': self.chart_cache_dir,
+                'chart_cache_mb': self.chart_cache_mb,
+                'time_offset': self.time_offset,
+            }
+
+    # Every STATUS_UPDATE_INTERVAL while running
+    def update_status_file(self):
+        if self.is_running:
+            self.write_status("RUNNING", periods=len(self.inactivity_periods), rolling=rolling_inactivity(self.snapshot()))
+
+    def write_status(self, status, periods=None, crashed=False, error=None, rolling=None):
+        if not self.status_file:
+            return
+
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        started = self.session_start.strftime('%Y-%m-%d %H:%M:%S') if self.session_start else now
+        try:
+            with open(self.status_file, "w") as status_file:
+                status_file.write(f"Program started at: {started}\n")
+                if crashed:
+                    status_file.write(f"Program crashed at: {now}\n")
+                elif status == "STOPPED":
+                    status_file.write(f"Program stopped at: {now}\n")
+                elif periods is not None:
+                    status_file.write(f"Last updated: {now}\n")
+                status_file.write(f"Status: {status}\n")
+                if periods is not None:
+                    status_file.write(f"Tracking inactivity periods: {periods}\n")
+                for label, percentage in rolling or ():
+                    status_file.write(f"Inactive last {label}: {percentage:.1f}%\n")
+                if error:
+                    status_file.write(f"Error message: {error}\n")
+        except OSError as e:
+            logging.error(f"Error writing status file: {str(e)}")
+
+
+class EventLock:
+    """Reentrant lock that holds back the events emitted under it until it is released.
+
+    Observers may wait on other threads, e.g. a Tk thread that is itself waiting for the
+    lock in snapshot(), so deliver(event, data) is only called once the outermost with
+    block has released the lock, in the order the events were emitted.
+    """
+
+    def __init__(self, deliver):
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._pending = []
+        self._deliver = deliver
+
+    def __enter__(self):
+        self._lock.acquire()
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        events = None
+        if not self._depth and self._pending:
+            events, self._pending = self._pending, []
+        self._lock.release()
+        for event, data in events or ():
+            self._deliver(event, data)
+        return False
+
+    # Queue an event; the caller holds the lock
+    def defer(self, event, data):
+        self._pending.append((event, data))
+
+
+class ActivityBitmap:
+    """Per-day activity bitmap, memory-mapped and updated in place.
+
+    activity_bitmaps/YYYY-MM-DD.bits holds one bit per second of the day, set when there
+    was input in that second (10,800 bytes), followed by one bit per minute set while
+    tracking was running (180 bytes), so untracked time can be told from inactivity.
+    Bits are most significant first, the order numpy.unpackbits uses.
+    """
+
+    def __init__(self, bitmaps_dir):
+        self.bitmaps_dir = bitmaps_dir
+        self.day = None
+        self.file = None
+        self.map = None
+        self.last_second = None
+        self.last_minute = None
+
+    def open(self, day):
+        self.close()
+        self.day = day
+        self.last_second = None
+        self.last_minute = None
+        try:
+            os.makedirs(self.bitmaps_dir, exist_ok=True)
+            file_name = activity_bitmap_path(self.bitmaps_dir, day)
+            if not os.path.exists(file_name):
+                with open(file_name, 'wb') as f:
+                    f.write(bytes(BITMAP_SIZE))
+            self.file = open(file_name, 'r+b')
+            self.map = mmap.mmap(self.file.fileno(), BITMAP_SIZE)
+        except (OSError, ValueError) as e:
+            # Tracking goes on without the bitmap until the next day
+            logging.error(f"Error opening activity bitmap for {day}: {str(e)}")
+            self.close()
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def flush(self):
+        if self.map is not None:
+            self.map.flush()
+
+    def set_bit(self, bit):
+        byte = bit >> 3
+        mask = 0x80 >> (bit & 7)
+        if not self.map[byte] & mask:
+            self.map[byte] |= mask
+
+    # Called for every input event, so repeated events in the same second return early
+    def mark_active(self, moment):
+        day = moment.date()
+        if day != self.day:
+            self.open(day)
+        second = moment.hour * 3600 + moment.minute * 60 + moment.second
+        if second != self.last_second and self.map is not None:
+            self.last_second = second
+            self.set_bit(second)
+
+    def mark_tracked(self, moment):
+        day = moment.date()
+        if day != self.day:
+            self.open(day)
+        minute = moment.hour * 60 + moment.minute
+        if minute != self.last_minute and self.map is not None:
+            self.last_minute = minute
+            self.set_bit(BITMAP_ACTIVE_BYTES * 8 + minute)
+
+
+class EventCounters:
+    """Input events per minute of the day, one preallocated array('I') per event type.
+
+    Counters for the day before midnight are kept until its last bucket has been written.
+    """
+
+    def __init__(self):
+        self.days = {}
+        self.day = None
+        self.counts = None
+
+    def clear(self):
+        self.days = {}
+        self.day = None
+        self.counts = None
+
+    def counts_for(self, day):
+        counts = self.days.get(day)
+        if counts is None:
+            counts = self.days[day] = [array('I', [0]) * 1440 for _ in EVENT_TYPES]
+        return counts
+
+    def count(self, event_type, moment):
+        day = moment.date()
+        if day != self.day:
+            self.day = day
+            self.counts = self.counts_for(day)
+        self.counts[event_type][moment.hour * 60 + moment.minute] += 1
+
+    # (minute start, counts by type) for each minute of the bucket starting at bucket_start
+    def bucket_rows(self, bucket_start, bucket_minutes=BUCKET_MINUTES):
+        counts = self.days.get(bucket_start.date())
+        first_minute = bucket_start.hour * 60 + bucket_start.minute
+        rows = []
+        for minute in range(bucket_minutes):
+            values = [counts[kind][first_minute + minute] if counts else 0 for kind in range(len(EVENT_TYPES))]
+            rows.append((bucket_start + timedelta(minutes=minute), values))
+        return rows
+
+    def drop_before(self, day):
+        for old_day in [old_day for old_day in self.days if old_day < day]:
+            del self.days[old_day]
+        if self.day is not None and self.day < day:
+            self.day = None
+            self.counts = None
+
+
+class Timeline:
+    """Compares wall-clock progress with elapsed_clock() between tracker ticks.
+
+    A suspend shows up as a long elapsed gap; a wall-clock change as wall time moving
+    by a different amount than elapsed time.
+    """
+
+    def __init__(self, clock=elapsed_clock):
+        self.clock = clock
+        self.wall = None
+        self.elapsed = None
+
+    def reset(self, wall):
+        self.wall = wall
+        self.elapsed = self.clock()
+
+    # Seconds elapsed since the previous call, and how far the wall clock jumped beyond that
+    def advance(self, wall):
+        elapsed_now = self.clock()
+        if self.wall is None:
+            elapsed, jump = 0.0, 0.0
+        else:
+            elapsed = elapsed_now - self.elapsed
+            jump = (wall - self.wall).total_seconds() - elapsed
+        self.wall = wall
+        self.elapsed = elapsed_now
+        return elapsed, jump
+
+
+class RollingWindow:
+    """Closed inactive seconds over a sliding window, in a ring buffer of time buckets.
+
+    Bucket i covers [i * width, (i + 1) * width) seconds after ROLLING_ORIGIN and lives in
+    slot i % len(slots). Adding a period touches only the buckets it overlaps, and stale
+    slots are cleared as the head moves forward, so nothing ever rescans the period history.
+    """
+
+    def __init__(self, seconds, buckets=ROLLING_BUCKETS):
+        self.seconds = seconds
+        self.width = seconds / buckets
+        self.slots = array('d', [0.0]) * buckets
+        self.head = None  # index of the newest bucket
+        self.started = None  # seconds at which tracking (re)started
+
+    def reset(self, moment):
+        for slot in range(len(self.slots)):
+            self.slots[slot] = 0.0
+        self.started = to_rolling_seconds(moment)
+        self.head = int(self.started // self.width)
+
+    def advance(self, index):
+        if index <= self.head:
+            return
+        for stale in range(self.head + 1, min(index, self.head + len(self.slots)) + 1):
+            self.slots[stale % len(self.slots)] = 0.0
+        self.head = index
+
+    def add(self, start_time, end_time):
+        start = to_rolling_seconds(start_time)
+        end = to_rolling_seconds(end_time)
+        self.advance(int(end // self.width))
+
+        # Only the part inside the ring matters
+        cursor = max(start, (self.head - len(self.slots) + 1) * self.width)
+        while cursor < end:
+            index = int(cursor // self.width)
+            part_end = min(end, (index + 1) * self.width)
+            if index <= self.head:
+                self.slots[index % len(self.slots)] += part_end - cursor
+            cursor = part_end
+
+    # Plain data for snapshots, which are also sent to remote clients
+    def state(self):
+        return {'seconds': self.seconds, 'width': self.width, 'head': self.head,
+                'started': self.started, 'slots': list(self.slots)}
+
+
+def to_rolling_seconds(moment):
+    return (moment - ROLLING_ORIGIN).total_seconds()
+
+
+# (label, inactive percentage) for each rolling window of a snapshot, including the open
+# period. A window is measured over the tracked part only, so it is not diluted right after start.
+def rolling_inactivity(snapshot):
+    results = []
+    now = to_rolling_seconds(snapshot['now'])
+    for (_, label), window in zip(ROLLING_WINDOWS, snapshot.get('rolling_windows') or ()):
+        width = window['width']
+        slots = window['slots']
+        now_index = int(now // width)
+
+        # Buckets still inside the window; the newest one may be ahead of a lagging head
+        inactive = 0.0
+        for index in range(max(now_index - len(slots) + 1, window['head'] - len(slots) + 1),
+                           min(now_index, window['head']) + 1):
+            inactive += slots[index % len(slots)]
+
+        window_start = now - window['seconds']
+        if snapshot['inactivity_start_time']:
+            inactive += max(0.0, now - max(to_rolling_seconds(snapshot['inactivity_start_time']), window_start))
+
+        covered = now - max(window_start, window['started'])
+        results.append((label, min(100.0, inactive / covered * 100) if covered > 0 else 0.0))
+    return results
+
+
+# Inactive fraction of each minute from first_minute to last_minute (minutes since
+# ROLLING_ORIGIN), read from the 1 h rolling window, whose buckets are one minute wide,
+# plus the open period. None for minutes out of the window or not tracked at all.
+def minute_inactivity(snapshot, first_minute, last_minute):
+    window = next((window for window in snapshot.get('rolling_windows') or () if window['width'] == 60), None)
+    if window is None:
+        return [None] * (last_minute - first_minute + 1)
+    slots = window['slots']
+    now = to_rolling_seconds(snapshot['now'])
+    open_start = snapshot['inactivity_start_time']
+    open_start = to_rolling_seconds(open_start) if open_start else None
+
+    fractions = []
+    for minute in range(first_minute, last_minute + 1):
+        start = minute * 60
+        covered = min(now, start + 60) - max(start, window['started'])
+        if covered <= 0 or minute <= window['head'] - len(slots):
+            fractions.append(None)
+            continue
+        # Buckets ahead of a lagging head are stale until the head moves on
+        inactive = slots[minute % len(slots)] if minute <= window['head'] else 0.0
+        if open_start is not None:
+            inactive += max(0.0, min(now, start + 60) - max(open_start, start))
+        fractions.append(min(1.0, inactive / covered))
+    return fractions
+
+
+class HourlyTotals:
+    """Inactive seconds and period counts for each hour of one day, in fixed-size arrays."""
+
+    def __init__(self, day=None):
+        self.day = day
+        self.inactive_seconds = array('d', [0.0]) * 24
+        self.period_counts = array('I', [0]) * 24
+
+    def reset(self, day):
+        self.day = day
+        for hour in range(24):
+            self.inactive_seconds[hour] = 0.0
+            self.period_counts[hour] = 0
+
+    # Add a closed period, split at hour boundaries. Parts outside the current day are ignored.
+    def fold(self, start, end):
+        cursor = start
+        while cursor < end:
+            part_end = min(end, cursor.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1))
+            if cursor.date() == self.day:
+                self.inactive_seconds[cursor.hour] += (part_end - cursor).total_seconds()
+                self.period_counts[cursor.hour] += 1
+            cursor = part_end
+
+
+class DayAggregate:
+    """Inactivity of one day: its bucket CSVs merged with a tracker's live periods.
+
+    The tracker only keeps the periods of the current bucket, so earlier buckets of the
+    day, including those of sessions before a restart, come from the CSVs. Each CSV is
+    parsed once and again only when its size or mtime changes; the finished buckets are
+    merged once, so a refresh merges just the live tail of the snapshot. The tail starts
+    at the current bucket, or earlier while the tracker still holds one not rolled over.
+    """
+
+    def __init__(self, csv_dir=None):
+        self.csv_dir = csv_dir
+        self.day = None
+        self.bucket_minutes = BUCKET_MINUTES
+        self.buckets = {}  # bucket index -> ((mtime_ns, size) or None, periods of its CSV)
+        self.closed_periods = []  # merged periods of the buckets before closed_bucket
+        self.closed_seconds = 0.0
+        self.closed_bucket = 0
+        self.checked = None  # time.monotonic() of the last check of the finished buckets
+
+    def bucket_start(self, index):
+        return datetime.combine(self.day, datetime.min.time()) + timedelta(minutes=index * self.bucket_minutes)
+
+    def bucket_index(self, moment):
+        return (moment.hour * 60 + moment.minute) // self.bucket_minutes
+
+    # Load what changed on disk for the day of the snapshot; returns the first bucket of the tail
+    def update(self, snapshot):
+        now = snapshot['now']
+        csv_dir = snapshot.get('hourly_csv_dir') or self.csv_dir
+        bucket_minutes = snapshot.get('bucket_minutes', BUCKET_MINUTES)
+        if now.date() != self.day or csv_dir != self.csv_dir or bucket_minutes != self.bucket_minutes:
+            self.csv_dir = csv_dir
+            self.day = now.date()
+            self.bucket_minutes = bucket_minutes
+            self.buckets = {}
+            self.closed_periods = []
+            self.closed_seconds = 0.0
+            self.closed_bucket = 0
+            self.checked = None
+
+        day_start = datetime.combine(self.day, datetime.min.time())
+        current = self.bucket_index(now)
+        tail = current
+        for start, _ in snapshot['inactivity_periods']:
+            tail = min(tail, self.bucket_index(max(start, day_start)))
+
+        recheck = self.checked is None or time.monotonic() - self.checked >= DAY_RECHECK_INTERVAL
+        if recheck:
+            self.checked = time.monotonic()
+        # Buckets that were part of the tail until now may have been written since
+        changed = False
+        for index in range(current + 1):
+            if index < min(tail, self.closed_bucket) and index in self.buckets and not recheck:
+                continue
+            if self.load_bucket(index) and index < tail:
+                changed = True
+
+        if changed or tail != self.closed_bucket:
+            self.closed_periods = merge_periods(
+                period for index in range(tail) for period in self.buckets[index][1])
+            self.closed_seconds = sum((end - start).total_seconds() for start, end in self.closed_periods)
+            self.closed_bucket = tail
+        return tail
+
+    # (Re)read one bucket's CSV when it changed; returns whether it did
+    def load_bucket(self, index):
+        file_name = bucket_csv_path(self.csv_dir, self.bucket_start(index), self.bucket_minutes)
+        try:
+            stat = os.stat(file_name)
+            key = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            key = None
+        cached = self.buckets.get(index)
+        if cached and cached[0] == key:
+            return False
+
+        periods = []
+        if key:
+            try:
+                periods = read_periods_csv(file_name)
+            except (OSError, ValueError) as e:
+                logging.error(f"Error loading {file_name}: {str(e)}")
+        self.buckets[index] = (key, periods)
+        return True
+
+    # Merged periods from the start of the tail bucket to now: CSVs, live periods and the open one
+    def tail_periods(self, snapshot, tail):
+        now = snapshot['now']
+        periods = [period for index in range(tail, self.bucket_index(now) + 1) for period in self.buckets[index][1]]
+        periods += snapshot['inactivity_periods']
+        if snapshot['inactivity_start_time']:
+            periods.append((snapshot['inactivity_start_time'], now))
+        return merge_periods(clip_periods(periods, self.bucket_start(tail), now))
+
+    # The day's inactivity up to the snapshot's time, as sorted periods
+    def periods(self, snapshot):
+        tail = self.update(snapshot)
+        return self.closed_periods + self.tail_periods(snapshot, tail)
+
+    # Inactive seconds of the day up to the snapshot's time
+    def inactive_seconds(self, snapshot):
+        tail = self.update(snapshot)
+        periods = self.tail_periods(snapshot, tail)
+        return self.closed_seconds + sum((end - start).total_seconds() for start, end in periods)
+
+
+# Render the chart of one bucket's CSV, with the hour label used so far for hourly
+# buckets. With events_dir, the bucket's input events are drawn as an intensity overlay.
+# save_path and size are passed on to generate_hourly_bar_chart; returns the path written or None.
+def render_hour_chart(hourly_csv_name, hour_end, charts_dir, events_dir=None, save_path=None, size=None,
+                      bucket_minutes=BUCKET_MINUTES):
+    hour_start = hour_end - timedelta(minutes=bucket_minutes)
+    previous_hour = hour_start.hour
+    hour_date = hour_start.date()
+    if bucket_minutes == 1440:
+        title = hour_date.strftime("%d %B %Y")
+    elif bucket_minutes != 60:
+        title = f'{hour_start:%H:%M} to {hour_end:%H:%M} ----- {hour_date.strftime("%d %B %Y")}'
+    elif previous_hour == 23:
+        title = f'23rd hour ------ {hour_date.strftime("%d %B %Y")}'
+    else:
+        title = f'{previous_hour} to {(previous_hour + 1) % 24} ----- {hour_date.strftime("%d %B %Y")}'
+
+    # Use the exact bucket for chart generation
+    import TrackerCharts
+    events_file = bucket_csv_path(events_dir, hour_start, bucket_minutes) if events_dir else None
+    return TrackerCharts.generate_hourly_bar_chart(hourly_csv_name, title, (previous_hour + 1) % 24, hour_end,
+                                                   charts_dir=charts_dir, events_file=events_file,
+                                                   save_path=save_path, size=size or TrackerCharts.CHART_SIZE,
+                                                   bucket_minutes=bucket_minutes)
+
+
+def hour_floor(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+# Buckets start at midnight and tile the day, so their length must divide 1440 minutes
+def check_bucket_minutes(bucket_minutes):
+    if not isinstance(bucket_minutes, int) or bucket_minutes <= 0 or 1440 % bucket_minutes:
+        raise ValueError(f"Bucket size must be a whole number of minutes dividing a day, not {bucket_minutes}")
+    return bucket_minutes
+
+
+# Saved Settings tab values (SETTINGS_KEYS) as ActivityTracker keyword arguments, {} when none
+def load_settings(file_name=SETTINGS_FILE):
+    try:
+        with open(file_name) as f:
+            saved = json.load(f)
+        settings = {key: saved[key] for key in SETTINGS_KEYS if key in saved}
+        if 'bucket_minutes' in settings:
+            check_bucket_minutes(settings['bucket_minutes'])
+        return settings
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        logging.error(f"Error reading settings {file_name}, using the defaults: {str(e)}")
+        return {}
+
+
+def save_settings(settings, file_name=SETTINGS_FILE):
+    temp_name = f"{file_name}.tmp"
+    with open(temp_name, 'w') as f:
+        json.dump({key: settings[key] for key in SETTINGS_KEYS if settings.get(key) is not None}, f, indent=2)
+    os.replace(temp_name, file_name)
+
+
+# Start of the bucket of bucket_minutes containing moment
+def bucket_floor(moment, bucket_minutes=BUCKET_MINUTES):
+    minute = (moment.hour * 60 + moment.minute) // bucket_minutes * bucket_minutes
+    return moment.replace(hour=minute // 60, minute=minute % 60, second=0, microsecond=0)
+
+
+# Inactive seconds in the current hour of a snapshot, including the open period
+def current_hour_inactive_seconds(snapshot):
+    now = snapshot['now']
+    total = snapshot['hourly_inactive_seconds'][now.hour]
+    if snapshot['inactivity_start_time']:
+        hour_start = now.replace(minute=0, second=0, microsecond=0)
+        total += (now - max(snapshot['inactivity_start_time'], hour_start)).total_seconds()
+    return total
+
+
+# Total inactivity of a snapshot, including the open period
+def session_inactive_seconds(snapshot):
+    total = snapshot['closed_inactive_seconds']
+    if snapshot['inactivity_start_time']:
+        # An open period from before a reset counts from the session start
+        session_start = snapshot['session_start'] + snapshot.get('time_offset', timedelta(0))
+        total += max(0.0, (snapshot['now'] - max(snapshot['inactivity_start_time'], session_start)).total_seconds())
+    return total
+
+
+# Clip periods to [range_start, range_end), dropping those outside it
+def clip_periods(periods, range_start, range_end):
+    clipped = []
+    for start, end in periods:
+        if start < range_end and end > range_start:
+            clipped.append((max(start, range_start), min(end, range_end)))
+    return clipped
+
+
+# Merge overlapping or touching periods into a sorted, disjoint list
+def merge_periods(periods):
+    merged = []
+    for start, end in sorted(periods):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def hourly_csv_path(csv_dir, hour_start):
+    return os.path.join(csv_dir, f'{hour_start.strftime("%Y-%m-%d_%H")}.csv')
+
+
+# Hourly buckets keep their 2024-05-01_13.csv names, day buckets are 2024-05-01.csv and
+# other lengths are part of the name, e.g. 2024-05-01_1315_15m.csv
+def bucket_csv_path(csv_dir, bucket_start, bucket_minutes=BUCKET_MINUTES):
+    if bucket_minutes == 60:
+        return hourly_csv_path(csv_dir, bucket_start)
+    if bucket_minutes == 1440:
+        return os.path.join(csv_dir, f'{bucket_start.strftime("%Y-%m-%d")}.csv')
+    return os.path.join(csv_dir, f'{bucket_start.strftime("%Y-%m-%d_%H%M")}_{bucket_minutes}m.csv')
+
+
+# Hourly CSV file names look like 2024-05-01_13.csv
+def parse_hourly_csv_name(name):
+    if not name.endswith('.csv') or len(name) != 17:
+        return None
+    try:
+        return datetime.strptime(name[:-4], "%Y-%m-%d_%H")
+    except ValueError:
+        return None
+
+
+# (start, minutes) of a file named by bucket_csv_path, or None for other names
+def parse_bucket_csv_name(name):
+    if not name.endswith('.csv'):
+        return None
+    stem = name[:-4]
+    try:
+        if len(stem) == 13:
+            return datetime.strptime(stem, "%Y-%m-%d_%H"), 60
+        if len(stem) == 10:
+            return datetime.strptime(stem, "%Y-%m-%d"), 1440
+        head, _, length = stem.rpartition('_')
+        if len(head) == 15 and length.endswith('m') and length[:-1].isdigit() and int(length[:-1]) > 0:
+            return datetime.strptime(head, "%Y-%m-%d_%H%M"), int(length[:-1])
+    except ValueError:
+        pass
+    return None
+
+
+# The bucket CSVs of csv_dir between two dates (inclusive, default all) by day, as sorted
+# (start, minutes, file name) lists. The directory is listed once.
+def scan_bucket_csvs(csv_dir, first_date=None, last_date=None):
+    days = {}
+    try:
+        entries = list(os.scandir(csv_dir))
+    except FileNotFoundError:
+        return days
+    for entry in entries:
+        bucket = parse_bucket_csv_name(entry.name)
+        if bucket is None or (first_date and bucket[0].date() < first_date) or \
+                (last_date and bucket[0].date() > last_date):
+            continue
+        days.setdefault(bucket[0].date(), []).append((bucket[0], bucket[1], entry.name))
+    for buckets in days.values():
+        buckets.sort()
+    return days
+
+
+# Summaries of hourly files, cached by path, size and mtime
+_csv_summary_cache = {}
+
+
+def cached_summary(file_name, summarize):
+    stat = os.stat(file_name)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _csv_summary_cache.get(file_name)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    summary = summarize(file_name)
+    _csv_summary_cache[file_name] = (key, summary)
+    return summary
+
+
+# (inactive seconds, period count) of one hourly CSV
+def summarize_csv(file_name):
+    def summarize(file_name):
+        periods = read_periods_csv(file_name)
+        return (sum((end - start).total_seconds() for start, end in periods), len(periods))
+    return cached_summary(file_name, summarize)
+
+
+# Event totals by type of one hourly events CSV
+def summarize_events_csv(file_name):
+    def summarize(file_name):
+        totals = [0] * len(EVENT_TYPES)
+        for _, counts in read_event_counts(file_name):
+            totals = [total + count for total, count in zip(totals, counts)]
+        return tuple(totals)
+    return cached_summary(file_name, summarize)
+
+
+# Summaries of every bucket CSV (hourly or any other bucket size, see bucket_csv_path)
+# between two dates (inclusive), in time order; 'hour_start' is the bucket's start and
+# 'bucket_minutes' its length. The directory is listed once and unchanged files are
+# served from the cache. With bitmaps_dir, each bucket also gets the seconds with input
+# from the activity bitmap, and with events_dir its input event totals by type
+# (EVENT_TYPES order).
+def load_hourly_summaries(csv_dir, first_date, last_date, bitmaps_dir=None, events_dir=None):
+    summaries = []
+    active_by_day = {}
+    try:
+        entries = list(os.scandir(csv_dir))
+    except FileNotFoundError:
+        return summaries
+
+    for entry in entries:
+        bucket = parse_bucket_csv_name(entry.name)
+        if bucket is None or not (first_date <= bucket[0].date() <= last_date):
+            continue
+        hour_start, bucket_minutes = bucket
+        try:
+            inactive_seconds, period_count = summarize_csv(entry.path)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error loading {entry.path}: {str(e)}")
+            continue
+        summaries.append({
+            'hour_start': hour_start,
+            'inactive_minutes': inactive_seconds / 60,
+            'inactive_percentage': (inactive_seconds / (bucket_minutes * 60)) * 100,
+            'bucket_minutes': bucket_minutes,
+            'periods': period_count,
+            'active_seconds': None,
+            'events': None,
+        })
+        if events_dir:
+            events_file = os.path.join(events_dir, entry.name)
+            if os.path.exists(events_file):
+                try:
+                    summaries[-1]['events'] = summarize_events_csv(events_file)
+                except (OSError, ValueError) as e:
+                    logging.error(f"Error loading {events_file}: {str(e)}")
+        if bitmaps_dir:
+            key = (hour_start.date(), bucket_minutes)
+            if key not in active_by_day:
+                active_by_day[key] = bitmap_bucket_active_seconds(bitmaps_dir, *key)
+            if active_by_day[key] is not None:
+                index = (hour_start.hour * 60 + hour_start.minute) // bucket_minutes
+                summaries[-1]['active_seconds'] = active_by_day[key][index]
+
+    summaries.sort(key=lambda summary: summary['hour_start'])
+    return summaries
+
+
+# Fold bucket summaries (load_hourly_summaries) into one row per day, for the Daily statistics view
+def daily_summary_rows(summaries):
+    days = {}
+    for summary in summaries:
+        day = datetime.combine(summary['hour_start'].date(), datetime.min.time())
+        row = days.setdefault(day, {'start': day, 'label': day.strftime('%Y-%m-%d %a'),
+                                    'hours': 0, 'inactive_minutes': 0.0, 'periods': 0,
+                                    'active_seconds': None, 'events': None})
+        row['hours'] += summary['bucket_minutes'] / 60
+        row['inactive_minutes'] += summary['inactive_minutes']
+        row['periods'] += summary['periods']
+        if summary['active_seconds'] is not None:
+            row['active_seconds'] = (row['active_seconds'] or 0) + summary['active_seconds']
+        if summary['events'] is not None:
+            row['events'] = tuple(total + count for total, count
+                                  in zip(row['events'] or (0,) * len(summary['events']), summary['events']))
+    rows = list(days.values())
+    for row in rows:
+        row['inactive_percentage'] = row['inactive_minutes'] / (row['hours'] * 60) * 100
+    return rows
+
+
+def activity_gaps_path(gaps_dir, day):
+    return os.path.join(gaps_dir, f'{day.strftime("%Y-%m-%d")}.csv')
+
+
+# Append input gaps to the file of the day each gap starts on
+def append_activity_gaps(gaps_dir, gaps):
+    try:
+        os.makedirs(gaps_dir, exist_ok=True)
+        by_day = {}
+        for start, end in gaps:
+            by_day.setdefault(start.date(), []).append((start, end))
+        for day, day_gaps in by_day.items():
+            file_name = activity_gaps_path(gaps_dir, day)
+            new_file = not os.path.exists(file_name)
+            with open(file_name, 'a', newline='') as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(['Gap Start', 'Gap End'])
+                for start, end in day_gaps:
+                    writer.writerow([start.strftime(CSV_TIME_FORMAT), end.strftime(CSV_TIME_FORMAT)])
+    except Exception as e:
+        logging.error(f"Error writing activity gaps: {str(e)}")
+
+
+# Input gaps overlapping the given dates (inclusive). A gap is filed under the day it
+# starts, so the day before the range is read too.
+def read_activity_gaps(gaps_dir, first_date, last_date):
+    gaps = []
+    day = first_date - timedelta(days=1)
+    while day <= last_date:
+        file_name = activity_gaps_path(gaps_dir, day)
+        if os.path.exists(file_name):
+            gaps.extend(read_periods_csv(file_name))
+        day += timedelta(days=1)
+    range_start = datetime.combine(first_date, datetime.min.time())
+    range_end = datetime.combine(last_date + timedelta(days=1), datetime.min.time())
+    return sorted((start, end) for start, end in gaps if start < range_end and end > range_start)
+
+
+def activity_bitmap_path(bitmaps_dir, day):
+    return os.path.join(bitmaps_dir, f'{day.strftime("%Y-%m-%d")}.bits')
+
+
+# Seconds with input in each bucket of bucket_minutes of a day, or None when the day has
+# no bitmap. Buckets need not start on a byte, so the day's bits are read as one integer.
+def bitmap_bucket_active_seconds(bitmaps_dir, day, bucket_minutes=BUCKET_MINUTES):
+    try:
+        with open(activity_bitmap_path(bitmaps_dir, day), 'rb') as f:
+            data = f.read(BITMAP_ACTIVE_BYTES)
+    except FileNotFoundError:
+        return None
+    bits = int.from_bytes(data.ljust(BITMAP_ACTIVE_BYTES, b'\0'), 'big')
+    width = bucket_minutes * 60
+    mask = (1 << width) - 1
+    return [bin((bits >> (86400 - (index + 1) * width)) & mask).count('1') for index in range(1440 // bucket_minutes)]
+
+
+# Write the per-minute event counts of one hour. With merge, counts already in the file
+# (from an earlier session in the same hour) are added.
+def write_event_counts(file_name, rows, merge=True):
+    try:
+        if merge and os.path.exists(file_name):
+            earlier = dict(read_event_counts(file_name))
+            rows = [(minute, [count + earlier_count for count, earlier_count
+                              in zip(counts, earlier.get(minute, [0] * len(EVENT_TYPES)))])
+                    for minute, counts in rows]
+
+        os.makedirs(os.path.dirname(file_name) or '.', exist_ok=True)
+        temp_name = f"{file_name}.tmp"
+        with open(temp_name, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Minute'] + [event_type.capitalize() for event_type in EVENT_TYPES])
+            for minute, counts in rows:
+                writer.writerow([minute.strftime('%Y-%m-%d %H:%M')] + list(counts))
+        os.replace(temp_name, file_name)
+    except Exception as e:
+        logging.error(f"Error writing event counts: {str(e)}")
+
+
+# (minute start, counts by type) rows of an hourly events CSV
+def read_event_counts(file_name):
+    rows = []
+    with open(file_name, newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) > len(EVENT_TYPES):
+                rows.append((datetime.strptime(row[0], '%Y-%m-%d %H:%M'),
+                             [int(value) for value in row[1:len(EVENT_TYPES) + 1]]))
+    return rows
+
+
+# Read the periods of an hourly CSV written by generate_csv_log
+def read_periods_csv(file_name):
+    periods = []
+    with open(file_name, newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) >= 2 and row[0] and row[1]:
+                periods.append((datetime.fromisoformat(row[0]), datetime.fromisoformat(row[1])))
+    return periods
+
+
+# Function to generate CSV log. With merge, periods already in the file (from an
+# earlier session in the same hour) are kept.
+def generate_csv_log(inactivity_periods, file_name, merge=False):
+    try:
+        if merge and os.path.exists(file_name):
+            inactivity_periods = merge_periods(read_periods_csv(file_name) + list(inactivity_periods))
+
+        # Write to a temporary file first so readers never see a half-written CSV
+        temp_name = f"{file_name}.tmp"
+        with open(temp_name, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Start Time', 'End Time'])
+            for start, end in inactivity_periods:
+                writer.writerow([start.strftime(CSV_TIME_FORMAT), end.strftime(CSV_TIME_FORMAT)])
+        os.replace(temp_name, file_name)
+
+        if not inactivity_periods:
+            logging.info(f"Empty CSV log created: {file_name}")
+        else:
+            logging.info(f"CSV log saved: {file_name}")
+
+    except Exception as e:
+        logging.error(f"Error generating CSV log: {str(e)}")
@@ -0,0 +1,208 @@
+"""Headless inactivity tracker for kiosks and user services. Does not import tkinter.
+
+Usage: python TrackerDaemon.py [--threshold SECONDS] [--csv-dir DIR] [--charts-dir DIR] [--no-charts]
+                               [--bucket-minutes MINUTES] [--dashboard DIR]
+                               [--lazy-charts [--chart-cache-dir DIR] [--chart-cache-mb MB]]
+                               [--serve [--socket PATH | --port PORT]] [--profile-seconds SECONDS]
+
+With --serve the daemon also accepts GUI clients (see TrackerIPC), so the tracker GUI
+and the desktop widget share one set of input hooks and one state.
+
+With --dashboard the static HTML dashboard (see TrackerDashboard) is brought up to
+date in the background after every rollover, and once more on shutdown.
+
+SIGUSR1 starts a profiling window (see TrackerProfiler) and a second SIGUSR1 ends it
+early; the reports are written next to the log file.
+"""
+import os
+import sys
+import time
+import signal
+import argparse
+import threading
+import logging
+from TrackerCore import ActivityTracker, INACTIVITY_THRESHOLD, CHART_CACHE_MB, BUCKET_MINUTES, check_bucket_minutes
+from TrackerIPC import StateServer, default_address, TCP_PORT
+from TrackerMetrics import metrics
+from TrackerProfiler import profiler
+
+
+def bucket_minutes_arg(text):
+    try:
+        return check_bucket_minutes(int(text))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Headless inactivity tracker")
+    parser.add_argument('--threshold', type=int, default=INACTIVITY_THRESHOLD,
+                        help="seconds without input before a period counts as inactive")
+    parser.add_argument('--bucket-minutes', type=bucket_minutes_arg, default=BUCKET_MINUTES,
+                        help="length of the periods written to one CSV and chart, dividing a day: "
+                             "e.g. 15, 60 (default) or 1440 for one file per day")
+    parser.add_argument('--csv-dir', default='hourly_csv', help="directory for the hourly CSV logs")
+    parser.add_argument('--charts-dir', default='hourly_charts', help="directory for the hourly charts")
+    parser.add_argument('--no-charts', action='store_true',
+                        help="skip chart rendering at rollover (matplotlib is then never imported)")
+    parser.add_argument('--lazy-charts', action='store_true',
+                        help="render charts only when a client asks for one, through the chart cache")
+    parser.add_argument('--chart-cache-dir', default='chart_cache', help="directory of the on-demand chart cache")
+    parser.add_argument('--chart-cache-mb', type=int, default=CHART_CACHE_MB,
+                        help=f"disk budget of the chart cache; least recently used charts go first "
+                             f"(default: {CHART_CACHE_MB})")
+    parser.add_argument('--dashboard', metavar='DIR',
+                        help="refresh the static HTML dashboard in DIR after every rollover")
+    parser.add_argument('--gaps-dir', default='activity_gaps',
+                        help="directory for the raw input-gap stream used by threshold sweeps")
+    parser.add_argument('--bitmaps-dir', default='activity_bitmaps',
+                        help="directory for the per-second activity bitmaps")
+    parser.add_argument('--events-dir', default='hourly_events',
+                        help="directory for the per-minute input event counts")
+    parser.add_argument('--status-file', default='program_status.txt', help="status file to keep up to date")
+    parser.add_argument('--log-file', default='tracker_daemon.log', help="log file")
+    parser.add_argument('--profile-seconds', type=float, default=60,
+                        help="length of a profiling window started with SIGUSR1 (default: 60)")
+    parser.add_argument('--metrics-file', default='tracker_metrics.json',
+                        help="JSON file the latency histograms are written to on shutdown")
+    parser.add_argument('--serve', action='store_true', help="accept GUI and widget clients on a local socket")
+    parser.add_argument('--socket', help="Unix socket path to listen on (default: ~/.orwelly_tracker.sock)")
+    parser.add_argument('--port', type=int, help=f"loopback TCP port to listen on (default on Windows: {TCP_PORT})")
+    parser.add_argument('--no-autostart', action='store_true', help="wait for a client to start tracking")
+    parser.add_argument('--stop-when-detached', action='store_true',
+                        help="stop tracking when the last client detaches")
+    parser.add_argument('--idle-exit', type=float, default=0,
+                        help="exit after this many seconds with no clients and tracking stopped (0 = never)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Logging setup
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[
+                            logging.FileHandler(args.log_file),
+                            logging.StreamHandler()
+                        ])
+
+    tracker = ActivityTracker(threshold=args.threshold,
+                              bucket_minutes=args.bucket_minutes,
+                              hourly_csv_dir=args.csv_dir,
+                              hourly_charts_dir=args.charts_dir,
+                              status_file=args.status_file,
+                              generate_charts=not args.no_charts,
+                              activity_gaps_dir=args.gaps_dir,
+                              activity_bitmaps_dir=args.bitmaps_dir,
+                              hourly_events_dir=args.events_dir,
+                              lazy_charts=args.lazy_charts,
+                              chart_cache_dir=args.chart_cache_dir,
+                              chart_cache_mb=args.chart_cache_mb)
+    tracker.add_observer(lambda event, data: logging.info(data['message']) if event == 'log' else None)
+
+    dashboard_lock = threading.Lock()
+    dashboard_pending = threading.Event()  # a rollover the dashboard has not been refreshed for
+    if args.dashboard:
+        from TrackerDashboard import build_dashboard
+
+        # Off the tracking thread, with dashboard_lock held. Rollovers during a refresh set
+        # dashboard_pending, so the loop refreshes again before giving up the lock.
+        def refresh_dashboard():
+            while True:
+                try:
+                    while dashboard_pending.is_set():
+                        dashboard_pending.clear()
+                        # Read at refresh time, as a client may have moved the CSVs with configure
+                        build_dashboard(tracker.hourly_csv_dir, args.dashboard)
+                except Exception as e:
+                    logging.error(f"Error refreshing dashboard: {str(e)}")
+                finally:
+                    dashboard_lock.release()
+                # A rollover between the last check and the release found the lock still held
+                if not dashboard_pending.is_set() or not dashboard_lock.acquire(blocking=False):
+                    return
+
+        def on_rollover(event, data):
+            if event != 'rollover':
+                return
+            dashboard_pending.set()
+            if dashboard_lock.acquire(blocking=False):
+                threading.Thread(target=refresh_dashboard, name='dashboard', daemon=True).start()
+        tracker.add_observer(on_rollover)
+
+    # The handler only sets the event; shutdown runs on the main thread below
+    shutdown = threading.Event()
+
+    def request_shutdown(signum, frame):
+        logging.info(f"Signal {signum} received, shutting down")
+        shutdown.set()
+
+    # SIGUSR1 toggles profiling, also on the main thread below
+    profile_toggle = threading.Event()
+    profiler.output_dir = os.path.dirname(os.path.abspath(args.log_file))
+    profiler.label = 'daemon'
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: profile_toggle.set())
+
+    signal.signal(signal.SIGTERM, request_shutdown)
+    signal.signal(signal.SIGINT, request_shutdown)
+    if hasattr(signal, 'SIGBREAK'):
+        signal.signal(signal.SIGBREAK, request_shutdown)
+
+    server = None
+    if args.serve:
+        if args.socket:
+            address = args.socket
+        elif args.port:
+            address = ('127.0.0.1', args.port)
+        else:
+            address = default_address()
+        server = StateServer(tracker, address)
+        try:
+            server.start()
+        except OSError as e:
+            logging.error(f"Cannot listen on {address}: {str(e)}")
+            return 1
+
+        if args.stop_when_detached:
+            def on_client_count(count):
+                if count == 0 and tracker.is_running:
+                    logging.info("Last client detached, stopping tracking")
+                    tracker.stop(flush_partial_hour=True)
+            server.on_client_count = on_client_count
+
+    if not args.no_autostart:
+        tracker.start()
+
+    idle_since = time.monotonic()
+    try:
+        # Wake up regularly so signals are handled promptly on every platform
+        while not shutdown.wait(1):
+            if profile_toggle.is_set():
+                profile_toggle.clear()
+                profiler.toggle(args.profile_seconds)
+            if not args.idle_exit:
+                continue
+            if tracker.is_running or (server and server.client_count()):
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since >= args.idle_exit:
+                logging.info("No clients and tracking stopped, exiting")
+                break
+    finally:
+        # Close the open inactivity period and write the current hour before exiting
+        tracker.stop(flush_partial_hour=True)
+        if args.dashboard:
+            # Wait for a refresh in progress and cover rollovers it has not seen yet
+            dashboard_lock.acquire()
+            refresh_dashboard()
+        if server:
+            server.stop()
+        profiler.stop()
+        metrics.dump(args.metrics_file)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
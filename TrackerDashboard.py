@@ -0,0 +1,407 @@
+"""Static HTML dashboard of the inactivity history.
+
+build_dashboard writes an index and one page per day, ISO week and month under the
+output directory. Each page is a single self-contained HTML file with inline CSS, SVG
+timelines and summary tables, drawn from the bucket CSVs (of any bucket size).
+
+dashboard_manifest.json keeps the SHA-256 and totals of every CSV, reused while the
+file's mtime and size are unchanged, and the hash of the inputs of every page. A run
+only rewrites the pages whose hash changed (or whose file is missing) and deletes the
+pages whose data is gone, so refreshing a year of history after a rollover costs
+little more than listing the CSV directory.
+"""
+import os
+import json
+import html
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from TrackerCore import parse_bucket_csv_name, read_periods_csv, clip_periods, merge_periods
+
+MANIFEST_NAME = 'dashboard_manifest.json'
+# Bump whenever the pages change, so the next run rewrites all of them
+DASHBOARD_VERSION = 1
+READ_CHUNK = 1 << 20
+TIMELINE_LABEL = 150  # SVG units left of the timelines; one unit per minute of the day after it
+TIMELINE_TOP = 30
+TIMELINE_ROW = 32
+BAR_CHART_HEIGHT = 240
+
+PAGE_STYLE = """
+body { font-family: Helvetica, Arial, sans-serif; margin: 2em auto; max-width: 1200px; padding: 0 1em;
+       background: #1b1b1b; color: #dddddd; }
+a { color: #ff6f8e; }
+nav { font-size: 0.9em; margin-bottom: 1em; }
+h1 { color: #c0c0c0; }
+h2 { color: #c0c0c0; margin-top: 1.5em; }
+.summary { font-size: 1.2em; }
+.summary b { color: yellow; }
+svg { width: 100%; height: auto; background: #111111; font-size: 18px; }
+svg text { fill: #cccccc; }
+svg .tick { stroke: #444444; stroke-dasharray: 4 4; }
+svg .logged { fill: #3a3a3a; }
+svg .inactive { fill: #e60039; }
+table { border-collapse: collapse; margin-top: 0.5em; }
+th, td { padding: 0.25em 0.8em; border-bottom: 1px solid #333333; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+th { color: #aaaaaa; font-weight: normal; }
+footer { margin-top: 2em; font-size: 0.8em; color: #777777; }
+"""
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def week_key(day):
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def day_page(day):
+    return f"days/{day.isoformat()}.html"
+
+
+def week_page(key):
+    return f"weeks/{key}.html"
+
+
+def month_page(key):
+    return f"months/{key}.html"
+
+
+# Every bucket CSV in csv_dir as {name: (start, minutes, mtime_ns, size)}
+def scan_csv_dir(csv_dir):
+    files = {}
+    try:
+        entries = list(os.scandir(csv_dir))
+    except FileNotFoundError:
+        return files
+    for entry in entries:
+        parsed = parse_bucket_csv_name(entry.name)
+        if parsed is None or not entry.is_file():
+            continue
+        stat = entry.stat()
+        files[entry.name] = (parsed[0], parsed[1], stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def file_digest(file_name):
+    digest = hashlib.sha256()
+    with open(file_name, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# The periods of a bucket's CSV, clipped to the bucket
+def bucket_periods(csv_dir, bucket):
+    bucket_end = bucket['start'] + timedelta(minutes=bucket['minutes'])
+    return clip_periods(read_periods_csv(os.path.join(csv_dir, bucket['name'])), bucket['start'], bucket_end)
+
+
+def read_manifest(file_name):
+    try:
+        with open(file_name) as f:
+            manifest = json.load(f)
+        if manifest.get('version') == DASHBOARD_VERSION:
+            return manifest
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, AttributeError) as e:
+        logging.error(f"Error reading dashboard manifest {file_name}, rebuilding it: {str(e)}")
+    return {}
+
+
+def write_file(file_name, text):
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    temp_name = f"{file_name}.tmp"
+    with open(temp_name, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_name, file_name)
+
+
+# Hash of everything a page is drawn from: its kind and key, and the name and content
+# hash of each of its CSVs
+def page_hash(kind, key, buckets):
+    digest = hashlib.sha256(f"{DASHBOARD_VERSION}|{kind}|{key}|".encode())
+    for bucket in buckets:
+        digest.update(f"{bucket['name']}={bucket['sha256']}\n".encode())
+    return digest.hexdigest()
+
+
+# (logged seconds, inactive seconds, period count) of a list of buckets
+def totals(buckets):
+    return (sum(bucket['minutes'] for bucket in buckets) * 60,
+            sum(bucket['inactive_seconds'] for bucket in buckets),
+            sum(bucket['periods'] for bucket in buckets))
+
+
+def percentage(inactive_seconds, logged_seconds):
+    return f"{inactive_seconds / logged_seconds * 100:.1f}%" if logged_seconds else "-"
+
+
+def summary_line(buckets):
+    logged, inactive, periods = totals(buckets)
+    return (f'<p class="summary">Inactive <b>{format_duration(inactive)}</b> of {format_duration(logged)} logged '
+            f'({percentage(inactive, logged)}), {periods} periods</p>')
+
+
+def link(text, href):
+    return f'<a href="{html.escape(href)}">{html.escape(text)}</a>'
+
+
+def table(headers, rows):
+    head = ''.join(f'<th>{header}</th>' for header in headers)
+    body = '\n'.join('<tr>' + ''.join(f'<td>{cell}</td>' for cell in row) + '</tr>' for row in rows)
+    return f'<table>\n<tr>{head}</tr>\n{body}\n</table>'
+
+
+def render_page(title, links, body):
+    nav = ' | '.join(link(text, href) for text, href in links)
+    return (f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1">\n'
+            f'<title>{html.escape(title)}</title>\n<style>{PAGE_STYLE}</style>\n</head>\n<body>\n'
+            f'<nav>{nav}</nav>\n<h1>{html.escape(title)}</h1>\n{body}\n'
+            f'<footer>Generated {datetime.now():%Y-%m-%d %H:%M}</footer>\n</body>\n</html>\n')
+
+
+# One timeline per (label, day, buckets, periods) row: logged buckets in grey and
+# inactivity periods in red, one SVG unit per minute
+def timeline_svg(rows):
+    height = TIMELINE_TOP + len(rows) * TIMELINE_ROW
+    parts = [f'<svg viewBox="0 0 {TIMELINE_LABEL + 1440} {height}" role="img">']
+    for hour in range(0, 25, 3):
+        x = TIMELINE_LABEL + hour * 60
+        parts.append(f'<line class="tick" x1="{x}" y1="{TIMELINE_TOP - 6}" x2="{x}" y2="{height}"/>')
+        anchor = 'end' if hour == 24 else 'middle'
+        parts.append(f'<text x="{x}" y="{TIMELINE_TOP - 10}" text-anchor="{anchor}">{hour:02d}:00</text>')
+
+    for index, (label, day, buckets, periods) in enumerate(rows):
+        y = TIMELINE_TOP + index * TIMELINE_ROW
+        day_start = datetime.combine(day, datetime.min.time())
+        parts.append(f'<text x="0" y="{y + TIMELINE_ROW - 10}">{html.escape(label)}</text>')
+        for bucket in buckets:
+            x = TIMELINE_LABEL + (bucket['start'] - day_start).total_seconds() / 60
+            parts.append(f'<rect class="logged" x="{x:.2f}" y="{y + 3}" width="{bucket["minutes"]}" '
+                         f'height="{TIMELINE_ROW - 6}"/>')
+        for start, end in periods:
+            x = TIMELINE_LABEL + (start - day_start).total_seconds() / 60
+            width = max((end - start).total_seconds() / 60, 0.5)
+            parts.append(f'<rect class="inactive" x="{x:.2f}" y="{y + 3}" width="{width:.2f}" '
+                         f'height="{TIMELINE_ROW - 6}"><title>{start:%H:%M:%S} - {end:%H:%M:%S} '
+                         f'({format_duration((end - start).total_seconds())})</title></rect>')
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+# Logged (grey) and inactive (red) hours per day as bars, for (label, buckets) pairs
+def bar_chart_svg(days):
+    scale_hours = max([totals(buckets)[0] / 3600 for _, buckets in days] + [1])
+    slot = 1440 / max(len(days), 1)
+    bar = slot * 0.7
+    chart_bottom = TIMELINE_TOP + BAR_CHART_HEIGHT
+    parts = [f'<svg viewBox="0 0 {TIMELINE_LABEL + 1440} {chart_bottom + 30}" role="img">']
+    for hours in range(0, int(scale_hours) + 1, max(int(scale_hours) // 4, 1)):
+        y = chart_bottom - hours / scale_hours * BAR_CHART_HEIGHT
+        parts.append(f'<line class="tick" x1="{TIMELINE_LABEL - 10}" y1="{y:.2f}" x2="{TIMELINE_LABEL + 1440}" '
+                     f'y2="{y:.2f}"/>')
+        parts.append(f'<text x="{TIMELINE_LABEL - 20}" y="{y + 6:.2f}" text-anchor="end">{hours} h</text>')
+
+    for index, (label, buckets) in enumerate(days):
+        logged, inactive, _ = totals(buckets)
+        x = TIMELINE_LABEL + index * slot + (slot - bar) / 2
+        logged_height = logged / 3600 / scale_hours * BAR_CHART_HEIGHT
+        inactive_height = inactive / 3600 / scale_hours * BAR_CHART_HEIGHT
+        parts.append(f'<rect class="logged" x="{x:.2f}" y="{chart_bottom - logged_height:.2f}" width="{bar:.2f}" '
+                     f'height="{logged_height:.2f}"/>')
+        parts.append(f'<rect class="inactive" x="{x:.2f}" y="{chart_bottom - inactive_height:.2f}" '
+                     f'width="{bar:.2f}" height="{inactive_height:.2f}"><title>{html.escape(label)}: '
+                     f'{format_duration(inactive)} inactive of {format_duration(logged)}</title></rect>')
+        parts.append(f'<text x="{x + bar / 2:.2f}" y="{chart_bottom + 22}" text-anchor="middle">'
+                     f'{html.escape(label)}</text>')
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+def day_rows(days_buckets, prefix):
+    rows = []
+    for day, buckets in days_buckets:
+        logged, inactive, periods = totals(buckets)
+        rows.append([link(f"{day:%a %d %b %Y}", prefix + day_page(day)), format_duration(logged),
+                     format_duration(inactive), percentage(inactive, logged), periods])
+    return rows
+
+
+def render_day(day, buckets, load_periods):
+    periods = merge_periods([period for bucket in buckets for period in load_periods(bucket)])
+    bucket_rows = []
+    for bucket in buckets:
+        end = bucket['start'] + timedelta(minutes=bucket['minutes'])
+        logged = bucket['minutes'] * 60
+        bucket_rows.append([f"{bucket['start']:%H:%M} - {end:%H:%M}", format_duration(logged),
+                            format_duration(bucket['inactive_seconds']),
+                            percentage(bucket['inactive_seconds'], logged), bucket['periods']])
+    period_rows = [[f"{start:%H:%M:%S}", f"{end:%H:%M:%S}", format_duration((end - start).total_seconds())]
+                   for start, end in periods]
+    body = '\n'.join([
+        summary_line(buckets),
+        timeline_svg([(f"{day:%a %d %b}", day, buckets, periods)]),
+        '<h2>Buckets</h2>',
+        table(['Bucket', 'Logged', 'Inactive', 'Inactive %', 'Periods'], bucket_rows),
+        '<h2>Inactivity Periods</h2>',
+        table(['Start', 'End', 'Duration'], period_rows),
+    ])
+    return render_page(f"{day:%A %d %B %Y}", [('Index', '../index.html'),
+                                              (f"Week {week_key(day)}", '../' + week_page(week_key(day))),
+                                              (f"{day:%B %Y}", '../' + month_page(f"{day:%Y-%m}"))], body)
+
+
+def render_week(key, days_buckets, load_periods):
+    timelines = [(f"{day:%a %d %b}", day, buckets,
+                  merge_periods([period for bucket in buckets for period in load_periods(bucket)]))
+                 for day, buckets in days_buckets]
+    all_buckets = [bucket for _, buckets in days_buckets for bucket in buckets]
+    body = '\n'.join([
+        summary_line(all_buckets),
+        timeline_svg(timelines),
+        '<h2>Days</h2>',
+        table(['Day', 'Logged', 'Inactive', 'Inactive %', 'Periods'], day_rows(days_buckets, '../')),
+    ])
+    return render_page(f"Week {key}", [('Index', '../index.html')], body)
+
+
+def render_month(key, days_buckets):
+    all_buckets = [bucket for _, buckets in days_buckets for bucket in buckets]
+    body = '\n'.join([
+        summary_line(all_buckets),
+        bar_chart_svg([(f"{day.day}", buckets) for day, buckets in days_buckets]),
+        '<h2>Days</h2>',
+        table(['Day', 'Logged', 'Inactive', 'Inactive %', 'Periods'], day_rows(days_buckets, '../')),
+    ])
+    month = datetime.strptime(key, '%Y-%m')
+    return render_page(f"{month:%B %Y}", [('Index', '../index.html')], body)
+
+
+def render_index(days, weeks, months):
+    def group_rows(groups, page, label):
+        rows = []
+        for key in sorted(groups, reverse=True):
+            buckets = [bucket for day in groups[key] for bucket in days[day]]
+            logged, inactive, periods = totals(buckets)
+            rows.append([link(label(key), page(key)), len(groups[key]), format_duration(logged),
+                         format_duration(inactive), percentage(inactive, logged), periods])
+        return rows
+
+    latest = max(days)
+    recent = sorted(days, reverse=True)[:7]
+    body = '\n'.join([
+        summary_line([bucket for buckets in days.values() for bucket in buckets]),
+        f'<p>Latest day: {link(f"{latest:%A %d %B %Y}", day_page(latest))}</p>',
+        '<h2>Recent Days</h2>',
+        table(['Day', 'Logged', 'Inactive', 'Inactive %', 'Periods'],
+              day_rows([(day, days[day]) for day in recent], '')),
+        '<h2>Months</h2>',
+        table(['Month', 'Days', 'Logged', 'Inactive', 'Inactive %', 'Periods'],
+              group_rows(months, month_page, lambda key: f"{datetime.strptime(key, '%Y-%m'):%B %Y}")),
+        '<h2>Weeks</h2>',
+        table(['Week', 'Days', 'Logged', 'Inactive', 'Inactive %', 'Periods'],
+              group_rows(weeks, week_page, lambda key: key)),
+    ])
+    return render_page("Inactivity Dashboard", [], body)
+
+
+# Bring the dashboard in out_dir up to date with the CSVs in csv_dir. With force every
+# file is hashed and every page written again. Returns counts of what was done.
+def build_dashboard(csv_dir, out_dir, force=False):
+    manifest_file = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = {} if force else read_manifest(manifest_file)
+    known_files = manifest.get('files', {})
+    known_pages = manifest.get('pages', {})
+    files = scan_csv_dir(csv_dir)
+    stats = {'files': len(files), 'hashed': 0, 'failed': 0, 'pages': 0, 'written': 0, 'removed': 0}
+
+    # Content hash and totals of every CSV, read only when its mtime or size changed
+    file_entries = {}
+    days = {}
+    for name, (start, minutes, mtime_ns, size) in sorted(files.items(), key=lambda item: item[1][:2]):
+        entry = known_files.get(name)
+        if not entry or entry['mtime_ns'] != mtime_ns or entry['size'] != size:
+            try:
+                digest = file_digest(os.path.join(csv_dir, name))
+                periods = bucket_periods(csv_dir, {'name': name, 'start': start, 'minutes': minutes})
+            except (OSError, ValueError) as e:
+                logging.error(f"Error loading {name}: {str(e)}")
+                stats['failed'] += 1
+                continue
+            entry = {'mtime_ns': mtime_ns, 'size': size, 'sha256': digest,
+                     'inactive_seconds': round(sum((end - begin).total_seconds() for begin, end in periods), 6),
+                     'periods': len(periods)}
+            stats['hashed'] += 1
+        file_entries[name] = entry
+        days.setdefault(start.date(), []).append(dict(entry, name=name, start=start, minutes=minutes))
+
+    # Periods are only read for the day and week pages being written, once per run
+    period_cache = {}
+
+    def load_periods(bucket):
+        if bucket['name'] not in period_cache:
+            try:
+                period_cache[bucket['name']] = bucket_periods(csv_dir, bucket)
+            except (OSError, ValueError) as e:
+                logging.error(f"Error loading {bucket['name']}: {str(e)}")
+                period_cache[bucket['name']] = []
+        return period_cache[bucket['name']]
+
+    weeks = {}
+    months = {}
+    for day in sorted(days):
+        weeks.setdefault(week_key(day), []).append(day)
+        months.setdefault(f"{day:%Y-%m}", []).append(day)
+
+    # page -> (hash of its inputs, function rendering it)
+    pages = {}
+    for day, buckets in days.items():
+        pages[day_page(day)] = (page_hash('day', day, buckets),
+                                lambda day=day, buckets=buckets: render_day(day, buckets, load_periods))
+    for key, week_days in weeks.items():
+        days_buckets = [(day, days[day]) for day in week_days]
+        pages[week_page(key)] = (page_hash('week', key, [bucket for day in week_days for bucket in days[day]]),
+                                 lambda key=key, days_buckets=days_buckets: render_week(key, days_buckets,
+                                                                                         load_periods))
+    for key, month_days in months.items():
+        days_buckets = [(day, days[day]) for day in month_days]
+        pages[month_page(key)] = (page_hash('month', key, [bucket for day in month_days for bucket in days[day]]),
+                                  lambda key=key, days_buckets=days_buckets: render_month(key, days_buckets))
+    if days:
+        pages['index.html'] = (page_hash('index', '', [bucket for day in sorted(days) for bucket in days[day]]),
+                               lambda: render_index(days, weeks, months))
+    stats['pages'] = len(pages)
+
+    written_pages = {}
+    for page, (digest, render) in pages.items():
+        page_file = os.path.join(out_dir, page)
+        if known_pages.get(page) != digest or not os.path.exists(page_file):
+            try:
+                write_file(page_file, render())
+            except Exception as e:
+                logging.error(f"Error writing dashboard page {page}: {str(e)}")
+                continue
+            stats['written'] += 1
+        written_pages[page] = digest
+
+    for page in known_pages:
+        if page not in pages:
+            try:
+                os.remove(os.path.join(out_dir, page))
+            except FileNotFoundError:
+                pass
+            stats['removed'] += 1
+
+    if (stats['hashed'] or stats['written'] or stats['removed'] or len(file_entries) != len(known_files)
+            or not os.path.exists(manifest_file)):
+        write_file(manifest_file, json.dumps({'version': DASHBOARD_VERSION, 'files': file_entries,
+                                              'pages': written_pages}, indent=1, sort_keys=True))
+    return stats
@@ -0,0 +1,214 @@
+"""Columnar export of the inactivity history as Parquet or Arrow IPC. Requires pyarrow.
+
+Two datasets are written under the output directory, partitioned by local date in
+hive style (periods/date=YYYY-MM-DD/part-0.parquet, hourly/date=.../part-0.parquet):
+
+  periods  one row per inactivity period from the CSVs
+  hourly   one row per logged bucket (an hour unless the tracker ran with another
+           --bucket-minutes) with its start and length, inactive seconds, period count
+           and, when the bitmaps and event counts exist, input seconds and event totals
+           by type
+
+Timestamps are int64 microseconds in UTC (the CSVs hold naive local time), and the
+user and host columns are dictionary encoded. The Arrow IPC files are uncompressed,
+so load_history can memory-map them.
+"""
+import os
+import getpass
+import socket
+import logging
+from datetime import datetime, timedelta, timezone
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs
+import pyarrow.parquet as pq
+from TrackerCore import (EVENT_TYPES, activity_bitmap_path, read_periods_csv, summarize_events_csv,
+                         bitmap_bucket_active_seconds, scan_bucket_csvs)
+
+EXPORT_FORMATS = {'parquet': 'parquet', 'arrow': 'arrow'}  # format name -> file extension
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+TIMESTAMP = pa.timestamp('us', tz='UTC')
+LABEL = pa.dictionary(pa.int32(), pa.string())
+
+PERIODS_SCHEMA = pa.schema([
+    ('user', LABEL),
+    ('host', LABEL),
+    ('start', TIMESTAMP),
+    ('end', TIMESTAMP),
+    ('duration_seconds', pa.float64()),
+    ('hour_start', TIMESTAMP),
+])
+
+HOURLY_SCHEMA = pa.schema([
+    ('user', LABEL),
+    ('host', LABEL),
+    ('hour_start', TIMESTAMP),
+    ('inactive_seconds', pa.float64()),
+    ('periods', pa.int32()),
+    ('active_seconds', pa.int32()),
+    ('bucket_minutes', pa.int32()),
+] + [(f'{event_type}_events', pa.int32()) for event_type in EVENT_TYPES])
+
+
+# Naive local time to int64 microseconds since the epoch (UTC), exactly
+def to_utc_micros(moment):
+    return (moment.astimezone(timezone.utc) - EPOCH) // timedelta(microseconds=1)
+
+
+def partition_path(out_dir, dataset, day, export_format):
+    return os.path.join(out_dir, dataset, f'date={day.isoformat()}', f'part-0.{EXPORT_FORMATS[export_format]}')
+
+
+def label_array(value, length):
+    return pa.DictionaryArray.from_arrays(pa.array([0] * length, pa.int32()), pa.array([value], pa.string()))
+
+
+# Periods and hourly tables of one day, or (None, None) when the day has no CSVs. buckets
+# is the day's (start, minutes, file name) list from scan_bucket_csvs; the directory is
+# listed when it is not given.
+def day_tables(csv_dir, day, user, host, bitmaps_dir=None, events_dir=None, buckets=None):
+    if buckets is None:
+        buckets = scan_bucket_csvs(csv_dir, day, day).get(day, [])
+    active_by_size = {}
+    starts, ends, durations, period_hours = [], [], [], []
+    hours, inactive, counts, active, lengths, events = [], [], [], [], [], []
+    for hour_start, bucket_minutes, name in buckets:
+        file_name = os.path.join(csv_dir, name)
+        try:
+            hour_periods = read_periods_csv(file_name)
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError) as e:
+            logging.error(f"Error loading {file_name}: {str(e)}")
+            continue
+        if bitmaps_dir and bucket_minutes not in active_by_size:
+            active_by_size[bucket_minutes] = bitmap_bucket_active_seconds(bitmaps_dir, day, bucket_minutes)
+        active_by_bucket = active_by_size.get(bucket_minutes)
+
+        hour_micros = to_utc_micros(hour_start)
+        for start, end in hour_periods:
+            starts.append(to_utc_micros(start))
+            ends.append(to_utc_micros(end))
+            durations.append((end - start).total_seconds())
+            period_hours.append(hour_micros)
+
+        hours.append(hour_micros)
+        inactive.append(sum((end - start).total_seconds() for start, end in hour_periods))
+        counts.append(len(hour_periods))
+        index = (hour_start.hour * 60 + hour_start.minute) // bucket_minutes
+        active.append(active_by_bucket[index] if active_by_bucket else None)
+        lengths.append(bucket_minutes)
+        events_file = os.path.join(events_dir, name) if events_dir else None
+        try:
+            events.append(summarize_events_csv(events_file) if events_file else None)
+        except FileNotFoundError:
+            events.append(None)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error loading {events_file}: {str(e)}")
+            events.append(None)
+
+    if not hours:
+        return None, None
+
+    periods = pa.Table.from_arrays([
+        label_array(user, len(starts)),
+        label_array(host, len(starts)),
+        pa.array(starts, TIMESTAMP),
+        pa.array(ends, TIMESTAMP),
+        pa.array(durations, pa.float64()),
+        pa.array(period_hours, TIMESTAMP),
+    ], schema=PERIODS_SCHEMA)
+
+    events = [totals or [None] * len(EVENT_TYPES) for totals in events]
+    hourly = pa.Table.from_arrays([
+        label_array(user, len(hours)),
+        label_array(host, len(hours)),
+        pa.array(hours, TIMESTAMP),
+        pa.array(inactive, pa.float64()),
+        pa.array(counts, pa.int32()),
+        pa.array(active, pa.int32()),
+        pa.array(lengths, pa.int32()),
+    ] + [pa.array([totals[index] for totals in events], pa.int32()) for index in range(len(EVENT_TYPES))],
+        schema=HOURLY_SCHEMA)
+    return periods, hourly
+
+
+# Write a table to a partition file, through a temporary file so readers never see half of it
+def write_partition(table, file_name, export_format):
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    temp_name = f"{file_name}.tmp"
+    if export_format == 'parquet':
+        pq.write_table(table, temp_name)
+    else:
+        with pa.OSFile(temp_name, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    os.replace(temp_name, file_name)
+
+
+# Newest modification time of the files a day's export is built from
+def source_mtime(csv_dir, day, bitmaps_dir=None, events_dir=None, buckets=None):
+    if buckets is None:
+        buckets = scan_bucket_csvs(csv_dir, day, day).get(day, [])
+    newest = 0
+    for _, _, name in buckets:
+        for directory in (csv_dir, events_dir):
+            if directory:
+                try:
+                    newest = max(newest, os.stat(os.path.join(directory, name)).st_mtime_ns)
+                except FileNotFoundError:
+                    pass
+    if bitmaps_dir:
+        try:
+            newest = max(newest, os.stat(activity_bitmap_path(bitmaps_dir, day)).st_mtime_ns)
+        except FileNotFoundError:
+            pass
+    return newest
+
+
+# Export the days from first_date to last_date (inclusive) one at a time, so memory
+# stays bounded by a single day. A day whose partitions are newer than its source files
+# is skipped unless force is set. Returns the days written.
+def export_history(csv_dir, out_dir, first_date, last_date, export_format='parquet', bitmaps_dir=None,
+                   events_dir=None, user=None, host=None, force=False):
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {export_format}, expected one of {', '.join(EXPORT_FORMATS)}")
+    user = user or getpass.getuser()
+    host = host or socket.gethostname()
+
+    # One listing of the CSV directory for the whole range
+    bucket_days = scan_bucket_csvs(csv_dir, first_date, last_date)
+    written = []
+    day = first_date
+    while day <= last_date:
+        periods_file = partition_path(out_dir, 'periods', day, export_format)
+        hourly_file = partition_path(out_dir, 'hourly', day, export_format)
+        buckets = bucket_days.get(day, [])
+        newest = source_mtime(csv_dir, day, bitmaps_dir, events_dir, buckets) if buckets else 0
+        up_to_date = (not force and os.path.exists(periods_file) and os.path.exists(hourly_file)
+                      and min(os.stat(periods_file).st_mtime_ns, os.stat(hourly_file).st_mtime_ns) >= newest)
+        if newest and not up_to_date:
+            periods, hourly = day_tables(csv_dir, day, user, host, bitmaps_dir, events_dir, buckets)
+            if periods is not None:
+                write_partition(periods, periods_file, export_format)
+                write_partition(hourly, hourly_file, export_format)
+                written.append(day)
+                logging.info(f"Exported {day}: {periods.num_rows} periods, {hourly.num_rows} hours")
+        day += timedelta(days=1)
+    return written
+
+
+# Load an exported dataset ('periods' or 'hourly') as one table, optionally limited to
+# a range of dates. Arrow IPC partitions are memory-mapped rather than read.
+def load_history(out_dir, dataset='periods', export_format='parquet', first_date=None, last_date=None):
+    partitioning = ds.partitioning(pa.schema([('date', pa.date32())]), flavor='hive')
+    data = ds.dataset(os.path.join(out_dir, dataset), format='ipc' if export_format == 'arrow' else 'parquet',
+                      partitioning=partitioning, filesystem=pyarrow.fs.LocalFileSystem(use_mmap=True),
+                      exclude_invalid_files=True)
+    condition = None
+    if first_date:
+        condition = ds.field('date') >= first_date
+    if last_date:
+        upper = ds.field('date') <= last_date
+        condition = upper if condition is None else condition & upper
+    return data.to_table(filter=condition)
@@ -0,0 +1,155 @@
+"""Aggregation of the CSV logs collected from many workstations.
+
+The root directory holds one directory per user, containing either the CSVs (hourly, or
+of any other bucket size, see TrackerCore.bucket_csv_path) themselves or an hourly_csv subdirectory as copied from the tracker's working
+directory. Files are parsed in a process pool and their summaries kept in a manifest
+keyed by path, mtime and size, so a re-run only parses new or changed files.
+"""
+import os
+import csv
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from TrackerCore import parse_bucket_csv_name, read_periods_csv
+
+MANIFEST_NAME = 'fleet_manifest.csv'
+MANIFEST_FIELDS = ['File', 'Mtime NS', 'Size', 'User', 'Hour Start', 'Inactive Seconds', 'Periods', 'Bucket Minutes']
+HOUR_FORMAT = '%Y-%m-%d %H:%M'
+BATCH_SIZE = 500  # files per pool task, so process round trips stay small next to parsing
+
+
+# (user, csv dir) for every user directory under root
+def find_user_dirs(root):
+    users = []
+    for entry in sorted(os.scandir(root), key=lambda entry: entry.name):
+        if not entry.is_dir() or entry.name.startswith('.'):
+            continue
+        csv_dir = os.path.join(entry.path, 'hourly_csv')
+        users.append((entry.name, csv_dir if os.path.isdir(csv_dir) else entry.path))
+    return users
+
+
+# Every bucket CSV under root as {path relative to root: (user, bucket start, mtime_ns, size, bucket minutes)}
+def scan_fleet(root):
+    files = {}
+    for user, csv_dir in find_user_dirs(root):
+        for entry in os.scandir(csv_dir):
+            bucket = parse_bucket_csv_name(entry.name)
+            if bucket is None or not entry.is_file():
+                continue
+            stat = entry.stat()
+            files[os.path.relpath(entry.path, root)] = (user, bucket[0], stat.st_mtime_ns, stat.st_size, bucket[1])
+    return files
+
+
+# Pool task: (path, inactive seconds, period count) per file, or (path, None, error)
+def summarize_batch(root, paths):
+    results = []
+    for path in paths:
+        try:
+            periods = read_periods_csv(os.path.join(root, path))
+            results.append((path, sum((end - start).total_seconds() for start, end in periods), len(periods)))
+        except (OSError, ValueError) as e:
+            results.append((path, None, str(e)))
+    return results
+
+
+def read_manifest(file_name):
+    manifest = {}
+    try:
+        with open(file_name, newline='') as f:
+            for row in csv.DictReader(f):
+                manifest[row['File']] = {
+                    'mtime_ns': int(row['Mtime NS']),
+                    'size': int(row['Size']),
+                    'user': row['User'],
+                    'hour_start': datetime.strptime(row['Hour Start'], HOUR_FORMAT),
+                    'inactive_seconds': float(row['Inactive Seconds']),
+                    'periods': int(row['Periods']),
+                    # Manifests written before bucket sizes existed only hold hourly files
+                    'bucket_minutes': int(row.get('Bucket Minutes') or 60),
+                }
+    except FileNotFoundError:
+        pass
+    except (OSError, KeyError, ValueError) as e:
+        logging.error(f"Error reading fleet manifest {file_name}, rebuilding it: {str(e)}")
+        manifest = {}
+    return manifest
+
+
+def write_manifest(file_name, manifest):
+    temp_name = f"{file_name}.tmp"
+    with open(temp_name, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(MANIFEST_FIELDS)
+        for path in sorted(manifest):
+            entry = manifest[path]
+            writer.writerow([path, entry['mtime_ns'], entry['size'], entry['user'],
+                             entry['hour_start'].strftime(HOUR_FORMAT), round(entry['inactive_seconds'], 6),
+                             entry['periods'], entry['bucket_minutes']])
+    os.replace(temp_name, file_name)
+
+
+# Bring the manifest up to date with the files under root and return the per-user,
+# per-bucket rows sorted by user and bucket start, plus counts of what was done. Files that
+# fail to parse are left out of the manifest so the next run retries them.
+def aggregate_fleet(root, manifest_file=None, workers=None):
+    manifest_file = manifest_file or os.path.join(root, MANIFEST_NAME)
+    manifest = read_manifest(manifest_file)
+    files = scan_fleet(root)
+
+    stats = {'files': len(files), 'parsed': 0, 'reused': 0, 'removed': 0, 'failed': 0}
+    for path in [path for path in manifest if path not in files]:
+        del manifest[path]
+        stats['removed'] += 1
+
+    changed = []
+    for path, (user, hour_start, mtime_ns, size, bucket_minutes) in files.items():
+        entry = manifest.get(path)
+        if entry and entry['mtime_ns'] == mtime_ns and entry['size'] == size:
+            stats['reused'] += 1
+        else:
+            changed.append(path)
+
+    batches = [changed[i:i + BATCH_SIZE] for i in range(0, len(changed), BATCH_SIZE)]
+    if len(batches) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batch_results = list(pool.map(summarize_batch, [root] * len(batches), batches))
+    else:
+        # Not worth starting processes for a single batch
+        batch_results = [summarize_batch(root, batch) for batch in batches]
+
+    for results in batch_results:
+        for path, inactive_seconds, detail in results:
+            if inactive_seconds is None:
+                logging.error(f"Error loading {path}: {detail}")
+                manifest.pop(path, None)
+                stats['failed'] += 1
+                continue
+            user, hour_start, mtime_ns, size, bucket_minutes = files[path]
+            manifest[path] = {'mtime_ns': mtime_ns, 'size': size, 'user': user, 'hour_start': hour_start,
+                              'inactive_seconds': inactive_seconds, 'periods': detail,
+                              'bucket_minutes': bucket_minutes}
+            stats['parsed'] += 1
+
+    if stats['parsed'] or stats['removed'] or stats['failed'] or not os.path.exists(manifest_file):
+        write_manifest(manifest_file, manifest)
+
+    rows = [{'user': entry['user'], 'hour_start': entry['hour_start'], 'bucket_minutes': entry['bucket_minutes'],
+             'inactive_seconds': entry['inactive_seconds'], 'periods': entry['periods']}
+            for entry in manifest.values()]
+    rows.sort(key=lambda row: (row['user'], row['hour_start']))
+    return rows, stats
+
+
+# Per-user, per-day totals of aggregate_fleet rows; hours counts the hours covered by a log
+def daily_totals(rows):
+    days = {}
+    for row in rows:
+        key = (row['user'], row['hour_start'].date())
+        total = days.setdefault(key, {'user': key[0], 'date': key[1], 'hours': 0,
+                                      'inactive_seconds': 0.0, 'periods': 0})
+        total['hours'] += row['bucket_minutes'] / 60
+        total['inactive_seconds'] += row['inactive_seconds']
+        total['periods'] += row['periods']
+    return [days[key] for key in sorted(days)]
@@ -0,0 +1,758 @@
+"""Local socket protocol between the tracker daemon and its GUI clients.
+
+One process (TrackerDaemon.py --serve) owns the input hooks and the ActivityTracker.
+The GUI and the widget attach with RemoteTracker, which mirrors the tracker state from
+pushed deltas and forwards commands. Messages are newline-delimited JSON; datetimes are
+sent as {"$dt": iso} and timedeltas as {"$td": seconds}.
+
+A Unix domain socket is used where available, loopback TCP otherwise (Windows).
+Every connection must first send {"cmd": "hello", "args": {"token": ...}} with the
+secret the daemon writes at start to a file only its user can read (token_path);
+other local users and programs, e.g. a web page posting to the TCP port, cannot
+produce it. A connection is closed on a wrong token or on any line that is not a
+JSON object.
+
+Other programs can subscribe instead of mirroring the state: after sending
+{"cmd": "subscribe", "args": {"events": [...]}} a connection gets a "subscribed" line with
+the current state, then one {"type": "event", "seq": n, "event": ..., "data": ...} line per
+transition, closed period or rollover as it happens. A subscriber's queue is bounded by
+SUBSCRIBER_BUFFER; events that do not fit are dropped and counted, and the next event
+delivered is preceded by a {"type": "dropped", "count": n, "total": n} line.
+`python TrackerTools.py subscribe` prints the stream.
+"""
+import os
+import sys
+import json
+import time
+import hmac
+import socket
+import secrets
+import selectors
+import threading
+import subprocess
+import logging
+from datetime import datetime, timedelta
+
+SOCKET_NAME = '.orwelly_tracker.sock'
+TOKEN_NAME = '.orwelly_tracker'
+TCP_PORT = 47631
+CONNECT_TIMEOUT = 2  # seconds
+SPAWN_TIMEOUT = 10  # seconds
+# (settings key, TrackerDaemon flag) for the saved settings a spawned daemon is started with
+SETTINGS_FLAGS = (('threshold', '--threshold'), ('bucket_minutes', '--bucket-minutes'),
+                  ('hourly_csv_dir', '--csv-dir'), ('hourly_charts_dir', '--charts-dir'))
+
+# Snapshot keys that are not part of the shared state
+LOCAL_KEYS = ('now', 'last_activity_time', 'version')
+# Events sent to subscribers that do not name any
+SUBSCRIBE_EVENTS = ('started', 'stopped', 'reset', 'inactive', 'active', 'period', 'rollover', 'clock_jump')
+SUBSCRIBER_BUFFER = 64 * 1024  # bytes queued for one subscriber before its events are dropped
+MAX_LINE = 1024 * 1024  # bytes a client may send without a newline before it is dropped
+
+
+def default_address():
+    if hasattr(socket, 'AF_UNIX'):
+        return os.path.join(os.path.expanduser('~'), SOCKET_NAME)
+    return ('127.0.0.1', TCP_PORT)
+
+
+# The token file of a daemon: next to its Unix socket, or in the home directory per TCP port
+def token_path(address=None):
+    address = address or default_address()
+    if isinstance(address, str):
+        return f"{address}.token"
+    return os.path.join(os.path.expanduser('~'), f"{TOKEN_NAME}_{address[1]}.token")
+
+
+# Write a new random token readable by the current user only. On Windows the mode only
+# sets the read-only flag; the file is private through the home directory's ACL.
+def write_token(file_name):
+    token = secrets.token_hex(32)
+    try:
+        os.unlink(file_name)
+    except FileNotFoundError:
+        pass
+    # O_EXCL so a file or link planted at the path is never written through
+    fd = os.open(file_name, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(token)
+    return token
+
+
+def read_token(address=None):
+    with open(token_path(address)) as f:
+        return f.read().strip()
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'$dt': value.isoformat()}
+    if isinstance(value, timedelta):
+        return {'$td': value.total_seconds()}
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def _decode_object(obj):
+    if '$dt' in obj:
+        return datetime.fromisoformat(obj['$dt'])
+    if '$td' in obj:
+        return timedelta(seconds=obj['$td'])
+    return obj
+
+
+def encode_message(message):
+    return (json.dumps(message, default=_encode_value, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def decode_message(line):
+    return json.loads(line.decode('utf-8'), object_hook=_decode_object)
+
+
+def connect(address=None, timeout=CONNECT_TIMEOUT):
+    address = address or default_address()
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    sock.settimeout(None)
+    return sock
+
+
+# Connect and authenticate with the daemon's token; raises OSError when the token is unreadable
+def open_session(address=None, timeout=CONNECT_TIMEOUT):
+    address = address or default_address()
+    token = read_token(address)
+    sock = connect(address, timeout)
+    try:
+        sock.sendall(encode_message({'cmd': 'hello', 'args': {'token': token}}))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _create_listener(address):
+    if isinstance(address, str):
+        if os.path.exists(address):
+            # A socket file left behind by a crashed daemon is removed; a live one is an error
+            try:
+                connect(address, timeout=0.5).close()
+                raise OSError(f"Another tracker daemon is already listening on {address}")
+            except (ConnectionRefusedError, FileNotFoundError, socket.timeout):
+                os.unlink(address)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(address)
+        os.chmod(address, 0o600)
+    else:
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(address)
+    listener.listen(8)
+    listener.setblocking(False)
+    return listener
+
+
+# Shared part of a tracker snapshot, with periods as tuples
+def shared_state(snapshot):
+    state = {key: value for key, value in snapshot.items() if key not in LOCAL_KEYS}
+    state['inactivity_periods'] = [tuple(period) for period in state['inactivity_periods']]
+    return state
+
+
+# Changes between two shared states. New periods are sent as an append when the old list is a prefix.
+def state_delta(old, new):
+    delta = {}
+    for key, value in new.items():
+        if key == 'inactivity_periods':
+            continue
+        if old.get(key) != value:
+            delta[key] = value
+
+    old_periods = old.get('inactivity_periods', [])
+    new_periods = new['inactivity_periods']
+    if new_periods != old_periods:
+        if len(new_periods) >= len(old_periods) and new_periods[:len(old_periods)] == old_periods:
+            delta['periods_append'] = new_periods[len(old_periods):]
+        else:
+            delta['inactivity_periods'] = new_periods
+    return delta
+
+
+def apply_delta(state, delta):
+    for key, value in delta.items():
+        if key == 'periods_append':
+            state['inactivity_periods'] = state.get('inactivity_periods', []) + [tuple(p) for p in value]
+        elif key == 'inactivity_periods':
+            state['inactivity_periods'] = [tuple(p) for p in value]
+        else:
+            state[key] = value
+
+
+class _ClientConnection:
+    def __init__(self, sock):
+        self.sock = sock
+        self.inbox = bytearray()
+        self.outbox = bytearray()
+        self.authenticated = False  # set by a hello with the right token, the only command accepted before
+        self.events = None  # event names a subscriber asked for; None for state clients
+        self.dropped = 0  # events dropped for this subscriber in total
+        self.unreported = 0  # of which the subscriber has not been told yet
+
+
+class StateServer:
+    def __init__(self, tracker, address=None):
+        self.tracker = tracker
+        self.address = address or default_address()
+        self._selector = selectors.DefaultSelector()
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._listener = None
+        self._thread = None
+        self._running = False
+        self._last_state = None
+        self._last_version = -1
+        self._event_sequence = 0  # numbers the events sent to subscribers
+        self._token = None
+        self._token_file = token_path(self.address)
+        self.on_client_count = None  # optional callback(count), called from the server thread
+
+    def client_count(self):
+        with self._lock:
+            return self._authenticated_count()
+
+    # Lock held
+    def _authenticated_count(self):
+        return sum(1 for client in self._clients.values() if client.authenticated)
+
+    def start(self):
+        self._listener = _create_listener(self.address)
+        try:
+            self._token = write_token(self._token_file)
+        except OSError:
+            self._listener.close()
+            raise
+        self._wake_reader.setblocking(False)
+        self._selector.register(self._listener, selectors.EVENT_READ, 'accept')
+        self._selector.register(self._wake_reader, selectors.EVENT_READ, 'wake')
+
+        snapshot = self.tracker.snapshot()
+        self._last_version = snapshot['version']
+        self._last_state = shared_state(snapshot)
+        self._last_state['clients'] = 0
+        self.tracker.add_observer(self._on_tracker_event)
+
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        logging.info(f"Tracker daemon listening on {self.address}")
+
+    def stop(self):
+        self._running = False
+        self.tracker.remove_observer(self._on_tracker_event)
+        self._wake()
+        if self._thread:
+            self._thread.join(timeout=2)
+        for client in list(self._clients.values()):
+            client.sock.close()
+        self._clients.clear()
+        self._selector.close()
+        self._listener.close()
+        try:
+            os.unlink(self._token_file)
+        except OSError:
+            pass
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def _wake(self):
+        try:
+            self._wake_writer.send(b'\0')
+        except OSError:
+            pass
+
+    # Called from tracker threads: queue the event and the state delta for every client
+    def _on_tracker_event(self, event, data):
+        messages = [{'type': 'event', 'event': event, 'data': data}]
+        self._publish(messages)
+
+    def _publish(self, messages=()):
+        snapshot = self.tracker.snapshot()
+        with self._lock:
+            messages = list(messages)
+            # Snapshots taken out of order are skipped; the next one carries their changes
+            if snapshot['version'] >= self._last_version:
+                new_state = shared_state(snapshot)
+                new_state['clients'] = self._authenticated_count()
+                delta = state_delta(self._last_state, new_state)
+                self._last_version = snapshot['version']
+                self._last_state = new_state
+                # State first, so observers woken by the event already see it
+                if delta:
+                    messages.insert(0, {'type': 'delta', 'changes': delta})
+            if not messages:
+                return
+            payload = b''.join(encode_message(message) for message in messages)
+            for client in self._clients.values():
+                if client.authenticated and client.events is None:
+                    client.outbox += payload
+            self._notify_subscribers(messages)
+        self._wake()
+
+    # Queue each event among messages for the subscribers that asked for it. When a
+    # subscriber's queue is full the event is dropped for it and counted. Lock held.
+    def _notify_subscribers(self, messages):
+        for message in messages:
+            if message['type'] != 'event':
+                continue
+            self._event_sequence += 1
+            line = None
+            for client in self._clients.values():
+                if client.events is None or message['event'] not in client.events:
+                    continue
+                if line is None:
+                    line = encode_message(dict(message, seq=self._event_sequence))
+                notice = b''
+                if client.unreported:
+                    notice = encode_message({'type': 'dropped', 'count': client.unreported, 'total': client.dropped})
+                if len(client.outbox) + len(notice) + len(line) > SUBSCRIBER_BUFFER:
+                    if not client.unreported:
+                        logging.warning(f"Subscriber is not keeping up, dropping events ({client.dropped} so far)")
+                    client.dropped += 1
+                    client.unreported += 1
+                    continue
+                client.outbox += notice + line
+                client.unreported = 0
+
+    # Switch a client from the state stream to the events it names (default SUBSCRIBE_EVENTS)
+    def _subscribe(self, client, events=None):
+        snapshot = self.tracker.snapshot()
+        with self._lock:
+            client.events = frozenset(events or SUBSCRIBE_EVENTS)
+            client.outbox += encode_message({
+                'type': 'subscribed',
+                'events': sorted(client.events),
+                'seq': self._event_sequence,
+                'state': {key: snapshot[key] for key in
+                          ('running', 'session_start', 'inactivity_start_time', 'threshold', 'now')},
+            })
+        self._wake()
+        logging.info(f"Client subscribed to {', '.join(sorted(client.events))}")
+
+    # Queue a reply for one client only
+    def _send_to(self, client, message):
+        with self._lock:
+            client.outbox += encode_message(message)
+        self._wake()
+
+    def _serve(self):
+        while self._running:
+            with self._lock:
+                for client in self._clients.values():
+                    events = selectors.EVENT_READ | (selectors.EVENT_WRITE if client.outbox else 0)
+                    self._selector.modify(client.sock, events, client)
+
+            for key, mask in self._selector.select(timeout=1):
+                if key.data == 'accept':
+                    self._accept()
+                elif key.data == 'wake':
+                    try:
+                        self._wake_reader.recv(4096)
+                    except BlockingIOError:
+                        pass
+                else:
+                    if mask & selectors.EVENT_WRITE:
+                        self._flush(key.data)
+                    if mask & selectors.EVENT_READ:
+                        self._read(key.data)
+
+    def _accept(self):
+        try:
+            sock, _ = self._listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        client = _ClientConnection(sock)
+        with self._lock:
+            self._clients[sock] = client
+            self._selector.register(sock, selectors.EVENT_READ, client)
+
+    # A hello with the right token attaches the client; anything else drops it
+    def _authenticate(self, client, message):
+        args = message.get('args')
+        token = args.get('token') if message.get('cmd') == 'hello' and isinstance(args, dict) else None
+        if not isinstance(token, str) or not hmac.compare_digest(token.encode(), self._token.encode()):
+            logging.warning("Client did not authenticate, closing the connection")
+            self._drop(client)
+            return
+        with self._lock:
+            client.authenticated = True
+            # The cached state is what the delta stream is based on, so it is the right starting point
+            client.outbox += encode_message({'type': 'snapshot', 'state': self._last_state})
+            count = self._authenticated_count()
+        logging.info(f"Client attached ({count} connected)")
+        self._publish()
+        if self.on_client_count:
+            self.on_client_count(count)
+
+    def _drop(self, client):
+        with self._lock:
+            if client.sock not in self._clients:
+                return
+            del self._clients[client.sock]
+            self._selector.unregister(client.sock)
+            count = self._authenticated_count()
+        client.sock.close()
+        if not client.authenticated:
+            return
+        logging.info(f"Client detached ({count} connected)")
+        self._publish()
+        if self.on_client_count:
+            self.on_client_count(count)
+
+    def _flush(self, client):
+        with self._lock:
+            if not client.outbox:
+                return
+            try:
+                sent = client.sock.send(client.outbox)
+            except BlockingIOError:
+                return
+            except OSError:
+                sent = -1
+            if sent >= 0:
+                del client.outbox[:sent]
+        if sent < 0:
+            self._drop(client)
+
+    def _read(self, client):
+        try:
+            data = client.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._drop(client)
+            return
+
+        client.inbox += data
+        while b'\n' in client.inbox:
+            line, _, rest = bytes(client.inbox).partition(b'\n')
+            client.inbox = bytearray(rest)
+            if not line.strip():
+                continue
+            try:
+                message = decode_message(line)
+                if not isinstance(message, dict):
+                    raise ValueError("not a JSON object")
+            except (ValueError, TypeError) as e:
+                logging.warning(f"Malformed client message, closing the connection: {str(e)}")
+                self._drop(client)
+                return
+            if not client.authenticated:
+                self._authenticate(client, message)
+                if client.sock not in self._clients:
+                    return
+                continue
+            try:
+                self._handle_command(client, message)
+            except Exception as e:
+                logging.error(f"Error handling client command: {str(e)}")
+            if client.sock not in self._clients:
+                return
+        if len(client.inbox) > MAX_LINE:
+            logging.warning("Client message too long, closing the connection")
+            self._drop(client)
+
+    def _handle_command(self, client, message):
+        command = message.get('cmd')
+        args = message.get('args') or {}
+        if command == 'start':
+            self.tracker.start()
+        elif command == 'stop':
+            self.tracker.stop()
+        elif command == 'reset':
+            self.tracker.reset_session()
+        elif command == 'configure':
+            self.tracker.configure(**args)
+        elif command == 'profile':
+            from TrackerProfiler import profiler
+            if args.get('start'):
+                profiler.start(args.get('duration') or 60)
+            else:
+                profiler.stop(wait=False)
+        elif command == 'metrics':
+            self._send_to(client, {'type': 'metrics', 'metrics': self.tracker.metrics()})
+        elif command == 'subscribe':
+            self._subscribe(client, args.get('events'))
+        elif command == 'detach':
+            self._drop(client)
+        else:
+            logging.warning(f"Unknown client command: {command}")
+
+
+class RemoteTracker:
+    """Client-side stand-in for ActivityTracker, backed by a TrackerDaemon."""
+
+    def __init__(self, address=None, timeout=CONNECT_TIMEOUT):
+        self.address = address or default_address()
+        self._sock = open_session(self.address, timeout)
+        self._state = {}
+        self._observers = []
+        self._condition = threading.Condition()
+        self._metrics_reply = None
+        self.chart_cache = None
+        self.connected = True
+
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+        if not self._wait_for(lambda state: 'running' in state, timeout):
+            self.detach()
+            raise ConnectionError(f"No state received from tracker daemon at {self.address}")
+
+    def add_observer(self, callback):
+        self._observers.append(callback)
+
+    def remove_observer(self, callback):
+        if callback in self._observers:
+            self._observers.remove(callback)
+
+    # A malformed message from the daemon ends the connection like a closed socket,
+    # so waiters are woken and observers fall back instead of waiting on a dead reader
+    def _read_loop(self):
+        buffer = b''
+        line = b''
+        try:
+            while True:
+                data = self._sock.recv(65536)
+                if not data:
+                    break
+                buffer += data
+                while b'\n' in buffer:
+                    line, buffer = buffer.split(b'\n', 1)
+                    if line.strip():
+                        self._handle_message(decode_message(line))
+        except OSError:
+            pass
+        except (ValueError, KeyError, TypeError) as e:
+            logging.error(f"Malformed message from the tracker daemon, disconnecting: {str(e)}: {line[:200]!r}")
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        finally:
+            with self._condition:
+                self.connected = False
+                self._condition.notify_all()
+            for callback in list(self._observers):
+                try:
+                    callback('disconnected', {})
+                except Exception as e:
+                    logging.error(f"Error in tracker observer for disconnected: {str(e)}")
+
+    def _handle_message(self, message):
+        with self._condition:
+            if message['type'] == 'snapshot':
+                self._state = {}
+                apply_delta(self._state, message['state'])
+            elif message['type'] == 'delta':
+                apply_delta(self._state, message['changes'])
+            elif message['type'] == 'metrics':
+                self._metrics_reply = message['metrics']
+            self._condition.notify_all()
+
+        if message['type'] == 'event':
+            for callback in list(self._observers):
+                try:
+                    callback(message['event'], message['data'])
+                except Exception as e:
+                    logging.error(f"Error in tracker observer for {message['event']}: {str(e)}")
+
+    def _wait_for(self, predicate, timeout):
+        with self._condition:
+            return self._condition.wait_for(lambda: predicate(self._state) or not self.connected, timeout) \
+                and self.connected
+
+    def _send(self, command, **args):
+        try:
+            self._sock.sendall(encode_message({'cmd': command, 'args': args}))
+        except OSError as e:
+            logging.error(f"Error sending {command} to tracker daemon: {str(e)}")
+
+    # ActivityTracker API used by the GUIs
+    def start(self):
+        self._send('start')
+        self._wait_for(lambda state: state.get('running'), CONNECT_TIMEOUT)
+
+    def stop(self):
+        self._send('stop')
+        self._wait_for(lambda state: not state.get('running'), CONNECT_TIMEOUT)
+
+    def reset_session(self):
+        self._send('reset')
+
+    def configure(self, **settings):
+        self._send('configure', **settings)
+
+    # Start (for up to duration seconds) or stop profiling the daemon process
+    def profile(self, start, duration=None):
+        self._send('profile', start=start, duration=duration)
+
+    # Latency histograms of the daemon process, or {} when it does not answer in time
+    def metrics(self):
+        with self._condition:
+            self._metrics_reply = None
+        self._send('metrics')
+        with self._condition:
+            self._condition.wait_for(lambda: self._metrics_reply is not None or not self.connected, CONNECT_TIMEOUT)
+            return self._metrics_reply or {}
+
+    def detach(self):
+        try:
+            self._sock.sendall(encode_message({'cmd': 'detach'}))
+        except OSError:
+            pass
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+    def _get(self, key, default=None):
+        with self._condition:
+            return self._state.get(key, default)
+
+    @property
+    def is_running(self):
+        return bool(self._get('running'))
+
+    @property
+    def session_start(self):
+        return self._get('session_start')
+
+    @property
+    def threshold(self):
+        return self._get('threshold')
+
+    @property
+    def bucket_minutes(self):
+        return self._get('bucket_minutes', 60)
+
+    @property
+    def hourly_csv_dir(self):
+        return self._get('hourly_csv_dir')
+
+    @property
+    def activity_bitmaps_dir(self):
+        return self._get('activity_bitmaps_dir')
+
+    @property
+    def hourly_events_dir(self):
+        return self._get('hourly_events_dir')
+
+    @property
+    def hourly_charts_dir(self):
+        return self._get('hourly_charts_dir')
+
+    # Charts are rendered in this process through a cache in the daemon's cache directory;
+    # keys are content hashes, so both processes can share it
+    def hour_chart(self, hour_start, size=None):
+        from TrackerChartCache import ChartCache, CACHE_DIR, CHART_CACHE_MB
+        cache_dir = self._get('chart_cache_dir', CACHE_DIR)
+        if self.chart_cache is None or self.chart_cache.cache_dir != cache_dir:
+            self.chart_cache = ChartCache(cache_dir, self._get('chart_cache_mb', CHART_CACHE_MB) * 1024 * 1024)
+        return self.chart_cache.hour_chart(self.hourly_csv_dir, hour_start, self.hourly_events_dir, size,
+                                           bucket_minutes=self.bucket_minutes)
+
+    @property
+    def client_count(self):
+        return self._get('clients', 0)
+
+    def now(self):
+        return datetime.now() + self._get('time_offset', timedelta(0))
+
+    def snapshot(self):
+        with self._condition:
+            snapshot = dict(self._state)
+            snapshot['inactivity_periods'] = list(self._state.get('inactivity_periods', []))
+        snapshot['now'] = datetime.now() + snapshot.get('time_offset', timedelta(0))
+        return snapshot
+
+
+# Yield the messages of a subscription to a tracker daemon as they arrive: the
+# "subscribed" reply first, then "event" and "dropped" messages, until the daemon goes away
+def subscribe(address=None, events=None, timeout=CONNECT_TIMEOUT):
+    sock = open_session(address, timeout)
+    try:
+        sock.sendall(encode_message({'cmd': 'subscribe', 'args': {'events': list(events) if events else None}}))
+        buffer = b''
+        subscribed = False
+        while True:
+            try:
+                data = sock.recv(65536)
+            except OSError:
+                return
+            if not data:
+                return
+            buffer += data
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                if not line.strip():
+                    continue
+                message = decode_message(line)
+                # State messages sent before the subscription took effect are skipped
+                subscribed = subscribed or message['type'] == 'subscribed'
+                if subscribed:
+                    yield message
+    finally:
+        sock.close()
+
+
+# Start a daemon for the GUIs in the background. It stops tracking when the last
+# client detaches and exits once it has been idle for a while.
+# settings are saved Settings tab values (TrackerCore.load_settings), passed on as daemon flags
+def spawn_daemon(address=None, settings=None):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'TrackerDaemon.py')
+    command = [sys.executable, script, '--serve', '--no-autostart', '--stop-when-detached', '--idle-exit', '30']
+    if address:
+        command += ['--socket', address] if isinstance(address, str) else ['--port', str(address[1])]
+    for key, flag in SETTINGS_FLAGS:
+        if settings and settings.get(key) is not None:
+            command += [flag, str(settings[key])]
+
+    options = {'stdin': subprocess.DEVNULL, 'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+    if os.name == 'nt':
+        options['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        options['start_new_session'] = True
+    subprocess.Popen(command, **options)
+
+
+# Attach to the running daemon, starting one if needed. Returns None when no daemon is reachable.
+def attach_tracker(address=None, spawn=True, settings=None):
+    try:
+        return RemoteTracker(address)
+    except (OSError, ConnectionError):
+        if not spawn:
+            return None
+
+    try:
+        spawn_daemon(address, settings)
+    except OSError as e:
+        logging.error(f"Error starting tracker daemon: {str(e)}")
+        return None
+
+    deadline = time.monotonic() + SPAWN_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(0.2)
+        try:
+            return RemoteTracker(address)
+        except (OSError, ConnectionError):
+            continue
+    logging.error("Tracker daemon did not come up, running in-process")
+    return None
@@ -0,0 +1,193 @@
+"""Always-on latency histograms for the tracker's hot paths.
+
+Durations are recorded in microseconds into log-linear buckets in the style of
+HdrHistogram: every power of two is split into 16 sub-buckets, so a percentile read
+from the buckets is within about 6% of the true value. Recording is an index
+computation and an increment into a fixed array, a fraction of a microsecond, so the
+histograms stay on in normal use. The process-wide registry is `metrics`.
+"""
+import os
+import json
+import time
+import threading
+import logging
+from array import array
+
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+MAX_EXPONENT = 40  # values up to 2**40 us (about 12 days); longer ones land in the last bucket
+BUCKET_COUNT = (MAX_EXPONENT - SUB_BUCKET_BITS + 1) * SUB_BUCKETS
+PERCENTILES = (50, 90, 99, 99.9)
+
+# Stages recorded by the tracker, in display order
+STAGES = {
+    'input_callback': "Input callback",
+    'tracking_loop': "Tracker tick",
+    'rollover': "Hour rollover",
+    'rollover.clip': "  clip periods",
+    'rollover.csv': "  CSV and event counts",
+    'rollover.chart': "  chart",
+    'chart_render': "Chart render",
+    'load_statistics': "Statistics load",
+    'ui_tick': "UI tick",
+}
+
+
+# Bucket of a value in microseconds: exact below 32, then 16 buckets per power of two
+def bucket_index(value):
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return min((shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS, BUCKET_COUNT - 1)
+
+
+# Smallest value in microseconds that falls into a bucket
+def bucket_low(index):
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    return (index % SUB_BUCKETS + SUB_BUCKETS) << shift
+
+
+# Upper bound of the bucket holding the given percentile of bucket counts, capped at max_us
+def percentile_of(counts, max_us, percent):
+    total = sum(counts)
+    if not total:
+        return 0
+    target = max(1, -(-total * percent // 100))
+    seen = 0
+    for index, count in enumerate(counts):
+        seen += count
+        if seen >= target:
+            return min(bucket_low(index + 1) - 1, max_us)
+    return max_us
+
+
+class LatencyHistogram:
+    """Counts of durations by log-linear bucket, plus the exact total and maximum."""
+
+    def __init__(self):
+        self.counts = array('Q', [0]) * BUCKET_COUNT
+        self.total_us = 0
+        self.max_us = 0
+        self._lock = threading.Lock()
+
+    # bucket_index inlined: this runs on every input event
+    def record(self, seconds):
+        value = int(seconds * 1000000)
+        if value < 2 * SUB_BUCKETS:
+            if value < 0:
+                value = 0
+            index = value
+        else:
+            shift = value.bit_length() - SUB_BUCKET_BITS - 1
+            index = shift * SUB_BUCKETS + (value >> shift)
+            if index >= BUCKET_COUNT:
+                index = BUCKET_COUNT - 1
+        with self._lock:
+            self.counts[index] += 1
+            self.total_us += value
+            if value > self.max_us:
+                self.max_us = value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    # Upper bound of the bucket holding the given percentile, in microseconds
+    def percentile(self, percent):
+        with self._lock:
+            counts, max_us = self.counts[:], self.max_us
+        return percentile_of(counts, max_us, percent)
+
+    def summary(self):
+        with self._lock:
+            counts, total_us, max_us = self.counts[:], self.total_us, self.max_us
+        count = sum(counts)
+        buckets = {bucket_low(index): bucket_count for index, bucket_count in enumerate(counts) if bucket_count}
+        summary = {
+            'count': count,
+            'mean_ms': round(total_us / count / 1000, 3) if count else 0,
+            'min_ms': round(min(buckets, default=0) / 1000, 3),
+            'max_ms': round(max_us / 1000, 3),
+        }
+        for percent in PERCENTILES:
+            summary[f'p{percent:g}_ms'] = round(percentile_of(counts, max_us, percent) / 1000, 3)
+        # Lower bound in microseconds -> count, enough to merge or re-plot histograms offline
+        summary['buckets'] = buckets
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self.counts = array('Q', [0]) * BUCKET_COUNT
+            self.total_us = 0
+            self.max_us = 0
+
+
+class Metrics:
+    """Named latency histograms, created on first use."""
+
+    def __init__(self):
+        self.histograms = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, LatencyHistogram())
+        return histogram
+
+    def record(self, name, seconds):
+        self.histogram(name).record(seconds)
+
+    # Context manager timing a block into the named histogram
+    def timer(self, name):
+        return StageTimer(self.histogram(name))
+
+    def reset(self):
+        for histogram in list(self.histograms.values()):
+            histogram.reset()
+
+    def report(self):
+        stages = {name: histogram.summary() for name, histogram in list(self.histograms.items())}
+        return {
+            'pid': os.getpid(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'uptime_s': round(time.time() - self.started, 1),
+            'stages': stages,
+        }
+
+    # Write report() (or the given report) to a JSON file, e.g. on shutdown
+    def dump(self, file_name, report=None):
+        try:
+            temp_name = f"{file_name}.tmp"
+            with open(temp_name, 'w') as f:
+                json.dump(report or self.report(), f, indent=2)
+            os.replace(temp_name, file_name)
+            logging.info(f"Latency metrics written to {file_name}")
+        except Exception as e:
+            logging.error(f"Error writing latency metrics: {str(e)}")
+
+
+class StageTimer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.record(time.perf_counter() - self.started)
+        return False
+
+
+# Stage names of a report in display order: the known stages first, then any others
+def ordered_stages(stages):
+    return [name for name in STAGES if name in stages] + sorted(name for name in stages if name not in STAGES)
+
+
+metrics = Metrics()
@@ -0,0 +1,186 @@
+"""On-demand sampling profiler and allocation tracing for a running tracker process.
+
+While active, a background thread samples the stack of every other thread (tracking
+loop, input listeners, Tk main loop, socket server) every SAMPLE_INTERVAL seconds via
+sys._current_frames(), and tracemalloc traces allocations. Profiling stops by itself
+after the requested duration. Three reports are then written to the output directory:
+
+  profile_<label>_<time>.pstats     sampled times, loadable with pstats.Stats or snakeviz
+  profile_<label>_<time>.collapsed  "thread;frame;frame count" lines for flame graphs
+  profile_<label>_<time>_alloc.txt  top allocations at the end, and growth since the start
+
+Samples are taken when the sampler gets the GIL, so time in C code that holds the GIL
+is attributed to the Python frame that called it.
+"""
+import os
+import sys
+import time
+import marshal
+import threading
+import tracemalloc
+import logging
+from collections import Counter
+
+SAMPLE_INTERVAL = 0.01  # seconds between samples
+DEFAULT_DURATION = 60  # seconds a profiling window lasts unless stopped earlier
+TRACEMALLOC_FRAMES = 10  # frames kept per allocation traceback
+TOP_ALLOCATIONS = 25  # lines listed per allocation report section
+
+
+class SamplingProfiler:
+    """Samples all threads of this process for a bounded window; one window at a time."""
+
+    def __init__(self, output_dir='.', label='tracker', interval=SAMPLE_INTERVAL):
+        self.output_dir = output_dir
+        self.label = label
+        self.interval = interval
+        self.deadline = None
+        self.last_reports = []
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # Seconds until the window ends by itself, or 0 when not profiling
+    def remaining(self):
+        if not self.active or self.deadline is None:
+            return 0
+        return max(0, self.deadline - time.monotonic())
+
+    def start(self, duration=DEFAULT_DURATION):
+        with self._lock:
+            if self.active:
+                return False
+            self.deadline = time.monotonic() + duration
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self.run, name='TrackerProfiler', daemon=True)
+            self._thread.start()
+        logging.info(f"Profiling started for up to {duration:g}s")
+        return True
+
+    # End the window early; with wait, return once the reports are written
+    def stop(self, wait=True):
+        thread = self._thread
+        if thread is None:
+            return []
+        self._stop_event.set()
+        if wait and thread is not threading.current_thread():
+            thread.join()
+        return self.last_reports
+
+    def toggle(self, duration=DEFAULT_DURATION):
+        if self.active:
+            self.stop(wait=False)
+        else:
+            self.start(duration)
+
+    def run(self):
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        first_snapshot = tracemalloc.take_snapshot()
+
+        stacks = Counter()
+        samples = 0
+        started = time.perf_counter()
+        own_ident = threading.get_ident()
+        try:
+            while not self._stop_event.wait(self.interval) and time.monotonic() < self.deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own_ident:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                        frame = frame.f_back
+                    stack.reverse()
+                    stacks[(names.get(ident, f'thread-{ident}'), tuple(stack))] += 1
+                samples += 1
+            elapsed = time.perf_counter() - started
+            last_snapshot = tracemalloc.take_snapshot()
+            traced_memory = tracemalloc.get_traced_memory()
+
+            self.last_reports = self.write_reports(stacks, samples, elapsed, first_snapshot, last_snapshot,
+                                                   traced_memory)
+            logging.info(f"Profiling stopped after {elapsed:.1f}s ({samples} samples): "
+                         f"{', '.join(self.last_reports)}")
+        except Exception as e:
+            logging.error(f"Error in profiler: {str(e)}")
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+    def write_reports(self, stacks, samples, elapsed, first_snapshot, last_snapshot, traced_memory):
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"profile_{self.label}_{time.strftime('%Y%m%d_%H%M%S')}")
+        sample_seconds = elapsed / samples if samples else self.interval
+
+        pstats_file = f"{base}.pstats"
+        with open(pstats_file, 'wb') as f:
+            marshal.dump(pstats_from_samples(stacks, sample_seconds), f)
+
+        collapsed_file = f"{base}.collapsed"
+        with open(collapsed_file, 'w') as f:
+            for (thread_name, stack), count in stacks.most_common():
+                frames = [thread_name.replace(';', ':')] + [
+                    f"{name} ({os.path.basename(file_name)}:{line})" for file_name, line, name in stack]
+                f.write(f"{';'.join(frames)} {count}\n")
+
+        # Leave out the profiler's own bookkeeping
+        exclude = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        first_snapshot = first_snapshot.filter_traces(exclude)
+        last_snapshot = last_snapshot.filter_traces(exclude)
+
+        alloc_file = f"{base}_alloc.txt"
+        with open(alloc_file, 'w') as f:
+            current, peak = traced_memory
+            threads = len({thread_name for thread_name, _ in stacks})
+            f.write(f"Profiling window: {elapsed:.1f}s, {samples} samples of {threads} threads\n")
+            f.write(f"Traced memory: {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n")
+            f.write(f"\nTop {TOP_ALLOCATIONS} allocation sites at the end of the window:\n")
+            for stat in last_snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+                f.write(f"  {stat}\n")
+            f.write(f"\nTop {TOP_ALLOCATIONS} allocation changes during the window:\n")
+            for stat in last_snapshot.compare_to(first_snapshot, 'lineno')[:TOP_ALLOCATIONS]:
+                f.write(f"  {stat}\n")
+            f.write("\nLargest allocation tracebacks at the end of the window:\n")
+            for stat in last_snapshot.statistics('traceback')[:5]:
+                f.write(f"  {stat.count} blocks, {stat.size / 1024:.1f} KiB\n")
+                for line in stat.traceback.format():
+                    f.write(f"    {line}\n")
+
+        return [pstats_file, collapsed_file, alloc_file]
+
+
+# Turn sampled stacks into the dict pstats.Stats loads: {function: (primitive calls,
+# calls, own time, cumulative time, {caller: (calls, primitive calls, own, cumulative)})}.
+# Call counts are sample counts; times are samples times the mean sample interval.
+def pstats_from_samples(stacks, sample_seconds):
+    own = Counter()
+    cumulative = Counter()
+    callers = {}
+    for (_, stack), count in stacks.items():
+        if not stack:
+            continue
+        own[stack[-1]] += count
+        for function in set(stack):
+            cumulative[function] += count
+        for caller, callee in set(zip(stack, stack[1:])):
+            edges = callers.setdefault(callee, Counter())
+            edges[caller] += count
+
+    stats = {}
+    for function, count in cumulative.items():
+        function_callers = {caller: (edge_count, edge_count, 0.0, edge_count * sample_seconds)
+                            for caller, edge_count in callers.get(function, {}).items()}
+        stats[function] = (count, count, own[function] * sample_seconds, count * sample_seconds,
+                           function_callers)
+    return stats
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,200 @@
+"""One timer thread for the tracker's periodic and one-shot work.
+
+Timers are kept in a heap ordered by due time on the scheduler's clock. Rescheduling
+pushes a new entry and leaves the old one stale; stale entries are skipped when they
+reach the top, and the heap is compacted once they outnumber the live ones, so a timer
+moved on every input does not grow it without bound. The thread
+sleeps on a condition until the earliest one is due, so a stopped or idle tracker
+costs no wakeups. Scheduling, rescheduling or shutting down notifies the condition,
+so a new earlier timer or a shutdown takes effect at once instead of after a sleep.
+Callbacks run one at a time on the scheduler thread and must not block for long.
+
+With threaded=False no thread is started; the owner advances its clock and calls
+run_due(), which is how TrackerSoak drives the tracker through simulated weeks.
+"""
+import heapq
+import itertools
+import threading
+import time
+import logging
+
+
+class Timer:
+    """Handle of a scheduled callback; interval is set for periodic timers."""
+
+    __slots__ = ('due', 'interval', 'callback', 'args', 'name', 'cancelled', 'sequence')
+
+    def __init__(self, due, interval, callback, args, name):
+        self.due = due
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.name = name
+        self.cancelled = False
+        self.sequence = None  # sequence of the timer's live heap entry, None while not queued
+
+    # The callback will not run again; safe to call from any thread, also from the callback
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerScheduler:
+    """Runs timers on one thread; start() and shutdown() may be repeated."""
+
+    def __init__(self, name='TimerScheduler', clock=time.monotonic, threaded=True):
+        self.name = name
+        self.clock = clock
+        self.threaded = threaded
+        self._heap = []  # (due, sequence, timer); entries whose sequence differs from timer.sequence are stale
+        self._sequence = itertools.count()
+        self._stale = 0  # entries in the heap left behind by reschedule()
+        self._condition = threading.Condition()
+        self._generation = 0  # bumped by shutdown, so a thread outliving it exits
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._condition:
+            if self._thread is not None or not self.threaded:
+                return
+            self._thread = threading.Thread(target=self.run, args=(self._generation,), name=self.name, daemon=True)
+            self._thread.start()
+
+    # Drop all timers and stop the thread; with wait, return once a running callback is done
+    def shutdown(self, wait=True):
+        with self._condition:
+            thread = self._thread
+            self._thread = None
+            self._generation += 1
+            for _, _, timer in self._heap:
+                timer.cancelled = True
+                timer.sequence = None
+            self._heap.clear()
+            self._stale = 0
+            self._condition.notify_all()
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def call_at(self, due, callback, *args, name=None):
+        return self._push(Timer(due, None, callback, args, name or callback.__name__))
+
+    def call_later(self, delay, callback, *args, name=None):
+        return self.call_at(self.clock() + max(0, delay), callback, *args, name=name)
+
+    # Run callback every interval seconds, first after first_delay (default: interval).
+    # Ticks missed while the callback or the machine was busy are skipped, not bunched.
+    def call_every(self, interval, callback, *args, name=None, first_delay=None):
+        delay = interval if first_delay is None else first_delay
+        return self._push(Timer(self.clock() + max(0, delay), interval, callback, args, name or callback.__name__))
+
+    # Move a pending timer (or revive a fired one-shot) to run delay seconds from now
+    def reschedule(self, timer, delay):
+        with self._condition:
+            timer.cancelled = False
+            timer.due = self.clock() + max(0, delay)
+            self._push_locked(timer)
+
+    def _push(self, timer):
+        with self._condition:
+            self._push_locked(timer)
+        return timer
+
+    def _push_locked(self, timer):
+        if timer.sequence is not None:
+            self._stale += 1
+        timer.sequence = next(self._sequence)
+        heapq.heappush(self._heap, (timer.due, timer.sequence, timer))
+        if self._stale * 2 > len(self._heap):
+            self._compact()
+        if self._heap[0][2] is timer:
+            self._condition.notify()
+
+    # Rebuild the heap from the live entries only. Condition held.
+    def _compact(self):
+        live = []
+        for entry in self._heap:
+            timer = entry[2]
+            if entry[1] != timer.sequence:
+                continue
+            if timer.cancelled:
+                timer.sequence = None
+            else:
+                live.append(entry)
+        heapq.heapify(live)
+        self._heap = live
+        self._stale = 0
+
+    # Names and seconds until due of the live timers, soonest first
+    def pending(self):
+        with self._condition:
+            now = self.clock()
+            return [(timer.name, max(0, due - now)) for due, sequence, timer in sorted(self._heap)
+                    if not timer.cancelled and sequence == timer.sequence]
+
+    # Clock value at which the earliest live timer is due, or None without timers
+    def next_due(self):
+        with self._condition:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    # Run every timer due by now on the calling thread; returns how many ran
+    def run_due(self):
+        ran = 0
+        while True:
+            with self._condition:
+                timer, _ = self._pop_due()
+            if timer is None:
+                return ran
+            self._call(timer)
+            ran += 1
+
+    def run(self, generation):
+        while True:
+            with self._condition:
+                while True:
+                    if self._generation != generation:
+                        return
+                    timer, wait = self._pop_due()
+                    if timer is not None:
+                        break
+                    self._condition.wait(wait)
+            self._call(timer)
+
+    def _drop_stale(self):
+        while self._heap:
+            _, sequence, timer = self._heap[0]
+            if sequence != timer.sequence:
+                self._stale -= 1
+            elif timer.cancelled:
+                timer.sequence = None
+            else:
+                return
+            heapq.heappop(self._heap)
+
+    # (timer, None) when the earliest timer is due, periodic ones queued again; otherwise
+    # (None, seconds until it is due), or (None, None) without timers. Condition held.
+    def _pop_due(self):
+        self._drop_stale()
+        if not self._heap:
+            return None, None
+        due, _, timer = self._heap[0]
+        now = self.clock()
+        if due > now:
+            return None, due - now
+        heapq.heappop(self._heap)
+        if timer.interval:
+            timer.due = max(due + timer.interval, now)
+            timer.sequence = next(self._sequence)
+            heapq.heappush(self._heap, (timer.due, timer.sequence, timer))
+        else:
+            timer.sequence = None
+        return timer, None
+
+    def _call(self, timer):
+        try:
+            timer.callback(*timer.args)
+        except Exception as e:
+            logging.error(f"Error in scheduled {timer.name}: {str(e)}")
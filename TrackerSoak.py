@@ -0,0 +1,402 @@
+"""Accelerated soak test of the tracker engine over simulated weeks. Does not import tkinter.
+
+Usage: python TrackerSoak.py [--days 14] [--sample-hours 6] [--seed N] [--charts] [--threshold SECONDS]
+                             [--output samples.csv] [--json]
+
+A virtual clock stands in for the tracker's wall and elapsed clocks, and its timer
+scheduler runs without a thread, so inactivity deadlines, ticks, hour boundaries and
+status writes fire in simulated time as fast as they can be processed. A seeded
+synthetic user works weekdays with breaks and is away at night and on weekends;
+tracking is restarted once a day, the machine is suspended overnight now and then and
+the clock is moved by an hour once a week. A poll like the widget's reads a snapshot
+every simulated minute.
+
+Every --sample-hours the process RSS, traced Python memory (tracemalloc), open file
+descriptors, threads, live matplotlib figures and the tracker's own buffers are
+sampled. The first quarter of the run is warm-up; a metric fails when its least-squares
+trend over the rest grows by more than its tolerance, and the exit status is then 1.
+"""
+import gc
+import os
+import sys
+import csv
+import json
+import time
+import ctypes
+import random
+import argparse
+import logging
+import tempfile
+import statistics
+import threading
+import tracemalloc
+from collections import deque
+from datetime import datetime, timedelta
+from TrackerCore import (ActivityTracker, INACTIVITY_THRESHOLD, EVENT_TYPES, rolling_inactivity, minute_inactivity,
+                         to_rolling_seconds)
+from TrackerScheduler import TimerScheduler
+
+SIMULATION_START = datetime(2024, 3, 4, 6)  # a Monday morning
+SEED = 20240304
+WARMUP_FRACTION = 0.25  # samples left out of the trend
+UI_POLL_INTERVAL = 60  # simulated seconds between widget-style snapshot reads
+LOG_LINES = 500  # log lines kept by the simulated client, as in the GUI's log view
+EVENT_WEIGHTS = (70, 8, 2, 20)  # relative frequency of each EVENT_TYPES input
+
+# metric -> (absolute, relative) growth allowed over the measured part of the run
+TOLERANCES = {
+    'rss_kb': (4096, 0.05),
+    'traced_kb': (512, 0.05),
+    'open_fds': (2, 0),
+    'threads': (1, 0),
+    'figures': (1, 0),
+    'periods': (10, 0),
+    'gap_buffer': (50, 0),
+    'event_days': (1, 0),
+}
+# Metrics judged by their floor: each sample is replaced by the lowest value from then on.
+# RSS swings by hundreds of MB around chart renders as the allocator keeps and returns
+# buffers; a leak raises the floor, a transient peak does not.
+FLOOR_METRICS = {'rss_kb'}
+
+
+class VirtualClock:
+    """Wall and elapsed time that only move when told to."""
+
+    def __init__(self, start):
+        self.wall = start
+        self.elapsed_seconds = 0.0
+
+    def now(self):
+        return self.wall
+
+    def elapsed(self):
+        return self.elapsed_seconds
+
+    # Normal passage of time, also what a suspend looks like to CLOCK_BOOTTIME
+    def advance_to(self, elapsed_seconds):
+        delta = elapsed_seconds - self.elapsed_seconds
+        if delta > 0:
+            self.wall += timedelta(seconds=delta)
+            self.elapsed_seconds = elapsed_seconds
+
+    # A wall-clock change (DST, NTP step) that elapsed time does not see
+    def jump(self, seconds):
+        self.wall += timedelta(seconds=seconds)
+
+
+class SyntheticUser:
+    """Seeded input of an office worker: two stretches a weekday, none at night or at weekends."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.stretches = []  # (start, end) wall times of the planned working stretches
+        self.planned = None  # last day planned
+
+    def plan_day(self, day):
+        if day.weekday() >= 5:
+            return
+        midnight = datetime.combine(day, datetime.min.time())
+        rng = self.rng
+        morning = midnight + timedelta(hours=8, minutes=rng.uniform(-30, 30))
+        lunch = midnight + timedelta(hours=12, minutes=rng.uniform(-20, 20))
+        afternoon = lunch + timedelta(minutes=rng.uniform(30, 75))
+        evening = midnight + timedelta(hours=17, minutes=rng.uniform(0, 90))
+        self.stretches += [(morning, lunch), (afternoon, evening)]
+
+    # Wall time and type of the first input after moment
+    def next_input(self, moment):
+        while True:
+            while not self.stretches or self.stretches[-1][1] <= moment:
+                self.planned = self.planned + timedelta(days=1) if self.planned else moment.date()
+                self.plan_day(self.planned)
+            start, end = self.stretches[0]
+            if end <= moment:
+                self.stretches.pop(0)
+                continue
+            moment = max(moment, start)
+            # Mostly a steady stream of input, now and then a pause long enough to count
+            if self.rng.random() < 0.004:
+                gap = self.rng.uniform(60, 1200)
+            else:
+                gap = min(self.rng.expovariate(1 / 4), 45)
+            at = moment + timedelta(seconds=gap)
+            if at < end:
+                return at, self.rng.choices(range(len(EVENT_TYPES)), EVENT_WEIGHTS)[0]
+            moment = end
+
+
+# Hand freed heap pages back to the OS (glibc only), so RSS shows memory in use rather
+# than allocator slack left by large transient buffers such as a chart's 4K canvas
+def trim_heap():
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def process_rss_kb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss // 1024
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def open_fd_count():
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        pass
+    try:
+        import psutil
+        process = psutil.Process()
+        return process.num_handles() if hasattr(process, 'num_handles') else process.num_fds()
+    except ImportError:
+        return None
+
+
+# Live matplotlib Figure objects; 0 while matplotlib has not been imported
+def figure_count():
+    figure_module = sys.modules.get('matplotlib.figure')
+    if figure_module is None:
+        return 0
+    return sum(1 for obj in gc.get_objects() if isinstance(obj, figure_module.Figure))
+
+
+class SoakRun:
+    """One simulated run: the tracker, its client, the disruptions and the sampler."""
+
+    def __init__(self, directory, days, sample_hours, seed, charts, threshold):
+        self.days = days
+        self.warmup_samples = int(days * 24 / sample_hours * WARMUP_FRACTION)
+        self.rng = random.Random(seed)
+        self.clock = VirtualClock(SIMULATION_START)
+        self.user = SyntheticUser(self.rng)
+        self.harness = TimerScheduler('SoakHarness', clock=self.clock.elapsed, threaded=False)
+        self.tracker = ActivityTracker(threshold=threshold,
+                                       hourly_csv_dir=os.path.join(directory, 'hourly_csv'),
+                                       hourly_charts_dir=os.path.join(directory, 'hourly_charts'),
+                                       status_file=os.path.join(directory, 'program_status.txt'),
+                                       generate_charts=charts,
+                                       activity_gaps_dir=os.path.join(directory, 'activity_gaps'),
+                                       activity_bitmaps_dir=os.path.join(directory, 'activity_bitmaps'),
+                                       hourly_events_dir=os.path.join(directory, 'hourly_events'),
+                                       wall_clock=self.clock.now, monotonic_clock=self.clock.elapsed,
+                                       scheduler=TimerScheduler('SoakTracker', clock=self.clock.elapsed,
+                                                                threaded=False))
+        # A client like the GUI: a bounded log view fed by the observer
+        self.log_lines = deque(maxlen=LOG_LINES)
+        self.tracker.add_observer(self.on_tracker_event)
+        self.disrupted = False
+        self.samples = []
+        self.inputs = 0
+        self.restarts = 0
+        self.suspends = 0
+        self.clock_changes = 0
+        self.first_snapshot = None
+        self.last_snapshot = None
+
+        self.harness.call_every(UI_POLL_INTERVAL, self.poll_like_widget)
+        self.harness.call_every(sample_hours * 3600, self.sample, first_delay=0)
+        self.harness.call_every(86400, self.restart, first_delay=self.rng.uniform(19, 22) * 3600)
+        self.harness.call_every(3 * 86400, self.suspend, first_delay=self.rng.uniform(39, 44) * 3600)
+        self.harness.call_every(7 * 86400, self.change_clock, first_delay=5.5 * 86400)
+
+    def on_tracker_event(self, event, data):
+        if event == 'log':
+            self.log_lines.append(data['message'])
+
+    def poll_like_widget(self):
+        snapshot = self.tracker.snapshot()
+        if not snapshot['running']:
+            return
+        rolling_inactivity(snapshot)
+        newest = int(to_rolling_seconds(snapshot['now']) // 60)
+        minute_inactivity(snapshot, newest - 59, newest)
+
+    def restart(self):
+        self.tracker.stop(flush_partial_hour=True)
+        self.tracker.start(listen=False)
+        self.restarts += 1
+
+    # Overnight suspend: wall and elapsed time both move on with no timer firing in between
+    def suspend(self):
+        self.clock.advance_to(self.clock.elapsed() + self.rng.uniform(2, 6) * 3600)
+        self.suspends += 1
+        self.disrupted = True
+
+    # A one-hour wall-clock change, alternately forward and back
+    def change_clock(self):
+        self.clock.jump(3600 if self.clock_changes % 2 == 0 else -3600)
+        self.clock_changes += 1
+        self.disrupted = True
+
+    def sample(self):
+        gc.collect()
+        trim_heap()
+        tracker = self.tracker
+        with tracker._lock:
+            periods = len(tracker.inactivity_periods)
+            gap_buffer = len(tracker.gap_buffer)
+            event_days = len(tracker.event_counters.days)
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        if snapshot:
+            if self.first_snapshot is None and len(self.samples) >= self.warmup_samples:
+                self.first_snapshot = snapshot
+            self.last_snapshot = snapshot
+        self.samples.append({
+            'hours': round(self.clock.elapsed() / 3600, 3),
+            'simulated': self.clock.now().strftime('%Y-%m-%d %H:%M'),
+            'rss_kb': process_rss_kb(),
+            'traced_kb': tracemalloc.get_traced_memory()[0] // 1024 if tracemalloc.is_tracing() else None,
+            'open_fds': open_fd_count(),
+            'threads': threading.active_count(),
+            'figures': figure_count(),
+            'periods': periods,
+            'gap_buffer': gap_buffer,
+            'event_days': event_days,
+        })
+        print(' '.join(f"{key}={value}" for key, value in self.samples[-1].items()), file=sys.stderr)
+
+    def next_due(self):
+        dues = [due for due in (self.harness.next_due(), self.tracker.scheduler.next_due()) if due is not None]
+        return min(dues) if dues else None
+
+    def run(self):
+        end = self.days * 86400
+        self.tracker.start(listen=False)
+        while self.clock.elapsed() < end:
+            input_at, event_type = self.user.next_input(self.clock.now())
+            target = min(end, self.clock.elapsed() + (input_at - self.clock.now()).total_seconds())
+
+            # Fire every timer due before the input, in order
+            self.disrupted = False
+            due = self.next_due()
+            while due is not None and due <= target and not self.disrupted:
+                self.clock.advance_to(due)
+                self.harness.run_due()
+                self.tracker.scheduler.run_due()
+                due = self.next_due()
+            if self.disrupted:
+                continue  # the clock moved under the planned input; plan again
+
+            self.clock.advance_to(target)
+            if target < end and self.tracker.is_running:
+                self.tracker.update_activity_time(event_type)
+                self.inputs += 1
+        if not self.samples or self.samples[-1]['hours'] != round(end / 3600, 3):
+            self.sample()
+        self.tracker.stop(flush_partial_hour=True)
+
+
+# Least-squares growth of a metric over the samples after warm-up, and its limit
+def trend(samples, metric):
+    start = int(len(samples) * WARMUP_FRACTION)
+    points = [(sample['hours'], sample[metric]) for sample in samples[start:] if sample[metric] is not None]
+    if len(points) < 3:
+        return None
+    hours = [hour for hour, _ in points]
+    values = [value for _, value in points]
+    if metric in FLOOR_METRICS:
+        for i in range(len(values) - 2, -1, -1):
+            values[i] = min(values[i], values[i + 1])
+    if len(set(values)) == 1:
+        slope = 0.0
+    else:
+        slope = statistics.linear_regression(hours, values).slope
+    growth = slope * (hours[-1] - hours[0])
+    absolute, relative = TOLERANCES[metric]
+    limit = max(absolute, relative * abs(values[0]))
+    return {
+        'first': values[0],
+        'last': values[-1],
+        'growth': round(growth, 3),
+        'limit': round(limit, 3),
+        'failed': growth > limit,
+    }
+
+
+# Source lines whose traced memory grew most between the first and last measured snapshot
+def top_growth(run, count=10):
+    if not run.first_snapshot or not run.last_snapshot:
+        return []
+    exclude = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    last = run.last_snapshot.filter_traces(exclude)
+    first = run.first_snapshot.filter_traces(exclude)
+    return [str(stat) for stat in last.compare_to(first, 'lineno')[:count]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Accelerated soak test of the tracker engine")
+    parser.add_argument('--days', type=float, default=14, help="simulated days (default: 14)")
+    parser.add_argument('--sample-hours', type=float, default=6,
+                        help="simulated hours between samples (default: 6)")
+    parser.add_argument('--seed', type=int, default=SEED, help="seed of the synthetic user and disruptions")
+    parser.add_argument('--threshold', type=int, default=INACTIVITY_THRESHOLD,
+                        help="inactivity threshold in seconds")
+    parser.add_argument('--charts', action='store_true',
+                        help="render the hourly charts at rollover as well (slow: about a second per hour)")
+    parser.add_argument('--no-tracemalloc', action='store_true', help="skip tracemalloc, which slows the run")
+    parser.add_argument('--output', help="write the samples to this CSV file")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    # The engine logs every period and rollover; keep that out of the run
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix='tracker_soak_') as directory:
+        run = SoakRun(directory, args.days, args.sample_hours, args.seed, args.charts, args.threshold)
+        run.run()
+    elapsed = time.perf_counter() - started
+
+    results = {metric: trend(run.samples, metric) for metric in TOLERANCES}
+    failed = [metric for metric, result in results.items() if result and result['failed']]
+    report = {
+        'simulated_days': args.days,
+        'wall_seconds': round(elapsed, 1),
+        'speedup': round(args.days * 86400 / elapsed),
+        'inputs': run.inputs,
+        'restarts': run.restarts,
+        'suspends': run.suspends,
+        'clock_changes': run.clock_changes,
+        'trends': results,
+        'failed': failed,
+        'top_growth': top_growth(run),
+    }
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(run.samples[0]))
+            writer.writeheader()
+            writer.writerows(run.samples)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{args.days:g} simulated days in {elapsed:.0f}s ({report['speedup']}x), {run.inputs} inputs, "
+              f"{run.restarts} restarts, {run.suspends} suspends, {run.clock_changes} clock changes")
+        print(f"{'Metric':<12} {'First':>10} {'Last':>10} {'Growth':>10} {'Limit':>10}")
+        for metric, result in results.items():
+            if result is None:
+                print(f"{metric:<12} {'n/a':>10}")
+                continue
+            print(f"{metric:<12} {result['first']:>10} {result['last']:>10} {result['growth']:>10} "
+                  f"{result['limit']:>10}  {'FAIL' if result['failed'] else 'ok'}")
+        if failed:
+            print("Largest traced growth:")
+            for line in report['top_growth']:
+                print(f"  {line}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+"""Command-line tools for the tracker's recorded data.
+
+Usage: python TrackerTools.py sweep --date YYYY-MM-DD [--to YYYY-MM-DD] [--thresholds 30,60,120,300] [--hourly] [--json]
+       python TrackerTools.py regenerate --date YYYY-MM-DD [--to YYYY-MM-DD] --threshold SECONDS [--charts]
+                                     [--bucket-minutes MINUTES]
+       python TrackerTools.py bitmap --date YYYY-MM-DD [--to YYYY-MM-DD] [--threshold SECONDS] [--json]
+       python TrackerTools.py export --date YYYY-MM-DD [--to YYYY-MM-DD] [--format parquet|arrow] [--output DIR]
+       python TrackerTools.py chart --date YYYY-MM-DD [--to YYYY-MM-DD] [--hour H] [--size 1920x1080] [--output DIR]
+       python TrackerTools.py fleet ROOT [--date YYYY-MM-DD] [--to YYYY-MM-DD] [--daily] [--output FILE] [--workers N]
+       python TrackerTools.py dashboard [--output DIR] [--csv-dir DIR] [--force]
+       python TrackerTools.py subscribe [--events inactive,active,...] [--socket PATH | --port PORT] [--json]
+"""
+import os
+import sys
+import csv
+import json
+import shutil
+import argparse
+import logging
+from datetime import datetime, timedelta
+
+
+def parse_date(text):
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+
+def bucket_minutes_arg(text):
+    from TrackerCore import check_bucket_minutes
+    try:
+        return check_bucket_minutes(int(text))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_thresholds(text):
+    return [float(value) for value in text.split(',') if value.strip()]
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def date_range(args):
+    first_date = args.date
+    last_date = args.to or args.date
+    if last_date < first_date:
+        first_date, last_date = last_date, first_date
+    day = first_date
+    while day <= last_date:
+        yield day
+        day += timedelta(days=1)
+
+
+def run_sweep(args):
+    from TrackerAnalysis import sweep_day
+
+    results = []
+    for day in date_range(args):
+        sweep = sweep_day(args.gaps_dir, day, args.thresholds, hourly=args.hourly)
+        for bucket_start, seconds_row, periods_row in zip(sweep['bucket_starts'], sweep['inactive_seconds'],
+                                                          sweep['periods']):
+            for threshold, seconds, periods in zip(sweep['thresholds'], seconds_row, periods_row):
+                results.append({
+                    'start': bucket_start.strftime('%Y-%m-%d %H:%M') if args.hourly else day.isoformat(),
+                    'threshold': float(threshold),
+                    'inactive_seconds': round(float(seconds), 3),
+                    'periods': int(periods),
+                })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'Period':<17} {'Threshold':>9} {'Inactive':>10} {'Periods':>8}")
+        for row in results:
+            print(f"{row['start']:<17} {row['threshold']:>8g}s {format_duration(row['inactive_seconds']):>10} "
+                  f"{row['periods']:>8}")
+    return 0
+
+
+def run_regenerate(args):
+    from TrackerAnalysis import regenerate_hourly_csvs
+
+    days = list(date_range(args))
+    written = regenerate_hourly_csvs(args.gaps_dir, args.csv_dir, days[0], days[-1], args.threshold,
+                                     charts_dir=args.charts_dir if args.charts else None,
+                                     bucket_minutes=args.bucket_minutes)
+    print(f"Regenerated {len(written)} CSVs at a {args.threshold:g}s threshold")
+    return 0
+
+
+def run_bitmap(args):
+    from TrackerAnalysis import load_bitmap, active_seconds, tracked_seconds, bitmap_inactivity, hourly_seconds
+
+    results = []
+    for day in date_range(args):
+        bitmap = load_bitmap(args.bitmaps_dir, day)
+        tracked = hourly_seconds(tracked_seconds(bitmap))
+        active = hourly_seconds(active_seconds(bitmap))
+        inactive = hourly_seconds(bitmap_inactivity(bitmap, args.threshold))
+        for hour in range(24):
+            if tracked[hour]:
+                results.append({'start': f"{day.isoformat()} {hour:02d}:00", 'tracked_seconds': int(tracked[hour]),
+                                'input_seconds': int(active[hour]), 'inactive_seconds': int(inactive[hour])})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'Hour':<17} {'Tracked':>9} {'Input':>9} {'Inactive':>9}  (threshold {args.threshold:g}s)")
+        for row in results:
+            print(f"{row['start']:<17} {format_duration(row['tracked_seconds']):>9} "
+                  f"{format_duration(row['input_seconds']):>9} {format_duration(row['inactive_seconds']):>9}")
+    return 0
+
+
+def run_export(args):
+    try:
+        from TrackerExport import export_history
+    except ImportError as e:
+        logging.error(f"Export needs pyarrow (pip install pyarrow): {str(e)}")
+        return 2
+
+    days = list(date_range(args))
+    written = export_history(args.csv_dir, args.output, days[0], days[-1], export_format=args.format,
+                             bitmaps_dir=args.bitmaps_dir, events_dir=args.events_dir, user=args.user,
+                             host=args.host, force=args.force)
+    print(f"Exported {len(written)} of {len(days)} days to {args.output} ({args.format})")
+    return 0
+
+
+# Charts of the requested days' buckets (of any size), rendered through the chart cache
+# and copied out under the names the eager rollover charts use
+def run_chart(args):
+    from TrackerChartCache import ChartCache, parse_size
+    from TrackerCharts import chart_file_name
+    from TrackerCore import scan_bucket_csvs
+
+    size = parse_size(args.size)
+    cache = ChartCache(args.cache_dir, args.cache_mb * 1024 * 1024)
+    days = list(date_range(args))
+    bucket_days = scan_bucket_csvs(args.csv_dir, days[0], days[-1])
+    written = 0
+    for day in days:
+        for bucket_start, bucket_minutes, _ in bucket_days.get(day, []):
+            # --hour picks the buckets starting in that hour (or the day's bucket)
+            if args.hour is not None and bucket_minutes < 1440 and bucket_start.hour != args.hour:
+                continue
+            chart_path = cache.hour_chart(args.csv_dir, bucket_start, args.events_dir, size,
+                                          bucket_minutes=bucket_minutes)
+            if chart_path is None:
+                continue
+            date_dir = os.path.join(args.output, bucket_start.strftime('%d %B %Y'))
+            os.makedirs(date_dir, exist_ok=True)
+            shutil.copyfile(chart_path, os.path.join(date_dir, chart_file_name(bucket_start, bucket_minutes)))
+            written += 1
+    print(f"Wrote {written} charts to {args.output} ({cache.hits} cached, {cache.misses} rendered)")
+    return 0
+
+
+def run_fleet(args):
+    from TrackerFleet import aggregate_fleet, daily_totals
+
+    rows, stats = aggregate_fleet(args.root, manifest_file=args.manifest, workers=args.workers)
+    if args.date:
+        last_date = args.to or args.date
+        rows = [row for row in rows if args.date <= row['hour_start'].date() <= last_date]
+
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        writer = csv.writer(output)
+        if args.daily:
+            writer.writerow(['User', 'Date', 'Hours', 'Inactive Minutes', 'Periods'])
+            for day in daily_totals(rows):
+                writer.writerow([day['user'], day['date'].isoformat(), round(day['hours'], 2),
+                                 round(day['inactive_seconds'] / 60, 2), day['periods']])
+        else:
+            # Start and Bucket Minutes come last, so the columns of hourly reports keep their places
+            writer.writerow(['User', 'Date', 'Hour', 'Inactive Minutes', 'Inactive Percentage', 'Periods',
+                             'Start', 'Bucket Minutes'])
+            for row in rows:
+                writer.writerow([row['user'], row['hour_start'].date().isoformat(), row['hour_start'].hour,
+                                 round(row['inactive_seconds'] / 60, 2),
+                                 round(row['inactive_seconds'] / (row['bucket_minutes'] * 60) * 100, 2),
+                                 row['periods'], row['hour_start'].strftime('%H:%M'), row['bucket_minutes']])
+    finally:
+        if args.output:
+            output.close()
+
+    print(f"{stats['files']} files: {stats['parsed']} parsed, {stats['reused']} unchanged, "
+          f"{stats['removed']} removed, {stats['failed']} failed", file=sys.stderr)
+    return 1 if stats['failed'] else 0
+
+
+def run_dashboard(args):
+    from TrackerDashboard import build_dashboard
+
+    stats = build_dashboard(args.csv_dir, args.output, force=args.force)
+    print(f"{stats['files']} files ({stats['hashed']} hashed, {stats['failed']} failed), {stats['pages']} pages: "
+          f"{stats['written']} written, {stats['removed']} removed, in {args.output}", file=sys.stderr)
+    return 1 if stats['failed'] else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tracker data tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_range_arguments(subparser):
+        subparser.add_argument('--date', type=parse_date, required=True, help="first day (YYYY-MM-DD)")
+        subparser.add_argument('--to', type=parse_date, help="last day (YYYY-MM-DD), default: --date")
+        subparser.add_argument('--gaps-dir', default='activity_gaps', help="directory of the recorded input gaps")
+
+    sweep = subparsers.add_parser('sweep', help="inactivity totals for several thresholds from the recorded gaps")
+    add_range_arguments(sweep)
+    sweep.add_argument('--thresholds', type=parse_thresholds, default=[30, 60, 120, 300],
+                       help="comma-separated thresholds in seconds (default: 30,60,120,300)")
+    sweep.add_argument('--hourly', action='store_true', help="one row per hour instead of per day")
+    sweep.add_argument('--json', action='store_true', help="print JSON instead of a table")
+    sweep.set_defaults(run=run_sweep)
+
+    regenerate = subparsers.add_parser('regenerate', help="rewrite the CSVs as if another threshold had been used")
+    add_range_arguments(regenerate)
+    regenerate.add_argument('--threshold', type=float, required=True, help="threshold in seconds")
+    regenerate.add_argument('--csv-dir', default='hourly_csv', help="directory of the CSV logs")
+    regenerate.add_argument('--bucket-minutes', type=bucket_minutes_arg,
+                            help="bucket size of days without CSVs (default: 60); days with CSVs keep theirs, "
+                                 "and must match when this is given")
+    regenerate.add_argument('--charts', action='store_true', help="re-render the hourly charts as well")
+    regenerate.add_argument('--charts-dir', default='hourly_charts', help="directory of the hourly charts")
+    regenerate.set_defaults(run=run_regenerate)
+
+    bitmap = subparsers.add_parser('bitmap', help="per-hour tracked, input and inactive time from the activity bitmaps")
+    add_range_arguments(bitmap)
+    bitmap.add_argument('--bitmaps-dir', default='activity_bitmaps', help="directory of the activity bitmaps")
+    bitmap.add_argument('--threshold', type=float, default=60, help="inactivity threshold in seconds (default: 60)")
+    bitmap.add_argument('--json', action='store_true', help="print JSON instead of a table")
+    bitmap.set_defaults(run=run_bitmap)
+
+    export = subparsers.add_parser('export', help="write the history as date-partitioned Parquet or Arrow IPC")
+    add_range_arguments(export)
+    export.add_argument('--format', choices=['parquet', 'arrow'], default='parquet',
+                        help="parquet (compressed) or arrow (IPC files that can be memory-mapped)")
+    export.add_argument('--output', default='history_export', help="output directory (default: history_export)")
+    export.add_argument('--csv-dir', default='hourly_csv', help="directory of the CSV logs (any bucket size)")
+    export.add_argument('--bitmaps-dir', default='activity_bitmaps', help="directory of the activity bitmaps")
+    export.add_argument('--events-dir', default='hourly_events', help="directory of the per-minute event counts")
+    export.add_argument('--user', help="user name to record (default: the current user)")
+    export.add_argument('--host', help="host name to record (default: this machine)")
+    export.add_argument('--force', action='store_true', help="rewrite days whose export is already up to date")
+    export.set_defaults(run=run_export)
+
+    chart = subparsers.add_parser('chart', help="charts of the recorded buckets at any size, rendered on demand "
+                                                "through the cache")
+    add_range_arguments(chart)
+    chart.add_argument('--hour', type=int, choices=range(24), metavar='H',
+                       help="only the buckets starting in this hour (0-23)")
+    chart.add_argument('--size', default='3840x2160', help="WIDTHxHEIGHT in pixels (default: 3840x2160)")
+    chart.add_argument('--output', default='hourly_charts', help="output directory (default: hourly_charts)")
+    chart.add_argument('--csv-dir', default='hourly_csv', help="directory of the CSV logs (any bucket size)")
+    chart.add_argument('--events-dir', default='hourly_events', help="directory of the per-minute event counts")
+    chart.add_argument('--cache-dir', default='chart_cache', help="directory of the chart cache")
+    chart.add_argument('--cache-mb', type=int, default=256, help="disk budget of the chart cache (default: 256)")
+    chart.set_defaults(run=run_chart)
+
+    fleet = subparsers.add_parser('fleet', help="per-user, per-day, per-bucket summary of many users' CSVs")
+    fleet.add_argument('root', help="directory with one CSV directory (or a copy of the tracker's "
+                                    "working directory) per user")
+    fleet.add_argument('--date', type=parse_date, help="first day to report (YYYY-MM-DD), default: all")
+    fleet.add_argument('--to', type=parse_date, help="last day to report (YYYY-MM-DD), default: --date")
+    fleet.add_argument('--daily', action='store_true', help="one row per user and day instead of per bucket")
+    fleet.add_argument('--output', help="CSV file to write (default: standard output)")
+    fleet.add_argument('--manifest', help="manifest of already parsed files (default: ROOT/fleet_manifest.csv)")
+    fleet.add_argument('--workers', type=int, help="parser processes (default: one per CPU)")
+    fleet.set_defaults(run=run_fleet)
+
+    dashboard = subparsers.add_parser('dashboard', help="static HTML dashboard with day, week and month pages, "
+                                                        "rewriting only the pages whose data changed")
+    dashboard.add_argument('--output', default='dashboard', help="output directory (default: dashboard)")
+    dashboard.add_argument('--csv-dir', default='hourly_csv', help="directory of the CSV logs (any bucket size)")
+    dashboard.add_argument('--force', action='store_true', help="rewrite every page")
+    dashboard.set_defaults(run=run_dashboard)
+
+    subscribe = subparsers.add_parser('subscribe', help="print the tracker daemon's state transitions as they happen")
+    subscribe.add_argument('--events', help="comma-separated events (default: started,stopped,reset,inactive,"
+                                            "active,period,rollover,clock_jump; 'log' is also available)")
+    subscribe.add_argument('--socket', help="Unix socket of the daemon (default: ~/.orwelly_tracker.sock)")
+    subscribe.add_argument('--port', type=int, help="loopback TCP port of the daemon")
+    subscribe.add_argument('--json', action='store_true', help="print one JSON object per line")
+    subscribe.set_defaults(run=run_subscribe)
+
+    return parser.parse_args(argv)
+
+
+def run_subscribe(args):
+    from TrackerIPC import subscribe, default_address
+
+    address = args.socket or (('127.0.0.1', args.port) if args.port else default_address())
+    events = [name for name in args.events.split(',') if name.strip()] if args.events else None
+
+    def plain(value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, timedelta):
+            return value.total_seconds()
+        raise TypeError(f"Cannot encode {type(value).__name__}")
+
+    def text(value):
+        return value.strftime('%Y-%m-%d %H:%M:%S') if isinstance(value, datetime) else str(value)
+
+    try:
+        for message in subscribe(address, events):
+            if args.json:
+                print(json.dumps(message, default=plain, separators=(',', ':')), flush=True)
+            elif message['type'] == 'subscribed':
+                state = message['state']
+                status = f"running since {text(state['session_start'])}" if state['running'] else "not running"
+                print(f"Subscribed to {', '.join(message['events'])}; tracking {status}", flush=True)
+            elif message['type'] == 'dropped':
+                print(f"... {message['count']} events dropped ({message['total']} in total)", flush=True)
+            elif message['type'] == 'event':
+                details = ' '.join(f"{key}={text(value)}" for key, value in message['data'].items())
+                print(f"{datetime.now():%H:%M:%S} #{message['seq']} {message['event']} {details}".rstrip(), flush=True)
+    except KeyboardInterrupt:
+        return 0
+    except OSError as e:
+        logging.error(f"Cannot subscribe to the tracker daemon at {address}: {str(e)}")
+        return 1
+    print("Tracker daemon went away", file=sys.stderr)
+    return 1
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        return args.run(args)
+    except ValueError as e:
+        logging.error(str(e))
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+"""Tk helpers shared by the tracker GUI and the desktop widget."""
+import time
+from tkinter import ttk
+from TrackerMetrics import metrics
+
+WAKE_POLL_INTERVAL = 100  # ms between checks on the Tk thread for wakes requested by other threads
+
+
+class VirtualTable(ttk.Frame):
+    """Treeview that only materializes the rows that are visible.
+
+    Rows live in a plain list; a fixed pool of Treeview items is rewritten as the
+    view scrolls, so a 90-day hourly range costs the same to show as a single day.
+    columns is a list of (key, heading, width, anchor); a column's cell text comes
+    from formatters[key](row) when given, otherwise str(row[key]).
+    """
+
+    def __init__(self, master, columns, formatters=None, sort_keys=None, on_select=None, visible_rows=20):
+        super().__init__(master)
+        self.columns = columns
+        self.formatters = formatters or {}
+        self.sort_keys = sort_keys or {}
+        self.on_select = on_select
+        self.rows = []
+        self.top = 0
+        self.sort_column = None
+        self.sort_reverse = False
+        self.selected = set()
+        self.anchor = None
+
+        keys = [column[0] for column in columns]
+        self.tree = ttk.Treeview(self, columns=keys, show='headings', height=visible_rows, selectmode='none')
+        for key, heading, width, anchor in columns:
+            self.tree.heading(key, text=heading, command=lambda k=key: self.sort_by(k))
+            self.tree.column(key, width=width, anchor=anchor, stretch=True)
+        self.tree.tag_configure('selected', background='#cce0ff')
+
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.on_scrollbar)
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.items = []
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<Button-1>', self.on_click)
+        self.tree.bind('<MouseWheel>', self.on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll_to(self.top - 3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll_to(self.top + 3))
+        self.tree.bind('<Up>', lambda e: self.scroll_to(self.top - 1))
+        self.tree.bind('<Down>', lambda e: self.scroll_to(self.top + 1))
+        self.tree.bind('<Prior>', lambda e: self.scroll_to(self.top - len(self.items)))
+        self.tree.bind('<Next>', lambda e: self.scroll_to(self.top + len(self.items)))
+        self.resize_pool(visible_rows)
+
+    # Replace the data and show it from the top, keeping the current sort order
+    def set_rows(self, rows):
+        self.rows = list(rows)
+        self.selected = set()
+        self.anchor = None
+        self.top = 0
+        if self.sort_column:
+            self.apply_sort()
+        self.refresh()
+        self.notify_selection()
+
+    def selected_rows(self):
+        return [self.rows[i] for i in sorted(self.selected)]
+
+    def sort_by(self, key):
+        if self.sort_column == key:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            # The first column (the time label) sorts ascending, figures largest first
+            self.sort_column = key
+            self.sort_reverse = key != self.columns[0][0]
+        selected = [self.rows[i] for i in self.selected]
+        self.apply_sort()
+
+        # Selection follows the rows, not the positions
+        positions = {id(row): i for i, row in enumerate(self.rows)}
+        self.selected = {positions[id(row)] for row in selected}
+        self.anchor = None
+        self.top = 0
+        self.refresh()
+
+    def apply_sort(self):
+        key = self.sort_column
+        self.rows.sort(key=self.sort_keys.get(key, lambda row: row[key]), reverse=self.sort_reverse)
+        for column_key, heading, _, _ in self.columns:
+            marker = (' ▼' if self.sort_reverse else ' ▲') if column_key == key else ''
+            self.tree.heading(column_key, text=heading + marker)
+
+    # Grow or shrink the item pool to the number of rows that fit
+    def resize_pool(self, count):
+        count = max(1, count)
+        while len(self.items) < count:
+            self.items.append(self.tree.insert('', 'end', values=()))
+        while len(self.items) > count:
+            self.tree.delete(self.items.pop())
+        self.tree.configure(height=count)
+
+    def on_resize(self, event):
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        heading_height = row_height + 4
+        count = max(1, (event.height - heading_height) // row_height)
+        if count != len(self.items):
+            self.resize_pool(count)
+            self.refresh()
+
+    def scroll_to(self, top):
+        top = max(0, min(top, len(self.rows) - len(self.items)))
+        if top != self.top:
+            self.top = top
+            self.refresh()
+        return 'break'
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self.rows)))
+        elif action == 'scroll':
+            step = len(self.items) if unit == 'pages' else 1
+            self.scroll_to(self.top + int(amount) * step)
+
+    def on_mousewheel(self, event):
+        return self.scroll_to(self.top - int(event.delta / 120) * 3)
+
+    # Rewrite the pooled items with the rows in view
+    def refresh(self):
+        for offset, item in enumerate(self.items):
+            index = self.top + offset
+            if index < len(self.rows):
+                row = self.rows[index]
+                values = [self.formatters[key](row) if key in self.formatters else str(row[key])
+                          for key, _, _, _ in self.columns]
+                tags = ('selected',) if index in self.selected else ()
+                self.tree.item(item, values=values, tags=tags)
+            else:
+                self.tree.item(item, values=(), tags=())
+
+        if self.rows:
+            first = self.top / len(self.rows)
+            last = min(1.0, (self.top + len(self.items)) / len(self.rows))
+            self.scrollbar.set(first, last)
+        else:
+            self.scrollbar.set(0, 1)
+
+    # Click selects a row, Shift+click a range from the last click, Ctrl+click toggles
+    def on_click(self, event):
+        if self.tree.identify_region(event.x, event.y) != 'cell':
+            return None
+        item = self.tree.identify_row(event.y)
+        if not item:
+            return 'break'
+        index = self.top + self.items.index(item)
+        if index >= len(self.rows):
+            return 'break'
+
+        if event.state & 0x0001 and self.anchor is not None:
+            low, high = sorted((self.anchor, index))
+            self.selected = set(range(low, high + 1))
+        elif event.state & 0x0004:
+            self.selected ^= {index}
+            self.anchor = index
+        else:
+            self.selected = {index}
+            self.anchor = index
+
+        self.tree.focus_set()
+        self.refresh()
+        self.notify_selection()
+        return 'break'
+
+    def notify_selection(self):
+        if self.on_select:
+            self.on_select(self.selected_rows())
+
+
+class Sparkline:
+    """Bars of the last `columns` minutes' inactive fraction on a Tk canvas.
+
+    One rectangle per column, created once. A tick reconfigures only the newest column;
+    all columns are redrawn when a new minute starts or when older minutes changed, e.g.
+    when a period closed. A bar is only reconfigured when its shape or colour changed.
+    """
+
+    def __init__(self, canvas, columns=60, column_width=2, height=14):
+        self.canvas = canvas
+        self.columns = columns
+        self.column_width = column_width
+        self.height = height
+        self.items = [canvas.create_rectangle(0, 0, 0, 0, width=0) for _ in range(columns)]
+        self.drawn = [None] * columns  # (coords, fill) last given to each item
+        self.newest = None  # minute shown in the rightmost column
+
+    # fractions(first, last) returns the inactive fraction (or None) of those minutes
+    def update(self, newest, fractions, full=False):
+        if full or newest != self.newest:
+            first = newest - self.columns + 1
+            for offset, fraction in enumerate(fractions(first, newest)):
+                self.draw(offset, fraction)
+            self.newest = newest
+        else:
+            self.draw(self.columns - 1, fractions(newest, newest)[0])
+
+    def draw(self, offset, fraction):
+        x = offset * self.column_width
+        if fraction is None:
+            top, fill = self.height - 1, '#333333'  # not tracked
+        elif fraction < 0.05:
+            top, fill = self.height - 2, '#4CAF50'  # active
+        else:
+            top, fill = self.height - max(2, round(fraction * self.height)), '#F44336'
+        shape = ((x, top, x + self.column_width - 1, self.height), fill)
+        if self.drawn[offset] == shape:
+            return
+        self.drawn[offset] = shape
+        item = self.items[offset]
+        self.canvas.coords(item, *shape[0])
+        self.canvas.itemconfig(item, fill=fill)
+
+
+class UiScheduler:
+    """Runs a refresh callback on the Tk thread at an adaptive rate.
+
+    Ticks every interval ms, every idle_interval ms while set_idle(True), and not at
+    all while the window is unmapped (minimized or withdrawn). request_wake() may be
+    called from any thread to run a tick within WAKE_POLL_INTERVAL, e.g. on an
+    active/inactive transition; it only sets a flag, so Tk is never called off its
+    thread and a tracker thread never waits for the Tk thread. on_wake, when set, runs
+    on the Tk thread before each requested tick. set_text() only reconfigures a widget when its text changed. The
+    time spent in callbacks on the Tk thread is accumulated for stats(), and each tick's
+    duration is recorded in the 'ui_tick' latency histogram.
+    """
+
+    def __init__(self, root, refresh, interval=1000, idle_interval=5000):
+        self.root = root
+        self.refresh = refresh
+        self.interval = interval
+        self.idle_interval = idle_interval
+        self.active = False
+        self.idle = False
+        self.mapped = True
+        self.timer = None
+        self.rendered = {}
+        self.wake_requested = False
+        self.on_wake = None
+
+        self.created = time.perf_counter()
+        self.busy_seconds = 0.0
+        self.ticks = 0
+        self.updates = 0
+        self.skipped = 0
+
+        root.bind('<Unmap>', self.on_unmap, add='+')
+        root.bind('<Map>', self.on_map, add='+')
+        root.after(WAKE_POLL_INTERVAL, self.poll_wake)
+
+    def start(self):
+        if not self.active:
+            self.active = True
+            self.wake()
+
+    def stop(self):
+        self.active = False
+        self.cancel()
+
+    def cancel(self):
+        if self.timer:
+            self.root.after_cancel(self.timer)
+            self.timer = None
+
+    def set_idle(self, idle):
+        self.idle = idle
+
+    # Run a tick now instead of waiting for the timer (Tk thread only)
+    def wake(self):
+        if self.active and self.mapped:
+            self.cancel()
+            self.tick()
+
+    # Thread-safe wake: only a flag, picked up by poll_wake on the Tk thread
+    def request_wake(self):
+        self.wake_requested = True
+
+    def poll_wake(self):
+        if self.wake_requested:
+            self.wake_requested = False
+            if self.on_wake:
+                self.timed(self.on_wake)()
+            self.wake()
+        self.root.after(WAKE_POLL_INTERVAL, self.poll_wake)
+
+    def tick(self):
+        self.timer = None
+        if not self.active or not self.mapped:
+            return
+        self.ticks += 1
+        started = time.perf_counter()
+        result = self.timed(self.refresh)()
+        metrics.record('ui_tick', time.perf_counter() - started)
+        if result is False:
+            self.active = False
+            return
+        self.timer = self.root.after(self.idle_interval if self.idle else self.interval, self.tick)
+
+    # Wrap a Tk callback so its run time counts as busy time
+    def timed(self, callback):
+        def run(*args):
+            started = time.perf_counter()
+            try:
+                return callback(*args)
+            finally:
+                self.busy_seconds += time.perf_counter() - started
+        return run
+
+    def on_unmap(self, event):
+        if event.widget is self.root:
+            self.mapped = False
+            self.cancel()
+
+    def on_map(self, event):
+        if event.widget is self.root and not self.mapped:
+            self.mapped = True
+            self.wake()
+
+    # Reconfigure a widget only when the text it shows changes
+    def set_text(self, widget, text, **options):
+        key = (widget, tuple(sorted(options.items())))
+        if self.rendered.get(key) == text:
+            self.skipped += 1
+            return
+        self.rendered[key] = text
+        widget.config(text=text, **options)
+        self.updates += 1
+
+    # Canvas item variant of set_text, e.g. for a status dot's fill colour
+    def set_item(self, canvas, item, **options):
+        key = (canvas, item)
+        value = tuple(sorted(options.items()))
+        if self.rendered.get(key) == value:
+            self.skipped += 1
+            return
+        self.rendered[key] = value
+        canvas.itemconfig(item, **options)
+        self.updates += 1
+
+    # Forget what was rendered, e.g. after widgets were changed directly
+    def invalidate(self):
+        self.rendered.clear()
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.created
+        return {
+            'ticks': self.ticks,
+            'widget_updates': self.updates,
+            'skipped_updates': self.skipped,
+            'busy_ms': round(self.busy_seconds * 1000, 1),
+            'busy_percent': round(self.busy_seconds / elapsed * 100, 3) if elapsed > 0 else 0,
+            'uptime_s': round(elapsed, 1),
+        }
@@ -0,0 +1,43 @@
+import socket
+import threading
+
+import pytest
+
+from TrackerIPC import RemoteTracker, encode_message, write_token
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="needs Unix sockets")
+@pytest.mark.parametrize('bad_line', [b'{"type": "delta"}\n', b'{"type": "snap\n', b'[1, 2]\n'])
+def test_malformed_message_disconnects_the_client(tmp_path, bad_line):
+    address = str(tmp_path / 'tracker.sock')
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(address)
+    listener.listen(1)
+    write_token(f"{address}.token")
+    attached = threading.Event()
+    done = threading.Event()
+
+    # A daemon that sends a valid snapshot, then a bad line once the client is attached
+    def serve():
+        connection, _ = listener.accept()
+        connection.makefile('rb').readline()  # the hello
+        connection.sendall(encode_message({'type': 'snapshot', 'state': {'running': False}}))
+        attached.wait(5)
+        connection.sendall(bad_line)
+        done.wait(5)
+        connection.close()
+
+    server = threading.Thread(target=serve, daemon=True)
+    server.start()
+    try:
+        tracker = RemoteTracker(address)
+        disconnected = threading.Event()
+        tracker.add_observer(lambda event, data: event == 'disconnected' and disconnected.set())
+        attached.set()
+        assert disconnected.wait(5)
+        assert not tracker.connected
+    finally:
+        attached.set()
+        done.set()
+        server.join(5)
+        listener.close()
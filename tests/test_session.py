@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from TrackerCore import ActivityTracker, bucket_csv_path, read_periods_csv, session_inactive_seconds
+from TrackerScheduler import TimerScheduler
+from TrackerSoak import VirtualClock
+
+
+def virtual_tracker(tmp_path, clock):
+    scheduler = TimerScheduler('test', clock=clock.elapsed, threaded=False)
+    return scheduler, ActivityTracker(threshold=60, hourly_csv_dir=str(tmp_path / 'csv'),
+                                      status_file=str(tmp_path / 'status.txt'), generate_charts=False,
+                                      activity_gaps_dir=str(tmp_path / 'gaps'),
+                                      activity_bitmaps_dir=str(tmp_path / 'bitmaps'),
+                                      hourly_events_dir=str(tmp_path / 'events'),
+                                      wall_clock=clock.now, monotonic_clock=clock.elapsed, scheduler=scheduler)
+
+
+def advance(clock, scheduler, seconds):
+    clock.advance_to(clock.elapsed() + seconds)
+    scheduler.run_due()
+
+
+def test_reset_keeps_the_current_bucket_periods(tmp_path):
+    clock = VirtualClock(datetime(2024, 5, 1, 9, 0))
+    scheduler, tracker = virtual_tracker(tmp_path, clock)
+    tracker.start(listen=False)
+
+    advance(clock, scheduler, 600)  # inactive from 09:00
+    tracker.update_activity_time()  # active again at 09:10
+    advance(clock, scheduler, 10)
+    tracker.reset_session()
+    assert session_inactive_seconds(tracker.snapshot()) == 0
+
+    advance(clock, scheduler, 3600)  # past the 10:00 rollover
+    tracker.stop()
+
+    periods = read_periods_csv(bucket_csv_path(tracker.hourly_csv_dir, datetime(2024, 5, 1, 9, 0)))
+    assert (datetime(2024, 5, 1, 9, 0), datetime(2024, 5, 1, 9, 10)) in periods
+
+
+def test_reset_while_inactive_counts_from_the_reset(tmp_path):
+    clock = VirtualClock(datetime(2024, 5, 1, 9, 0))
+    scheduler, tracker = virtual_tracker(tmp_path, clock)
+    tracker.start(listen=False)
+
+    advance(clock, scheduler, 600)
+    tracker.reset_session()
+    advance(clock, scheduler, 300)
+    assert session_inactive_seconds(tracker.snapshot()) == 300
+
+    tracker.update_activity_time()
+    assert tracker.closed_inactive_seconds == 300
+    tracker.stop()
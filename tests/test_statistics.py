@@ -0,0 +1,21 @@
+from datetime import date, datetime, timedelta
+
+from TrackerCore import bucket_csv_path, daily_summary_rows, generate_csv_log, load_hourly_summaries
+
+
+def test_daily_rows_fold_quarter_hour_buckets_into_one_row_per_day(tmp_path):
+    for day in (date(2024, 5, 1), date(2024, 5, 2)):
+        for index in range(4 * 9, 4 * 11):  # 09:00 to 11:00 in 15-minute buckets
+            start = datetime.combine(day, datetime.min.time()) + timedelta(minutes=15 * index)
+            generate_csv_log([(start, start + timedelta(minutes=3))], bucket_csv_path(str(tmp_path), start, 15))
+
+    summaries = load_hourly_summaries(str(tmp_path), date(2024, 5, 1), date(2024, 5, 2))
+    rows = daily_summary_rows(summaries)
+
+    assert len(summaries) == 16
+    assert [row['start'] for row in rows] == [datetime(2024, 5, 1), datetime(2024, 5, 2)]
+    for row in rows:
+        assert row['hours'] == 2
+        assert row['inactive_minutes'] == 24
+        assert row['periods'] == 8
+        assert row['inactive_percentage'] == 20